@@ -15,9 +15,11 @@ load_dotenv()
 # ✅ 3. Import your Base and models
 from app.core.database import Base
 from app.auth.models import User, PasswordResetToken
-from app.products.models import Product
-from app.cart.models import CartItem
+from app.products.models import Product, InventoryShard, ProductDeletion
+from app.cart.models import CartItem, StockReservation
 from app.orders.models import Order, OrderItem
+from app.checkout.models import IdempotencyKey
+from app.analytics.models import SalesDaily, SalesDailyProduct
 
 # ✅ 4. Set up Alembic config
 config = context.config
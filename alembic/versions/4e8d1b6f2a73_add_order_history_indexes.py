@@ -0,0 +1,30 @@
+"""Add covering indexes for keyset order history
+
+Revision ID: 4e8d1b6f2a73
+Revises: e2c9f5a7b813
+Create Date: 2026-10-18 19:02:41.518224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8d1b6f2a73'
+down_revision: Union[str, None] = 'e2c9f5a7b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_created', 'orders', ['user_id', 'created_at', 'id'], unique=False, postgresql_include=['total_amount', 'status'])
+    op.create_index('ix_orders_user_status_created', 'orders', ['user_id', 'status', 'created_at', 'id'], unique=False, postgresql_include=['total_amount'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_user_status_created', table_name='orders')
+    op.drop_index('ix_orders_user_created', table_name='orders')
@@ -0,0 +1,31 @@
+"""Add updated_at to products
+
+Revision ID: 5b7d2e8c1a90
+Revises: 3f1a9c2e7b54
+Create Date: 2026-10-18 11:02:47.530118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d2e8c1a90'
+down_revision: Union[str, None] = '3f1a9c2e7b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE products SET updated_at = now() AT TIME ZONE 'utc'")
+    op.create_index(op.f('ix_products_updated_at'), 'products', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_products_updated_at'), table_name='products')
+    op.drop_column('products', 'updated_at')
@@ -0,0 +1,43 @@
+"""Normalize product category and add filter/sort indexes
+
+Revision ID: 7c4e91a3d2f6
+Revises: 5b7d2e8c1a90
+Create Date: 2026-10-18 11:40:09.214533
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e91a3d2f6'
+down_revision: Union[str, None] = '5b7d2e8c1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('category_key', sa.String(), nullable=True))
+    # Same normalization as models.normalize_category: trimmed, single-spaced, lower case
+    op.execute(
+        "UPDATE products SET category_key = "
+        "NULLIF(lower(regexp_replace(trim(category), '\\s+', ' ', 'g')), '')"
+    )
+    op.create_index('ix_products_category_key_price', 'products', ['category_key', 'price', 'id'], unique=False)
+    op.create_index('ix_products_category_key_name', 'products', ['category_key', 'name', 'id'], unique=False)
+    op.create_index('ix_products_category_key_stock', 'products', ['category_key', 'stock', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+    op.create_index('ix_products_stock_id', 'products', ['stock', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_stock_id', table_name='products')
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_category_key_stock', table_name='products')
+    op.drop_index('ix_products_category_key_name', table_name='products')
+    op.drop_index('ix_products_category_key_price', table_name='products')
+    op.drop_column('products', 'category_key')
@@ -0,0 +1,148 @@
+"""Add order_items.created_at and optional monthly partitioning of orders
+
+Revision ID: c7a3e9f14b62
+Revises: b5f2c8d1e049
+Create Date: 2026-10-18 21:37:54.260418
+
+"""
+import os
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a3e9f14b62'
+down_revision: Union[str, None] = 'b5f2c8d1e049'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Opt-in (PostgreSQL 12+): set ORDERS_PARTITIONING=true before running this migration.
+# The DDL is written out here rather than imported from the app, so this revision keeps
+# producing the same schema whatever the models and app/orders/partitions.py become.
+ORDERS_PARTITIONING = os.getenv("ORDERS_PARTITIONING", "false").lower() in ("1", "true", "yes")
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+TABLES = ('orders', 'order_items')
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _serial_sequence(bind, table: str) -> str:
+    return bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}).scalar()
+
+
+def _add_foreign_keys(order_reference: str) -> None:
+    op.execute("ALTER TABLE orders ADD CONSTRAINT orders_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)")
+    op.execute(f"ALTER TABLE order_items ADD CONSTRAINT order_items_order_id_fkey {order_reference}")
+    op.execute(
+        "ALTER TABLE order_items ADD CONSTRAINT order_items_product_id_fkey "
+        "FOREIGN KEY (product_id) REFERENCES products (id) ON DELETE SET NULL"
+    )
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_orders_id', 'orders', ['id'], unique=False)
+    op.create_index('ix_orders_user_created', 'orders', ['user_id', 'created_at', 'id'], unique=False, postgresql_include=['total_amount', 'status'])
+    op.create_index('ix_orders_user_status_created', 'orders', ['user_id', 'status', 'created_at', 'id'], unique=False, postgresql_include=['total_amount'])
+    op.create_index('ix_order_items_id', 'order_items', ['id'], unique=False)
+    op.create_index('ix_order_items_order_created', 'order_items', ['order_id', 'created_at'], unique=False)
+
+
+def _convert_to_partitioned(bind) -> None:
+    """
+    Rebuild orders and order_items partitioned by month of created_at, copying the rows.
+    Primary keys become (id, created_at); idempotency_keys.order_id loses its foreign key.
+    """
+    op.execute("UPDATE orders SET created_at = timezone('utc', now()) WHERE created_at IS NULL")
+    op.execute(
+        "UPDATE order_items SET created_at = orders.created_at FROM orders "
+        "WHERE orders.id = order_items.order_id AND order_items.created_at IS DISTINCT FROM orders.created_at"
+    )
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM orders")).scalar() or datetime.utcnow()
+    first = date(oldest.year, oldest.month, 1)
+    today = datetime.utcnow().date()
+    last = _add_months(date(today.year, today.month, 1), PARTITION_MONTHS_AHEAD)
+
+    for table in TABLES:
+        new = f"{table}_partitioned"
+        op.execute(f"CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        op.execute(f"ALTER TABLE {new} ALTER COLUMN created_at SET NOT NULL")
+        op.execute(f"ALTER TABLE {new} ADD CONSTRAINT {new}_pkey PRIMARY KEY (id, created_at)")
+        month = first
+        while month <= last:
+            op.execute(
+                f"CREATE TABLE {table}_{month:%Y_%m} PARTITION OF {new} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            )
+            month = _add_months(month, 1)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {new} DEFAULT")
+        op.execute(f"INSERT INTO {new} SELECT * FROM {table}")
+        # Keep the id sequence alive when the old table is dropped
+        op.execute(f"ALTER SEQUENCE {_serial_sequence(bind, table)} OWNED BY {new}.id")
+
+    op.execute("ALTER TABLE idempotency_keys DROP CONSTRAINT IF EXISTS idempotency_keys_order_id_fkey")
+    for table in reversed(TABLES):
+        op.execute(f"DROP TABLE {table}")
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table}_partitioned RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {table}_partitioned_pkey TO {table}_pkey")
+
+    _add_foreign_keys("FOREIGN KEY (order_id, created_at) REFERENCES orders (id, created_at)")
+    _create_indexes()
+
+
+def _convert_to_plain(bind) -> None:
+    """
+    Copy the rows still in the partitions back into plain tables. Archived months are not restored.
+    """
+    for table in TABLES:
+        plain = f"{table}_plain"
+        op.execute(f"CREATE TABLE {plain} (LIKE {table} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {plain} SELECT * FROM {table}")
+        op.execute(f"ALTER TABLE {plain} ADD CONSTRAINT {plain}_pkey PRIMARY KEY (id)")
+        op.execute(f"ALTER SEQUENCE {_serial_sequence(bind, table)} OWNED BY {plain}.id")
+
+    for table in reversed(TABLES):
+        op.execute(f"DROP TABLE {table}")
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table}_plain RENAME TO {table}")
+        op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {table}_plain_pkey TO {table}_pkey")
+
+    _add_foreign_keys("FOREIGN KEY (order_id) REFERENCES orders (id)")
+    op.execute(
+        "ALTER TABLE idempotency_keys ADD CONSTRAINT idempotency_keys_order_id_fkey "
+        "FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE SET NULL"
+    )
+    _create_indexes()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('order_items', sa.Column('created_at', sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE order_items SET created_at = "
+        "(SELECT orders.created_at FROM orders WHERE orders.id = order_items.order_id)"
+    )
+    op.execute("UPDATE order_items SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    op.alter_column('order_items', 'created_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_order_items_order_created', 'order_items', ['order_id', 'created_at'], unique=False)
+
+    bind = op.get_bind()
+    if ORDERS_PARTITIONING and bind.dialect.name == "postgresql":
+        _convert_to_partitioned(bind)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql" and bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('orders')"
+    )).first() is not None:
+        _convert_to_plain(bind)
+    op.drop_index('ix_order_items_order_created', table_name='order_items')
+    op.drop_column('order_items', 'created_at')
@@ -0,0 +1,46 @@
+"""Shard sales_daily_product rows by order id
+
+Revision ID: d9e4a1b7c305
+Revises: c7a3e9f14b62
+Create Date: 2026-10-18 23:05:41.518207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e4a1b7c305'
+down_revision: Union[str, None] = 'c7a3e9f14b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows become shard 0; checkouts spread new sales over the other shards
+    op.add_column('sales_daily_product', sa.Column('shard', sa.Integer(), server_default='0', nullable=False))
+    op.drop_constraint(op.f('sales_daily_product_pkey'), 'sales_daily_product', type_='primary')
+    op.create_primary_key(op.f('sales_daily_product_pkey'), 'sales_daily_product', ['day', 'product_id', 'shard'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fold the shards back into one row per (day, product) before restoring the old key
+    op.execute(
+        "CREATE TEMPORARY TABLE sales_daily_product_merged AS "
+        "SELECT day, product_id, MAX(product_name) AS product_name, MAX(category_key) AS category_key, "
+        "SUM(orders) AS orders, SUM(units) AS units, SUM(revenue) AS revenue "
+        "FROM sales_daily_product GROUP BY day, product_id"
+    )
+    op.execute("DELETE FROM sales_daily_product")
+    op.drop_constraint(op.f('sales_daily_product_pkey'), 'sales_daily_product', type_='primary')
+    op.drop_column('sales_daily_product', 'shard')
+    op.create_primary_key(op.f('sales_daily_product_pkey'), 'sales_daily_product', ['day', 'product_id'])
+    op.execute(
+        "INSERT INTO sales_daily_product (day, product_id, product_name, category_key, orders, units, revenue) "
+        "SELECT day, product_id, product_name, category_key, orders, units, revenue FROM sales_daily_product_merged"
+    )
+    op.execute("DROP TABLE sales_daily_product_merged")
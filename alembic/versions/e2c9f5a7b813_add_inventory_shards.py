@@ -0,0 +1,41 @@
+"""Add inventory_shards table and products.stock_shards
+
+Revision ID: e2c9f5a7b813
+Revises: d4b7a2e61c38
+Create Date: 2026-10-18 17:48:12.330871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c9f5a7b813'
+down_revision: Union[str, None] = 'd4b7a2e61c38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('stock_shards', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('inventory_shards',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'shard')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fold sharded stock back into products.stock before dropping the shards
+    op.execute(
+        "UPDATE products SET stock = (SELECT SUM(stock) FROM inventory_shards "
+        "WHERE inventory_shards.product_id = products.id) WHERE stock_shards > 0"
+    )
+    op.drop_table('inventory_shards')
+    op.drop_column('products', 'stock_shards')
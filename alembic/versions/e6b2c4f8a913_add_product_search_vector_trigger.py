@@ -0,0 +1,52 @@
+"""Keep products.search_vector current with a trigger
+
+Revision ID: e6b2c4f8a913
+Revises: d9e4a1b7c305
+Create Date: 2026-10-18 23:48:12.604391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b2c4f8a913'
+down_revision: Union[str, None] = 'd9e4a1b7c305'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every write of name/category/description (API, importer or plain SQL) recomputes the vector
+    op.execute(
+        "CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$ "
+        "BEGIN "
+        "NEW.search_vector := "
+        "setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C'); "
+        "RETURN NEW; "
+        "END $$ LANGUAGE plpgsql"
+    )
+    op.execute(
+        "CREATE TRIGGER products_search_vector_trigger "
+        "BEFORE INSERT OR UPDATE OF name, category, description ON products "
+        "FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()"
+    )
+    # Rows written while no trigger existed and the app skipped indexing them
+    op.execute(
+        "UPDATE products SET search_vector = "
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(category, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'C') "
+        "WHERE search_vector IS NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS products_search_vector_trigger ON products")
+    op.execute("DROP FUNCTION IF EXISTS products_search_vector_update()")
@@ -0,0 +1,34 @@
+"""Add product_deletions table
+
+Revision ID: f1c6d3e8a254
+Revises: e6b2c4f8a913
+Create Date: 2026-10-19 10:12:36.481907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6d3e8a254'
+down_revision: Union[str, None] = 'e6b2c4f8a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_deletions',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index(op.f('ix_product_deletions_deleted_at'), 'product_deletions', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_product_deletions_deleted_at'), table_name='product_deletions')
+    op.drop_table('product_deletions')
@@ -0,0 +1,26 @@
+# Import necessary modules and dependencies
+from fastapi import APIRouter, Depends
+
+from app.core.retry import retry_metrics
+from app.orders.cache import cache_stats as order_cache_stats
+from app.utils.oauth2 import get_admin_user
+
+router = APIRouter(prefix="/admin/metrics", tags=["Admin - Metrics"])
+
+
+# Retry counters of the transactional write paths (checkout, cart, product admin)
+@router.get("/retries")
+def retry_stats(admin=Depends(get_admin_user)) -> dict:
+    """
+    Admin-only: Calls, retries, recoveries and give-ups per write operation since startup.
+    """
+    return retry_metrics.snapshot()
+
+
+# Serialized order detail cache (paid and cancelled orders)
+@router.get("/order-cache")
+def order_cache_metrics(admin=Depends(get_admin_user)) -> dict:
+    """
+    Admin-only: Hit/miss/eviction counters of the order detail cache.
+    """
+    return order_cache_stats()
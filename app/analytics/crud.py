@@ -0,0 +1,84 @@
+from datetime import date
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+
+from app.analytics.models import SalesDaily, SalesDailyProduct
+
+# Every report reads the rollup tables only, never orders/order_items
+
+
+def get_daily_revenue(db: Session, start: date, end: date) -> List[Dict]:
+    """
+    Totals per day in [start, end], summed over the day's shards. Days without sales are omitted.
+    """
+    rows = db.query(
+        SalesDaily.day,
+        func.sum(SalesDaily.orders).label("orders"),
+        func.sum(SalesDaily.units).label("units"),
+        func.sum(SalesDaily.revenue).label("revenue"),
+    ).filter(SalesDaily.day >= start, SalesDaily.day <= end)\
+     .group_by(SalesDaily.day)\
+     .order_by(SalesDaily.day)\
+     .all()
+    return [
+        {"day": row.day, "orders": int(row.orders), "units": int(row.units), "revenue": round(row.revenue, 2)}
+        for row in rows
+    ]
+
+
+def get_revenue_by_category(db: Session, start: date, end: date) -> List[Dict]:
+    """
+    Totals per category in [start, end], highest revenue first.
+    """
+    revenue = func.sum(SalesDailyProduct.revenue)
+    rows = db.query(
+        SalesDailyProduct.category_key,
+        func.sum(SalesDailyProduct.units).label("units"),
+        revenue.label("revenue"),
+    ).filter(SalesDailyProduct.day >= start, SalesDailyProduct.day <= end)\
+     .group_by(SalesDailyProduct.category_key)\
+     .order_by(revenue.desc())\
+     .all()
+    return [
+        {"category": row.category_key, "units": int(row.units), "revenue": round(row.revenue, 2)}
+        for row in rows
+    ]
+
+
+def get_revenue_by_product(
+    db: Session,
+    start: date,
+    end: date,
+    limit: int,
+    category: Optional[str] = None
+) -> List[Dict]:
+    """
+    Top products by revenue in [start, end], optionally within one (normalized) category.
+    """
+    revenue = func.sum(SalesDailyProduct.revenue)
+    query = db.query(
+        SalesDailyProduct.product_id,
+        func.max(SalesDailyProduct.product_name).label("product_name"),
+        func.max(SalesDailyProduct.category_key).label("category_key"),
+        func.sum(SalesDailyProduct.orders).label("orders"),
+        func.sum(SalesDailyProduct.units).label("units"),
+        revenue.label("revenue"),
+    ).filter(SalesDailyProduct.day >= start, SalesDailyProduct.day <= end)
+    if category is not None:
+        query = query.filter(SalesDailyProduct.category_key == category)
+    rows = query.group_by(SalesDailyProduct.product_id)\
+                .order_by(revenue.desc(), SalesDailyProduct.product_id)\
+                .limit(limit)\
+                .all()
+    return [
+        {
+            "product_id": row.product_id,
+            "product_name": row.product_name,
+            "category": row.category_key,
+            "orders": int(row.orders),
+            "units": int(row.units),
+            "revenue": round(row.revenue, 2),
+        }
+        for row in rows
+    ]
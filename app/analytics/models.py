@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, Float, Date, Index, PrimaryKeyConstraint
+from app.core.database import Base
+
+# Rollups are kept in UTC days of orders.created_at and count paid orders only.
+# They are maintained inside the checkout transaction (see app/analytics/rollup.py),
+# so they always agree with orders/order_items; rebuild them with sales_rollup.py.
+
+
+# Per-day totals. Every checkout touches today's row, so the day is split into
+# SALES_DAILY_SHARDS rows (by order id) that concurrent checkouts do not contend on.
+class SalesDaily(Base):
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, nullable=False)
+    shard = Column(Integer, nullable=False)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "shard"),
+    )
+
+
+# Per-day, per-product totals. product_id 0 collects items whose product was deleted;
+# name and category are snapshots, so reports survive product renames and deletes.
+# A hot product would funnel every checkout through one row, so each (day, product) is
+# split into shards by order id like sales_daily; reports sum over the shards.
+class SalesDailyProduct(Base):
+    __tablename__ = "sales_daily_product"
+
+    day = Column(Date, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    shard = Column(Integer, nullable=False, default=0)
+    product_name = Column(String, nullable=False)
+    category_key = Column(String, nullable=True)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "product_id", "shard"),
+        Index("ix_sales_daily_product_category_day", "category_key", "day"),
+    )
@@ -0,0 +1,308 @@
+# Import necessary modules
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+
+from app.analytics.models import SalesDaily, SalesDailyProduct
+from app.core.database import dialect_insert
+from app.orders import partitions
+from app.orders.models import Order, OrderItem, OrderStatus
+from app.products.models import Product
+from app.core.config import logger
+
+# load environment variables from .env file
+load_dotenv()
+
+# Rows per day in sales_daily (and per day and product in sales_daily_product);
+# more shards = less lock contention between checkouts
+SALES_DAILY_SHARDS = int(os.getenv("SALES_DAILY_SHARDS", "8"))
+# Rollup key for order items whose product has since been deleted
+DELETED_PRODUCT_ID = 0
+DELETED_PRODUCT_NAME = "(deleted product)"
+
+# Revenue is a float sum; differences below this are rounding, not drift
+_REVENUE_TOLERANCE = 0.005
+_COUNTERS = ("orders", "units", "revenue")
+
+
+# Upsert statements per (table, dialect), built once so the compiled SQL is cached
+_UPSERTS: Dict[Tuple[str, str], object] = {}
+
+
+def _upsert(db: Session, model, keys: Tuple[str, ...], rows: List[Dict], snapshot: Tuple[str, ...] = ()) -> None:
+    """
+    Add the counters of `rows` to the existing rollup rows (inserting missing ones), as
+    one executemany. Rows are written in key order so concurrent checkouts lock them in the same order.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    cache_key = (table.name, db.get_bind().dialect.name)
+    stmt = _UPSERTS.get(cache_key)
+    if stmt is None:
+        stmt = dialect_insert(db)(table)
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in _COUNTERS}
+        set_.update({name: stmt.excluded[name] for name in snapshot})
+        stmt = _UPSERTS[cache_key] = stmt.on_conflict_do_update(
+            index_elements=[table.c[key] for key in keys], set_=set_
+        )
+    db.execute(stmt, sorted(rows, key=lambda row: tuple(row[key] for key in keys)))
+
+
+def record_sales(db: Session, orders: Iterable[Dict]) -> None:
+    """
+    Add paid orders to the rollups. Each order is a dict with id, created_at and items
+    (product_id, product_name, category_key, quantity, price_at_purchase).
+    Call inside the transaction that marks the orders paid; does not commit.
+    """
+    daily: Dict[Tuple[date, int], Dict] = {}
+    products: Dict[Tuple[date, int, int], Dict] = {}
+    for order in orders:
+        day = order["created_at"].date()
+        shard = order["id"] % SALES_DAILY_SHARDS
+        totals = daily.setdefault(
+            (day, shard), {"day": day, "shard": shard, "orders": 0, "units": 0, "revenue": 0.0}
+        )
+        totals["orders"] += 1
+        for item in order["items"]:
+            revenue = item["quantity"] * item["price_at_purchase"]
+            totals["units"] += item["quantity"]
+            totals["revenue"] += revenue
+            product_id = item["product_id"] or DELETED_PRODUCT_ID
+            line = products.setdefault((day, product_id, shard), {
+                "day": day, "product_id": product_id, "shard": shard,
+                "product_name": item["product_name"] if item["product_id"] else DELETED_PRODUCT_NAME,
+                "category_key": item.get("category_key"), "orders": 0, "units": 0, "revenue": 0.0,
+            })
+            line["orders"] += 1
+            line["units"] += item["quantity"]
+            line["revenue"] += revenue
+
+    _upsert(db, SalesDaily, ("day", "shard"), list(daily.values()))
+    _upsert(
+        db, SalesDailyProduct, ("day", "product_id", "shard"), list(products.values()), ("product_name", "category_key")
+    )
+
+
+def record_completed_orders(db: Session, order_ids: List[int]) -> None:
+    """
+    Add pending orders that are about to be marked paid to the rollups, reading their
+    items (one query). Used by async checkout, where the items were written earlier.
+    Orders no longer pending are skipped, so call it before the status update. Does not commit.
+    """
+    if not order_ids:
+        return
+    rows = db.query(
+        Order.id, Order.created_at, OrderItem.product_id, OrderItem.product_name,
+        OrderItem.quantity, OrderItem.price_at_purchase, Product.category_key
+    ).join(OrderItem, OrderItem.order_id == Order.id)\
+     .outerjoin(Product, Product.id == OrderItem.product_id)\
+     .filter(Order.id.in_(order_ids), Order.status == OrderStatus.pending)\
+     .all()
+    orders: Dict[int, Dict] = {}
+    for row in rows:
+        order = orders.setdefault(row.id, {"id": row.id, "created_at": row.created_at, "items": []})
+        order["items"].append(row._asdict())
+    record_sales(db, orders.values())
+
+
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def source_totals(db: Session, day: date) -> Tuple[Dict[int, Dict], Dict[int, Dict]]:
+    """
+    Recompute one day's rollup rows from orders/order_items (paid orders only).
+    Returns ({shard: totals}, {product_id: totals}).
+    """
+    start, end = _day_bounds(day)
+    paid = (Order.status == OrderStatus.paid, Order.created_at >= start, Order.created_at < end)
+    # Items carry their order's created_at; filtering on it prunes order_items partitions too
+    paid_items = paid + (OrderItem.created_at >= start, OrderItem.created_at < end)
+    revenue = func.sum(OrderItem.quantity * OrderItem.price_at_purchase)
+
+    # Order counts come from orders alone: an order without items still counts
+    shard = (Order.id % SALES_DAILY_SHARDS).label("shard")
+    daily = {
+        row.shard: {"day": day, "shard": row.shard, "orders": row.orders, "units": 0, "revenue": 0.0}
+        for row in db.query(shard, func.count(Order.id).label("orders")).filter(*paid).group_by(shard).all()
+    }
+    item_shard = (OrderItem.order_id % SALES_DAILY_SHARDS).label("shard")
+    for row in db.query(item_shard, func.sum(OrderItem.quantity).label("units"), revenue.label("revenue"))\
+                 .join(Order, Order.id == OrderItem.order_id).filter(*paid_items).group_by(item_shard).all():
+        daily[row.shard].update(units=int(row.units), revenue=float(row.revenue))
+
+    products: Dict[int, Dict] = {}
+    for row in db.query(
+        OrderItem.product_id,
+        func.max(Product.id).label("existing"),
+        func.max(OrderItem.product_name).label("product_name"),
+        func.max(Product.category_key).label("category_key"),
+        func.count(func.distinct(OrderItem.order_id)).label("orders"),
+        func.sum(OrderItem.quantity).label("units"),
+        revenue.label("revenue"),
+    ).join(Order, Order.id == OrderItem.order_id)\
+     .outerjoin(Product, Product.id == OrderItem.product_id)\
+     .filter(*paid_items)\
+     .group_by(OrderItem.product_id)\
+     .all():
+        # Items of deleted products (product_id NULL, or dangling where the FK is not enforced)
+        product_id = row.product_id if row.existing else DELETED_PRODUCT_ID
+        totals = products.setdefault(product_id, {
+            "day": day, "product_id": product_id,
+            "product_name": row.product_name if row.existing else DELETED_PRODUCT_NAME,
+            "category_key": row.category_key, "orders": 0, "units": 0, "revenue": 0.0,
+        })
+        totals["orders"] += row.orders
+        totals["units"] += int(row.units)
+        totals["revenue"] += float(row.revenue)
+    return daily, products
+
+
+def archive_cutoff(db: Session) -> Optional[date]:
+    """
+    First day whose orders are still in the database. The months before it were archived
+    (see app/orders/partitions.py), so their rollup rows are the only record left.
+    """
+    return partitions.oldest_partition_day(db.connection())
+
+
+def _online_start(db: Session, start: date) -> date:
+    cutoff = archive_cutoff(db)
+    if cutoff is not None and start < cutoff:
+        logger.warning(f"Sales rollup: orders before {cutoff} are archived, starting there instead of {start}")
+        return cutoff
+    return start
+
+
+def rebuild_day(db: Session, day: date) -> Tuple[int, int]:
+    """
+    Replace one day's rollup rows with totals recomputed from the orders, in one transaction.
+    Product totals are written to shard 0 only: the day is closed, so nothing contends for them.
+    Returns (orders, product rows). Do not run for a day that is still taking orders.
+    Refuses archived days, whose orders are gone and would rebuild as zeros.
+    """
+    cutoff = archive_cutoff(db)
+    if cutoff is not None and day < cutoff:
+        raise ValueError(f"Orders before {cutoff} have been archived; the rollup of {day} cannot be rebuilt.")
+    daily, products = source_totals(db, day)
+    for model in (SalesDaily, SalesDailyProduct):
+        db.execute(delete(model).where(model.day == day))
+    if daily:
+        db.execute(insert(SalesDaily), list(daily.values()))
+    if products:
+        db.execute(insert(SalesDailyProduct), [dict(row, shard=0) for row in products.values()])
+    db.commit()
+    return sum(row["orders"] for row in daily.values()), len(products)
+
+
+def first_order_day(db: Session) -> Optional[date]:
+    first = db.query(func.min(Order.created_at)).filter(Order.status == OrderStatus.paid).scalar()
+    return first.date() if first else None
+
+
+def backfill(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, int]:
+    """
+    Rebuild the rollups for every day in [start, end] (default: first paid order to yesterday),
+    one transaction per day. Archived days are skipped.
+    """
+    start = start or first_order_day(db)
+    end = end or datetime.utcnow().date() - timedelta(days=1)
+    report = {"days": 0, "orders": 0, "product_rows": 0}
+    if start is None:
+        return report
+    start = _online_start(db, start)
+    day = start
+    while day <= end:
+        orders, product_rows = rebuild_day(db, day)
+        report["days"] += 1
+        report["orders"] += orders
+        report["product_rows"] += product_rows
+        if orders:
+            logger.info(f"Sales rollup rebuilt for {day}: {orders} orders, {product_rows} products")
+        day += timedelta(days=1)
+    return report
+
+
+def _differs(expected: Optional[Dict], actual: Optional[Dict]) -> bool:
+    expected = expected or {"orders": 0, "units": 0, "revenue": 0.0}
+    actual = actual or {"orders": 0, "units": 0, "revenue": 0.0}
+    return expected["orders"] != actual["orders"] \
+        or expected["units"] != actual["units"] \
+        or abs(expected["revenue"] - actual["revenue"]) > _REVENUE_TOLERANCE
+
+
+def check_day(db: Session, day: date) -> List[Dict]:
+    """
+    Compare one day's rollup rows with totals recomputed from the orders.
+    Returns the mismatches as {"table", "key", "expected", "actual"}.
+
+    Product rows are summed over their shards. Rows recorded for products deleted since
+    are compared against the deleted-product bucket, since their order items no longer reference them.
+    """
+    daily, products = source_totals(db, day)
+
+    actual_daily = {
+        row.shard: {"orders": row.orders, "units": row.units, "revenue": row.revenue}
+        for row in db.query(SalesDaily).filter(SalesDaily.day == day).all()
+    }
+    rows = db.query(SalesDailyProduct).filter(SalesDailyProduct.day == day).all()
+    existing = {
+        product_id for (product_id,) in
+        db.query(Product.id).filter(Product.id.in_([row.product_id for row in rows])).all()
+    }
+    actual_products: Dict[int, Dict] = {}
+    for row in rows:
+        product_id = row.product_id if row.product_id in existing else DELETED_PRODUCT_ID
+        totals = actual_products.setdefault(product_id, {"orders": 0, "units": 0, "revenue": 0.0})
+        totals["orders"] += row.orders
+        totals["units"] += row.units
+        totals["revenue"] += row.revenue
+
+    mismatches = []
+    for table, expected, actual in (
+        ("sales_daily", daily, actual_daily),
+        ("sales_daily_product", products, actual_products),
+    ):
+        for key in sorted(set(expected) | set(actual)):
+            if _differs(expected.get(key), actual.get(key)):
+                mismatches.append({
+                    "table": table, "day": day.isoformat(), "key": key,
+                    "expected": {name: (expected.get(key) or {}).get(name, 0) for name in _COUNTERS},
+                    "actual": {name: (actual.get(key) or {}).get(name, 0) for name in _COUNTERS},
+                })
+    return mismatches
+
+
+def check(db: Session, start: Optional[date] = None, end: Optional[date] = None, fix: bool = False) -> Dict:
+    """
+    Check every day in [start, end] (default: first paid order to today); with `fix`,
+    rebuild the days that do not match. Today is never rebuilt: checkouts are still adding
+    to it, and a mismatch seen while they commit may be a race rather than drift.
+    Archived days are skipped: with their orders gone, every one of them would mismatch.
+    """
+    today = datetime.utcnow().date()
+    start = start or first_order_day(db)
+    end = end or today
+    report = {"days": 0, "mismatched_days": [], "mismatches": [], "fixed_days": []}
+    if start is None:
+        return report
+    start = _online_start(db, start)
+    day = start
+    while day <= end:
+        mismatches = check_day(db, day)
+        db.rollback()  # end the read transaction before the next day
+        report["days"] += 1
+        if mismatches:
+            report["mismatched_days"].append(day.isoformat())
+            report["mismatches"].extend(mismatches)
+            logger.warning(f"Sales rollup mismatch on {day}: {len(mismatches)} rows")
+            if fix and day < today:
+                rebuild_day(db, day)
+                report["fixed_days"].append(day.isoformat())
+        day += timedelta(days=1)
+    return report
@@ -0,0 +1,73 @@
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+
+from app.core.database import get_db
+from app.utils.oauth2 import get_admin_user
+from app.analytics import schemas, crud
+from app.products.models import normalize_category
+from app.core.config import logger
+
+router = APIRouter(prefix="/admin/analytics", tags=["Admin - Analytics"])
+
+# Range used when the request gives no start date
+DEFAULT_RANGE_DAYS = 30
+
+
+def _date_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    """
+    Resolve an inclusive [start, end] range of UTC days (default: the last 30 days).
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end.")
+    return start, end
+
+
+@router.get("/revenue/daily", response_model=List[schemas.DailyRevenueOut])
+def daily_revenue(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    admin=Depends(get_admin_user)
+) -> List[dict]:
+    """
+    Admin-only: Paid orders, units and revenue per day.
+    """
+    start, end = _date_range(start, end)
+    logger.info(f"Daily revenue {start}..{end} requested by admin_id={admin.id}")
+    return crud.get_daily_revenue(db, start, end)
+
+
+@router.get("/revenue/by-category", response_model=List[schemas.CategoryRevenueOut])
+def revenue_by_category(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    admin=Depends(get_admin_user)
+) -> List[dict]:
+    """
+    Admin-only: Units and revenue per category, highest revenue first.
+    """
+    start, end = _date_range(start, end)
+    logger.info(f"Revenue by category {start}..{end} requested by admin_id={admin.id}")
+    return crud.get_revenue_by_category(db, start, end)
+
+
+@router.get("/revenue/by-product", response_model=List[schemas.ProductRevenueOut])
+def revenue_by_product(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    admin=Depends(get_admin_user)
+) -> List[dict]:
+    """
+    Admin-only: Top products by revenue, optionally within one category.
+    """
+    start, end = _date_range(start, end)
+    logger.info(f"Revenue by product {start}..{end} requested by admin_id={admin.id}")
+    return crud.get_revenue_by_product(db, start, end, limit, normalize_category(category))
@@ -0,0 +1,34 @@
+# Import necessary modules and classes
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+
+
+class DailyRevenueOut(BaseModel):
+    """
+    Paid orders, units sold and revenue of one day (UTC).
+    """
+    day: date
+    orders: int
+    units: int
+    revenue: float
+
+class CategoryRevenueOut(BaseModel):
+    """
+    Units sold and revenue of one category over the requested range.
+    """
+    category: Optional[str] = None
+    units: int
+    revenue: float
+
+class ProductRevenueOut(BaseModel):
+    """
+    Paid orders, units sold and revenue of one product over the requested range.
+    product_id 0 groups items of deleted products.
+    """
+    product_id: int
+    product_name: str
+    category: Optional[str] = None
+    orders: int
+    units: int
+    revenue: float
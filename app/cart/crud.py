@@ -1,74 +1,142 @@
 # Import necessary modules
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, literal, select
+from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException
-from typing import List
-from app.cart import models
+from typing import Dict, List, Optional, Tuple
+from app.cart import models, reservations, schemas
 from app.products.models import Product
 from app.core.config import logger
+from app.core.database import dialect_insert
+from app.core.retry import retry_transaction
 
 
-def add_to_cart(db: Session, user_id: int, product_id: int, quantity: int) -> str:
+@retry_transaction
+def add_to_cart(db: Session, user_id: int, product_id: int, quantity: int, mode: str = "reject") -> str:
     """
-    Adds a product to the user's cart.
+    Adds a product to the user's cart with a single INSERT ... ON CONFLICT statement.
 
-    - If the product is out of stock, raise an error.
-    - If the product is already in the cart, do not add again, ask to update quantity.
+    - If the product is out of stock, raise an error (checked inside the same statement).
+    - mode="reject": if the product is already in the cart, do not add again, ask to update quantity.
+    - mode="increment": if the product is already in the cart, increase its quantity.
     """
+    # Never let a zero or negative quantity reach the ON CONFLICT DO UPDATE branch
+    check_quantity(quantity)
+    table = models.CartItem.__table__
+    products = Product.__table__
+    insert = dialect_insert(db)
+
+    # Only produces a row when the product exists and is in stock
+    source = select(
+        literal(user_id, Integer), literal(product_id, Integer), literal(quantity, Integer)
+    ).where(products.c.id == product_id, products.c.stock > 0)
+    stmt = insert(table).from_select(["user_id", "product_id", "quantity"], source)
+    if mode == "increment":
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.product_id],
+            set_={"quantity": table.c.quantity + stmt.excluded.quantity},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.user_id, table.c.product_id])
 
-    product = db.query(Product).filter(Product.id == product_id).first()
+    row = db.execute(stmt.returning(table.c.quantity)).first()
+    if row is not None:
+        _hold(db, user_id, product_id, row.quantity)
+    db.commit()
 
-    if not product:
-        logger.warning(f"Add to cart failed: Product not found (product_id={product_id}) by user_id={user_id}")
-        raise HTTPException(status_code=404, detail="Product not found.")
+    if row is None:
+        # Nothing was written: find out why (only on the failure path)
+        product = db.query(Product).filter(Product.id == product_id).first()
 
-    if product.stock == 0:
-        logger.warning(f"Add to cart failed: Product is out of stock (product_id={product_id}) for user_id={user_id}")
-        raise HTTPException(status_code=400, detail="Product is out of stock.")
+        if not product:
+            logger.warning(f"Add to cart failed: Product not found (product_id={product_id}) by user_id={user_id}")
+            raise HTTPException(status_code=404, detail="Product not found.")
 
-    existing_item = db.query(models.CartItem).filter_by(user_id=user_id, product_id=product_id).first()
+        if not product.stock:
+            logger.warning(f"Add to cart failed: Product is out of stock (product_id={product_id}) for user_id={user_id}")
+            raise HTTPException(status_code=400, detail="Product is out of stock.")
 
-    if existing_item:
         logger.warning(f"Add to cart blocked: Product already in cart (product_id={product_id}) for user_id={user_id}")
         raise HTTPException(
             status_code=409,
             detail="Product already in cart. Please update the quantity if needed."
         )
 
-    # Add to cart
-    new_cart_item = models.CartItem(
-        user_id=user_id,
-        product_id=product_id,
-        quantity=quantity
-    )
-    db.add(new_cart_item)
-    db.commit()
-    
+    if row.quantity != quantity:
+        logger.info(f"Cart quantity increased: product_id={product_id}, user_id={user_id}, quantity={row.quantity}")
+        return "Product quantity increased in cart."
+
     logger.info(f"Product added to cart: product_id={product_id}, user_id={user_id}")
 
     return "Product added to cart."
 
 
+def check_quantity(quantity: int) -> None:
+    """
+    Cart quantities are always positive, whichever route they came through.
+    """
+    if quantity < 1:
+        raise HTTPException(status_code=400, detail="Quantity must be at least 1.")
+
+
+def _hold(db: Session, user_id: int, product_id: int, quantity: int) -> None:
+    """
+    Place the stock hold for a cart line, rolling back the pending cart change if it is refused.
+    """
+    try:
+        reservations.hold(db, user_id, product_id, quantity)
+    except HTTPException:
+        db.rollback()
+        raise
+
+
 def get_cart_items(db: Session, user_id: int) -> List[models.CartItem]:
     """
-    Returns all cart items for a given user.
+    Returns all cart items for a given user, with their products loaded in the same query
+    and a subtotal attached to each line.
     """
-    return db.query(models.CartItem).filter_by(user_id=user_id).all()
+    items = db.query(models.CartItem)\
+              .options(joinedload(models.CartItem.product))\
+              .filter_by(user_id=user_id)\
+              .order_by(models.CartItem.id)\
+              .all()
+
+    # Attach subtotal per item
+    for item in items:
+        item.subtotal = round(item.quantity * item.product.price, 2)
+
+    return items
 
 
+def get_cart(db: Session, user_id: int) -> Dict:
+    """
+    Returns the user's cart lines together with server-computed totals.
+    """
+    items = get_cart_items(db, user_id)
+    return {
+        "items": items,
+        "total_items": sum(item.quantity for item in items),
+        "total_amount": round(sum(item.subtotal for item in items), 2),
+    }
+
+
+@retry_transaction
 def update_cart_quantity(db: Session, user_id: int, product_id: int, quantity: int) -> str:
     """
     Updates the quantity of a specific product in the user's cart.
     """
+    check_quantity(quantity)
     cart_item = db.query(models.CartItem).filter_by(user_id=user_id, product_id=product_id).first()
 
     if not cart_item:
         raise HTTPException(status_code=404, detail="Product not found in your cart.")
 
+    _hold(db, user_id, product_id, quantity)
     cart_item.quantity = quantity
     db.commit()
     return "Cart item quantity updated successfully."
 
 
+@retry_transaction
 def remove_cart_item(db: Session, user_id: int, product_id: int) -> str:
     """
     Removes a product from the user's cart.
@@ -78,6 +146,86 @@ def remove_cart_item(db: Session, user_id: int, product_id: int) -> str:
     if not cart_item:
         raise HTTPException(status_code=404, detail="Product not found in your cart.")
 
+    reservations.hold(db, user_id, product_id, 0)
     db.delete(cart_item)
     db.commit()
     return "Product removed from cart successfully."
+
+
+def check_cart_operation(operation: schemas.CartOperation, product: Optional[Product], in_cart: bool) -> Tuple[int, str]:
+    """
+    Decides the outcome of one batch operation with the same rules as the single-item functions.
+    Returns (status code, message); codes below 300 mean the operation should be applied.
+    """
+    if operation.op in ("add", "update") and operation.quantity is None:
+        return 400, "Quantity is required."
+    if operation.op in ("add", "update") and operation.quantity < 1:
+        return 400, "Quantity must be at least 1."
+
+    if operation.op == "add":
+        if not product:
+            return 404, "Product not found."
+        if product.stock == 0:
+            return 400, "Product is out of stock."
+        if in_cart:
+            return 409, "Product already in cart. Please update the quantity if needed."
+        return 201, "Product added to cart."
+
+    if not in_cart:
+        return 404, "Product not found in your cart."
+    if operation.op == "update":
+        return 200, "Cart item quantity updated successfully."
+    return 200, "Product removed from cart successfully."
+
+
+def batch_summary(user_id: int, results: List[Dict]) -> Dict:
+    applied = sum(1 for result in results if result["status_code"] < 300)
+    logger.info(f"Cart batch for user_id={user_id}: {applied} of {len(results)} operations applied")
+    return {"applied": applied, "failed": len(results) - applied, "results": results}
+
+
+@retry_transaction
+def apply_cart_batch(db: Session, user_id: int, operations: List[schemas.CartOperation]) -> Dict:
+    """
+    Applies a list of add/update/remove operations to the user's cart in one transaction.
+
+    - All referenced products and the whole cart are loaded with one query each.
+    - Operations run in order; each gets the same status code and message as the single-item endpoint.
+    - Failed operations are reported and skipped, the successful ones are committed together.
+    """
+    product_ids = {operation.product_id for operation in operations}
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_(product_ids)).all()
+    }
+    cart = {item.product_id: item for item in db.query(models.CartItem).filter_by(user_id=user_id).all()}
+
+    results = []
+    for operation in operations:
+        product_id = operation.product_id
+        code, message = check_cart_operation(operation, products.get(product_id), product_id in cart)
+        if code < 300:
+            try:
+                reservations.hold(db, user_id, product_id, 0 if operation.op == "remove" else operation.quantity)
+            except HTTPException as e:
+                code, message = e.status_code, e.detail
+
+        if code < 300 and operation.op == "add":
+            cart[product_id] = models.CartItem(user_id=user_id, product_id=product_id, quantity=operation.quantity)
+            db.add(cart[product_id])
+        elif code < 300 and operation.op == "update":
+            cart[product_id].quantity = operation.quantity
+        elif code < 300:
+            cart_item = cart.pop(product_id)
+            if cart_item in db.new:
+                # Added earlier in this batch and never written: just drop it
+                db.expunge(cart_item)
+            else:
+                db.delete(cart_item)
+                # Flush now so a later add of the same product does not hit uix_user_product
+                db.flush()
+
+        results.append({"op": operation.op, "product_id": product_id, "status_code": code, "message": message})
+
+    db.commit()
+    return batch_summary(user_id, results)
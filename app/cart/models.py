@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -18,3 +18,19 @@ class CartItem(Base):
     __table_args__ = (
         UniqueConstraint('user_id', 'product_id', name='uix_user_product'),
     )
+
+# Time-boxed hold on stock for a cart line (used when STOCK_RESERVATIONS is enabled)
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'product_id', name='uix_reservation_user_product'),
+        Index('ix_stock_reservations_product_expires', 'product_id', 'expires_at'),
+        Index('ix_stock_reservations_expires_at', 'expires_at'),
+    )
@@ -0,0 +1,130 @@
+# Import necessary modules
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.cart.models import StockReservation
+from app.core.database import SessionLocal, dialect_insert
+from app.products import inventory
+from app.products.models import Product
+from app.core.config import logger
+
+# load environment variables from .env file
+load_dotenv()
+
+# Off by default: stock is only checked at checkout, as before
+RESERVATIONS_ENABLED = os.getenv("STOCK_RESERVATIONS", "false").lower() in ("1", "true", "yes")
+RESERVATION_TTL_SECONDS = int(os.getenv("RESERVATION_TTL_SECONDS", "900"))
+RESERVATION_SWEEP_SECONDS = float(os.getenv("RESERVATION_SWEEP_SECONDS", "60"))
+
+
+def held_by_others(product_id_column, user_id: int):
+    """
+    Correlated subquery: units of the product held by other users' active reservations.
+    """
+    table = StockReservation.__table__
+    return select(func.coalesce(func.sum(table.c.quantity), 0))\
+        .where(
+            table.c.product_id == product_id_column,
+            table.c.user_id != user_id,
+            table.c.expires_at > datetime.utcnow(),
+        )\
+        .scalar_subquery()
+
+
+def hold(db: Session, user_id: int, product_id: int, quantity: int) -> None:
+    """
+    Set the user's hold on a product to `quantity` (0 releases it) and restart its TTL.
+
+    Raises 400 when other users' holds leave too little stock. Does not commit, so the
+    hold is written in the same transaction as the cart change that caused it.
+    """
+    if not RESERVATIONS_ENABLED:
+        return
+    table = StockReservation.__table__
+    if quantity <= 0:
+        db.execute(table.delete().where(table.c.user_id == user_id, table.c.product_id == product_id))
+        return
+
+    # Lock the product row so concurrent holds on it are checked one at a time
+    product = db.query(Product.name, Product.stock, Product.stock_shards)\
+                .filter(Product.id == product_id).with_for_update().first()
+    if product is None:
+        return
+    stock = inventory.shard_totals(db, [product_id]).get(product_id, 0) if product.stock_shards else product.stock
+    available = stock - db.execute(select(held_by_others(product_id, user_id))).scalar()
+    if available < quantity:
+        logger.warning(f"Hold rejected: product_id={product_id}, user_id={user_id}, wanted={quantity}, available={available}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient stock for '{product.name}'. Available: {max(0, available)}"
+        )
+
+    now = datetime.utcnow()
+    insert = dialect_insert(db)
+    stmt = insert(table).values(
+        user_id=user_id, product_id=product_id, quantity=quantity,
+        expires_at=now + timedelta(seconds=RESERVATION_TTL_SECONDS)
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.product_id],
+        set_={"quantity": stmt.excluded.quantity, "expires_at": stmt.excluded.expires_at},
+    ))
+
+
+def consume(db: Session, user_id: int, product_ids: Iterable[int]) -> None:
+    """
+    Drop the user's holds on the given products once checkout has turned them into stock
+    deductions. Holds on other products (a cart built while an async order was queued)
+    are kept. Does not commit.
+    """
+    if not RESERVATIONS_ENABLED:
+        return
+    table = StockReservation.__table__
+    db.execute(table.delete().where(table.c.user_id == user_id, table.c.product_id.in_(list(product_ids))))
+
+
+def sweep(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Delete expired holds. Returns the number released.
+    """
+    table = StockReservation.__table__
+    result = db.execute(table.delete().where(table.c.expires_at <= (now or datetime.utcnow())))
+    db.commit()
+    return result.rowcount
+
+
+def _sweep_forever(stopped: threading.Event) -> None:
+    while not stopped.wait(RESERVATION_SWEEP_SECONDS):
+        db = SessionLocal()
+        try:
+            released = sweep(db)
+            if released:
+                logger.info(f"Released {released} expired stock reservations")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Stock reservation sweep failed: {e}")
+        finally:
+            db.close()
+
+
+_sweeper: Optional[threading.Thread] = None
+
+
+def start_sweeper() -> None:
+    """
+    Start the background thread releasing expired holds (only when reservations are enabled).
+    Expired holds are ignored by every check anyway; sweeping just keeps the table small.
+    """
+    global _sweeper
+    if not RESERVATIONS_ENABLED or _sweeper is not None:
+        return
+    _sweeper = threading.Thread(
+        target=_sweep_forever, args=(threading.Event(),), name="reservation-sweeper", daemon=True
+    )
+    _sweeper.start()
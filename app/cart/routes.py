@@ -3,11 +3,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Union, Dict
 
-from app.cart import schemas, crud
+from app.cart import schemas
+from app.cart.store import CartStore, get_cart_store
 from app.core.database import get_db
 from app.utils.oauth2 import get_user_only
 from app.auth.models import User
-from app.cart.schemas import CartItemOut, MessageResponse
+from app.cart.schemas import CartItemOut, CartOut, MessageResponse
 from app.core.config import logger
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
@@ -17,43 +18,59 @@ router = APIRouter(prefix="/cart", tags=["Cart"])
 def add_to_cart(
     item: schemas.AddToCartSchema,
     db: Session = Depends(get_db),
-    user: User = Depends(get_user_only)
+    user: User = Depends(get_user_only),
+    store: CartStore = Depends(get_cart_store)
 ) -> dict:
     """
-    Add a product to the user's cart. If already exists, increase the quantity.
+    Add a product to the user's cart. If it already exists, reject (default) or increase the quantity.
     """
-    logger.info(f"User {user.id} adding product {item.product_id} (qty={item.quantity}) to cart.")
-    message = crud.add_to_cart(db, user.id, item.product_id, item.quantity)
+    logger.info(f"User {user.id} adding product {item.product_id} (qty={item.quantity}, mode={item.mode}) to cart.")
+    message = store.add(db, user.id, item.product_id, item.quantity, item.mode)
     return {"message": message}
 
 
 @router.get("/getCartItems", response_model=Union[List[CartItemOut], MessageResponse])
 def get_cart_items(
     db: Session = Depends(get_db),
-    user: User = Depends(get_user_only)
+    user: User = Depends(get_user_only),
+    store: CartStore = Depends(get_cart_store)
 ) -> Union[List[CartItemOut], Dict[str, str]]:
     """
-    Retrieve all items in the current user's cart.
+    Retrieve all items in the current user's cart, each with its line subtotal.
     """
     logger.info(f"Fetching cart items for user_id={user.id}")
-    items = crud.get_cart_items(db, user.id)
+    items = store.get_cart(db, user.id)["items"]
     if not items:
         return {"message": "No items in the cart."}
     return items
 
 
+@router.get("/getCartSummary", response_model=CartOut)
+def get_cart_summary(
+    db: Session = Depends(get_db),
+    user: User = Depends(get_user_only),
+    store: CartStore = Depends(get_cart_store)
+) -> dict:
+    """
+    Retrieve the current user's cart lines together with the item count and total amount.
+    """
+    logger.info(f"Fetching cart summary for user_id={user.id}")
+    return store.get_cart(db, user.id)
+
+
 @router.put("/update/{product_id}", status_code=status.HTTP_200_OK, response_model=Dict[str, str])
 def update_cart_item_quantity(
     product_id: int,
     data: schemas.UpdateCartItemSchema,
     db: Session = Depends(get_db),
-    user: User = Depends(get_user_only)
+    user: User = Depends(get_user_only),
+    store: CartStore = Depends(get_cart_store)
 ) -> dict:
     """
     Update quantity of a specific product in the user's cart.
     """
     logger.info(f"User {user.id} updating quantity of product {product_id} to {data.quantity}")
-    message = crud.update_cart_quantity(db, user.id, product_id, data.quantity)
+    message = store.update(db, user.id, product_id, data.quantity)
     return {"message": message}
 
 
@@ -61,11 +78,26 @@ def update_cart_item_quantity(
 def remove_cart_item(
     product_id: int,
     db: Session = Depends(get_db),
-    user: User = Depends(get_user_only)
+    user: User = Depends(get_user_only),
+    store: CartStore = Depends(get_cart_store)
 ) -> dict:
     """
     Remove a specific product from the user's cart.
     """
     logger.info(f"User {user.id} removing product {product_id} from cart.")
-    message = crud.remove_cart_item(db, user.id, product_id)
+    message = store.remove(db, user.id, product_id)
     return {"message": message}
+
+
+@router.post("/batch", status_code=status.HTTP_200_OK, response_model=schemas.CartBatchResponse)
+def apply_cart_batch(
+    data: schemas.CartBatchRequest,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_user_only),
+    store: CartStore = Depends(get_cart_store)
+) -> dict:
+    """
+    Apply several add/update/remove operations to the user's cart in a single transaction.
+    """
+    logger.info(f"User {user.id} applying {len(data.operations)} cart operations in batch.")
+    return store.batch(db, user.id, data.operations)
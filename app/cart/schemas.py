@@ -1,23 +1,50 @@
 # Import necessary modules and classes
-from pydantic import BaseModel, conint
-from typing import Optional, Annotated
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from app.products.schemas import PublicProductOut
 
 # Schemas for cart operations
 class AddToCartSchema(BaseModel):
     product_id: int
-    quantity: Annotated[int, conint(ge=1)]
+    quantity: int = Field(..., ge=1)
+    # "reject": 409 if already in cart, "increment": add to the existing quantity
+    mode: Literal["reject", "increment"] = "reject"
 
 class UpdateCartItemSchema(BaseModel):
-    quantity: Annotated[int, conint(ge=1)]
+    quantity: int = Field(..., ge=1)
 
 class CartItemOut(BaseModel):
     id: int
     product: PublicProductOut
     quantity: int
+    subtotal: Optional[float] = None
 
     class Config:
         from_attributes = True
 
+class CartOut(BaseModel):
+    items: List[CartItemOut]
+    total_items: int
+    total_amount: float
+
 class MessageResponse(BaseModel):
-    message: str
\ No newline at end of file
+    message: str
+
+class CartOperation(BaseModel):
+    op: Literal["add", "update", "remove"]
+    product_id: int
+    quantity: Optional[int] = Field(None, ge=1)
+
+class CartBatchRequest(BaseModel):
+    operations: List[CartOperation]
+
+class CartOperationResult(BaseModel):
+    op: str
+    product_id: int
+    status_code: int
+    message: str
+
+class CartBatchResponse(BaseModel):
+    applied: int
+    failed: int
+    results: List[CartOperationResult]
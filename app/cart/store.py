@@ -0,0 +1,359 @@
+# Import necessary modules
+import atexit
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.cart import crud, models, reservations, schemas
+from app.core.database import SessionLocal
+from app.products.models import Product
+from app.core.config import logger
+
+# load environment variables from .env file
+load_dotenv()
+
+# "sql" (default): every change is committed to cart_items immediately.
+# "memory": carts live in this process and are written to cart_items in the background.
+CART_STORE = os.getenv("CART_STORE", "sql")
+CART_FLUSH_INTERVAL = float(os.getenv("CART_FLUSH_INTERVAL", "1.0"))
+# Clean carts untouched for this long are dropped from memory (they are safe in cart_items)
+CART_IDLE_SECONDS = float(os.getenv("CART_IDLE_SECONDS", "1800"))
+
+
+class CartStore(ABC):
+    """
+    Storage backend behind the cart routes. Methods raise HTTPException with the
+    same status codes and messages as app/cart/crud.py.
+    """
+
+    @abstractmethod
+    def add(self, db: Session, user_id: int, product_id: int, quantity: int, mode: str = "reject") -> str:
+        ...
+
+    @abstractmethod
+    def get_cart(self, db: Session, user_id: int) -> Dict:
+        ...
+
+    @abstractmethod
+    def update(self, db: Session, user_id: int, product_id: int, quantity: int) -> str:
+        ...
+
+    @abstractmethod
+    def remove(self, db: Session, user_id: int, product_id: int) -> str:
+        ...
+
+    @abstractmethod
+    def batch(self, db: Session, user_id: int, operations: List[schemas.CartOperation]) -> Dict:
+        ...
+
+    def flush(self, user_id: Optional[int] = None) -> None:
+        """
+        Make sure cart_items reflects the cart (one user, or everyone). Called before checkout.
+        """
+
+    def discard(self, user_id: int) -> None:
+        """
+        Forget any cached state for the user after cart_items was cleared (checkout).
+        """
+
+
+class SQLCartStore(CartStore):
+    """
+    Every change is a synchronous commit to cart_items.
+    """
+
+    def add(self, db, user_id, product_id, quantity, mode="reject"):
+        return crud.add_to_cart(db, user_id, product_id, quantity, mode)
+
+    def get_cart(self, db, user_id):
+        return crud.get_cart(db, user_id)
+
+    def update(self, db, user_id, product_id, quantity):
+        return crud.update_cart_quantity(db, user_id, product_id, quantity)
+
+    def remove(self, db, user_id, product_id):
+        return crud.remove_cart_item(db, user_id, product_id)
+
+    def batch(self, db, user_id, operations):
+        return crud.apply_cart_batch(db, user_id, operations)
+
+
+class MemoryCartStore(CartStore):
+    """
+    Write-behind store: carts are kept in process memory and a background thread
+    replaces each changed user's cart_items rows every CART_FLUSH_INTERVAL seconds.
+
+    Only safe with a single worker process (or sticky sessions), since other
+    workers do not see unflushed changes. Line ids in responses are product ids.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._carts: Dict[int, "OrderedDict[int, int]"] = {}
+        self._touched: Dict[int, float] = {}
+        self._dirty = set()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cart-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ------------------ IN-MEMORY STATE ------------------
+
+    def _cart(self, db: Session, user_id: int) -> "OrderedDict[int, int]":
+        """
+        The user's cart, loaded from cart_items on first access. Caller holds the lock.
+        """
+        cart = self._carts.get(user_id)
+        if cart is None:
+            rows = db.query(models.CartItem.product_id, models.CartItem.quantity)\
+                     .filter_by(user_id=user_id)\
+                     .order_by(models.CartItem.id)\
+                     .all()
+            cart = OrderedDict((row.product_id, row.quantity) for row in rows)
+            self._carts[user_id] = cart
+        self._touched[user_id] = time.monotonic()
+        return cart
+
+    def _changed(self, user_id: int) -> None:
+        self._dirty.add(user_id)
+
+    def _hold(self, db: Session, user_id: int, product_id: int, quantity: int) -> None:
+        """
+        Stock holds are stored in the database even for in-memory carts, so every worker honors them.
+        """
+        if not reservations.RESERVATIONS_ENABLED:
+            return
+        try:
+            reservations.hold(db, user_id, product_id, quantity)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    # ------------------ CART OPERATIONS ------------------
+
+    def add(self, db, user_id, product_id, quantity, mode="reject"):
+        crud.check_quantity(quantity)
+        product = db.query(Product).filter(Product.id == product_id).first()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found.")
+        if not product.stock:
+            raise HTTPException(status_code=400, detail="Product is out of stock.")
+
+        with self._lock:
+            cart = self._cart(db, user_id)
+            if product_id in cart:
+                if mode != "increment":
+                    raise HTTPException(
+                        status_code=409,
+                        detail="Product already in cart. Please update the quantity if needed."
+                    )
+                self._hold(db, user_id, product_id, cart[product_id] + quantity)
+                cart[product_id] += quantity
+                self._changed(user_id)
+                return "Product quantity increased in cart."
+            self._hold(db, user_id, product_id, quantity)
+            cart[product_id] = quantity
+            self._changed(user_id)
+        return "Product added to cart."
+
+    def get_cart(self, db, user_id):
+        with self._lock:
+            lines = list(self._cart(db, user_id).items())
+        products = {
+            product.id: product
+            for product in db.query(Product).filter(Product.id.in_([pid for pid, _ in lines])).all()
+        }
+        items = []
+        for product_id, quantity in lines:
+            product = products.get(product_id)
+            if product is None:
+                continue
+            items.append(SimpleNamespace(
+                id=product_id,
+                product=product,
+                quantity=quantity,
+                subtotal=round(quantity * product.price, 2),
+            ))
+        return {
+            "items": items,
+            "total_items": sum(item.quantity for item in items),
+            "total_amount": round(sum(item.subtotal for item in items), 2),
+        }
+
+    def update(self, db, user_id, product_id, quantity):
+        crud.check_quantity(quantity)
+        with self._lock:
+            cart = self._cart(db, user_id)
+            if product_id not in cart:
+                raise HTTPException(status_code=404, detail="Product not found in your cart.")
+            self._hold(db, user_id, product_id, quantity)
+            cart[product_id] = quantity
+            self._changed(user_id)
+        return "Cart item quantity updated successfully."
+
+    def remove(self, db, user_id, product_id):
+        with self._lock:
+            cart = self._cart(db, user_id)
+            if product_id not in cart:
+                raise HTTPException(status_code=404, detail="Product not found in your cart.")
+            self._hold(db, user_id, product_id, 0)
+            del cart[product_id]
+            self._changed(user_id)
+        return "Product removed from cart successfully."
+
+    def batch(self, db, user_id, operations):
+        product_ids = {operation.product_id for operation in operations}
+        products = {
+            product.id: product
+            for product in db.query(Product).filter(Product.id.in_(product_ids)).all()
+        }
+        results = []
+        applied = False
+        with self._lock:
+            cart = self._cart(db, user_id)
+            for operation in operations:
+                product_id = operation.product_id
+                code, message = crud.check_cart_operation(operation, products.get(product_id), product_id in cart)
+                if code < 300:
+                    try:
+                        reservations.hold(db, user_id, product_id, 0 if operation.op == "remove" else operation.quantity)
+                    except HTTPException as e:
+                        code, message = e.status_code, e.detail
+                if code < 300 and operation.op == "remove":
+                    del cart[product_id]
+                elif code < 300:
+                    cart[product_id] = operation.quantity
+                applied = applied or code < 300
+                results.append({"op": operation.op, "product_id": product_id, "status_code": code, "message": message})
+            db.commit()
+            if applied:
+                self._changed(user_id)
+        return crud.batch_summary(user_id, results)
+
+    # ------------------ WRITE-BEHIND ------------------
+
+    def flush(self, user_id: Optional[int] = None) -> None:
+        """
+        Write each dirty cart to cart_items, one transaction per user so a bad cart does not
+        hold back the others. Lines the database rejects are dropped from the cart and logged;
+        users whose write failed outright stay dirty, and HTTPException 503 is raised after
+        the other users were written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                users = [user_id] if user_id is not None else list(self._dirty)
+                pending = {
+                    uid: list(self._carts.get(uid, {}).items()) for uid in users if uid in self._dirty
+                }
+                self._dirty.difference_update(pending)
+            if not pending:
+                return
+
+            failed = []
+            db = SessionLocal()
+            try:
+                for uid, lines in pending.items():
+                    try:
+                        rejected = self._write_cart(db, uid, lines)
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        failed.append(uid)
+                        logger.error(f"Cart flush failed for user_id={uid}: {e}")
+                        continue
+                    if rejected:
+                        with self._lock:
+                            cart = self._carts.get(uid, {})
+                            for product_id in rejected:
+                                cart.pop(product_id, None)
+                        logger.warning(f"Cart flush dropped product_ids={rejected} for user_id={uid}")
+            finally:
+                db.close()
+
+            if failed:
+                with self._lock:
+                    self._dirty.update(failed)
+                raise HTTPException(status_code=503, detail="Cart could not be saved. Please try again.")
+
+    def _write_cart(self, db: Session, user_id: int, lines: List) -> List[int]:
+        """
+        Replace the user's cart_items rows with `lines`. If the rows are rejected together,
+        each line is retried in its own savepoint. Returns the product ids of the lines that
+        could not be written (e.g. their product was deleted). Does not commit.
+        """
+        db.query(models.CartItem).filter_by(user_id=user_id).delete()
+        try:
+            with db.begin_nested():
+                db.add_all(
+                    models.CartItem(user_id=user_id, product_id=product_id, quantity=quantity)
+                    for product_id, quantity in lines
+                )
+            return []
+        except IntegrityError:
+            pass
+
+        rejected = []
+        for product_id, quantity in lines:
+            try:
+                with db.begin_nested():
+                    db.add(models.CartItem(user_id=user_id, product_id=product_id, quantity=quantity))
+            except IntegrityError:
+                rejected.append(product_id)
+        return rejected
+
+    def discard(self, user_id: int) -> None:
+        with self._lock:
+            self._carts.pop(user_id, None)
+            self._touched.pop(user_id, None)
+            self._dirty.discard(user_id)
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - CART_IDLE_SECONDS
+        with self._lock:
+            for user_id in [uid for uid, touched in self._touched.items() if touched < cutoff]:
+                if user_id not in self._dirty:
+                    self._carts.pop(user_id, None)
+                    self._touched.pop(user_id, None)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(CART_FLUSH_INTERVAL):
+            try:
+                self.flush()
+                self._evict_idle()
+            except Exception:
+                # Already logged; the users stay dirty and are retried on the next tick
+                pass
+
+    def close(self) -> None:
+        self._stopped.set()
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+
+_store: Optional[CartStore] = None
+_store_lock = threading.Lock()
+
+
+def get_cart_store() -> CartStore:
+    """
+    Dependency returning the configured cart store (created on first use).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MemoryCartStore() if CART_STORE == "memory" else SQLCartStore()
+                logger.info(f"Using {type(_store).__name__} for carts")
+    return _store
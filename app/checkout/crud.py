@@ -1,72 +1,420 @@
 # Import necessary modules
+import os
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from dotenv import load_dotenv
+from pydantic import BaseModel
+from sqlalchemy import Row, case, insert, select, update
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Tuple
 
 from app.auth.models import User
-from app.products.models import Product
+from app.products.models import Product, live_stock
 from app.cart.models import CartItem
+from app.cart import reservations
+from app.cart.store import get_cart_store
 from app.orders import models
+from app.orders import cache as order_cache
+from app.analytics import rollup
+from app.orders.schemas import OrderResponseWithMessage
+from app.checkout.models import IdempotencyKey
+from app.core.database import dialect_insert
+from app.core.retry import retry_transaction
+from app.products import hooks, inventory
 from app.core.config import logger
 
+# load environment variables from .env file
+load_dotenv()
 
-def process_checkout(db: Session, user: User) -> Dict:
+# How long a stored checkout response is replayed for the same Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a duplicate request waits for the first one before giving up with 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+# Lease of an in-progress key: only after it expires is the first request considered
+# abandoned (crashed process) and the key reclaimed. Keep it far above the slowest checkout,
+# or a live request's key could be taken over and the order placed twice.
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "600"))
+_POLL_INTERVAL = 0.1
+
+
+def load_cart(db: Session, user_id: int) -> Dict[int, int]:
     """
-    Handles full checkout process:
-    - Verifies cart
-    - Validates stock
-    - Creates order and order items
-    - Deducts inventory
-    - Clears cart after success
+    Returns the user's cart as {product_id: quantity}, checking that it is not empty
+    and that every product still exists (one query for items and products).
     """
-    cart_items = db.query(CartItem).filter_by(user_id=user.id).all()
+    # A write-behind cart store may hold changes not yet in cart_items
+    get_cart_store().flush(user_id)
+    rows = db.query(CartItem.product_id, CartItem.quantity, Product.id.label("found"))\
+             .outerjoin(Product, Product.id == CartItem.product_id)\
+             .filter(CartItem.user_id == user_id)\
+             .all()
 
-    if not cart_items:
-        logger.warning(f"Checkout failed: Cart empty for user_id={user.id}")
+    if not rows:
+        logger.warning(f"Checkout failed: Cart empty for user_id={user_id}")
         raise HTTPException(status_code=400, detail="Your cart is empty.")
 
-    total_amount = 0
-    order_items = []
+    for row in rows:
+        if row.found is None:
+            raise HTTPException(status_code=404, detail=f"Product with ID {row.product_id} not found.")
+    return {row.product_id: row.quantity for row in rows}
+
+
+def _held_by_others(db: Session, product_id: int, user_id: int) -> int:
+    if not reservations.RESERVATIONS_ENABLED:
+        return 0
+    return db.execute(select(reservations.held_by_others(product_id, user_id))).scalar()
+
+
+def deduct_stock(db: Session, user_id: int, quantities: Dict[int, int]) -> Dict[int, Row]:
+    """
+    Validates and decrements stock for all lines in one conditional UPDATE, so concurrent
+    checkouts cannot oversell. Returns the decremented rows (id, name, description, image_url,
+    category_key, price, stock).
+    Lines of sharded products are taken from their inventory shards instead (see inventory.deduct).
+
+    If any product is short, the lines that were decremented are restored in the same
+    transaction and a 400 is raised, so the caller may keep using the transaction.
+    """
+    table = Product.__table__
+    wanted = case(quantities, value=table.c.id)
+    available = table.c.stock
+    if reservations.RESERVATIONS_ENABLED:
+        # Units held by other carts are not for sale; this user's own holds are converted here
+        available = table.c.stock - reservations.held_by_others(table.c.id, user_id)
+    stmt = update(table)\
+        .where(table.c.id.in_(quantities), table.c.stock_shards == 0, available >= wanted)\
+        .values(stock=table.c.stock - wanted)\
+        .returning(
+            table.c.id, table.c.name, table.c.description, table.c.image_url, table.c.category_key,
+            table.c.price, table.c.stock
+        )
+    updated = {row.id: row for row in db.execute(stmt)}
+
+    # Lines left over are either short or belong to sharded products (only queried when needed)
+    taken = {}
+    short = None
+    if len(updated) != len(quantities):
+        leftover = {
+            row.id: row
+            for row in db.query(
+                Product.id, Product.name, Product.description, Product.image_url, Product.category_key,
+                Product.price, Product.stock_shards
+            ).filter(Product.id.in_([pid for pid in quantities if pid not in updated])).all()
+        }
+        for product_id, quantity in quantities.items():
+            if product_id in updated:
+                continue
+            product = leftover.get(product_id)
+            result = None
+            if product is not None and product.stock_shards:
+                result = inventory.deduct(db, product_id, quantity, _held_by_others(db, product_id, user_id))
+            if result is None:
+                short = product_id
+                break
+            taken[product_id], remaining = result
+            updated[product_id] = SimpleNamespace(**product._mapping, stock=remaining)
+
+    if short is not None:
+        plain = [pid for pid in updated if pid not in taken]
+        if plain:
+            restore = case({pid: quantities[pid] for pid in plain}, value=table.c.id)
+            db.execute(update(table).where(table.c.id.in_(plain)).values(stock=table.c.stock + restore))
+        for product_id, shards in taken.items():
+            inventory.restore(db, product_id, shards)
 
-    for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+        product = db.query(Product.name, Product.stock, Product.stock_shards).filter(Product.id == short).first()
         if not product:
-            raise HTTPException(status_code=404, detail=f"Product with ID {item.product_id} not found.")
+            raise HTTPException(status_code=404, detail=f"Product with ID {short} not found.")
+        stock = inventory.shard_totals(db, [short]).get(short, 0) if product.stock_shards else product.stock
+        left = max(0, stock - _held_by_others(db, short, user_id))
+        logger.warning(f"Checkout failed: insufficient stock for product_id={short}, user_id={user_id}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Insufficient stock for '{product.name}'. Available: {left}"
+        )
 
-        if product.stock < item.quantity:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Insufficient stock for '{product.name}'. Available: {product.stock}"
-            )
+    # Only once every line succeeded: let stock filters and add-to-cart see drained
+    # sharded products as sold out (a short order above must leave products.stock alone)
+    sold_out = [product_id for product_id in taken if updated[product_id].stock == 0]
+    if sold_out:
+        db.execute(update(table).where(table.c.id.in_(sold_out)).values(stock=0))
+
+    reservations.consume(db, user_id, quantities)
+    return updated
 
-        total_amount += product.price * item.quantity
-        order_items.append({
-            "product_id": product.id,
-            "product_name": product.name,
-            "product_description": product.description,
-            "quantity": item.quantity,
-            "price_at_purchase": product.price
-        })
-
-    # Create order
-    order = models.Order(user_id=user.id, total_amount=total_amount)
-    db.add(order)
-    db.flush()  # generate order.id
-
-    # Create order items and deduct stock
-    for item in order_items:
-        db.add(models.OrderItem(order_id=order.id, **item))
-        product = db.query(Product).filter(Product.id == item["product_id"]).first()
-        product.stock -= item["quantity"]
+
+def insert_order(
+    db: Session,
+    user_id: int,
+    order_items: List[Dict],
+    order_status: models.OrderStatus = models.OrderStatus.paid
+) -> Dict:
+    """
+    Writes an order and all its items with two statements: INSERT ... RETURNING id for
+    the order and one multi-row INSERT for the items. Returns the order's column values.
+    """
+    order = {
+        "user_id": user_id,
+        "total_amount": sum(item["price_at_purchase"] * item["quantity"] for item in order_items),
+        "status": order_status,
+        "created_at": datetime.utcnow(),
+    }
+    orders = models.Order.__table__
+    order["id"] = db.execute(insert(orders).values(**order).returning(orders.c.id)).scalar_one()
+    db.execute(insert(models.OrderItem.__table__).values([
+        {"order_id": order["id"], "created_at": order["created_at"], **item} for item in order_items
+    ]))
+    return order
+
+
+@retry_transaction
+def process_checkout(db: Session, user: User) -> Dict:
+    """
+    Handles full checkout process:
+    - Verifies cart (one query for items and products)
+    - Validates and deducts stock atomically (one conditional UPDATE)
+    - Creates order and order items (one INSERT each)
+    - Adds the order to the sales rollups (one upsert per rollup table)
+    - Clears cart after success
+    The response is built from the values already returned by the database, without reloading the order.
+    """
+    quantities = load_cart(db, user.id)
+    try:
+        updated = deduct_stock(db, user.id, quantities)
+    except HTTPException:
+        db.rollback()
+        raise
+
+    # Snapshot the values of the rows we just decremented
+    order_items = [
+        {
+            "product_id": product_id,
+            "product_name": updated[product_id].name,
+            "product_description": updated[product_id].description,
+            "quantity": quantity,
+            "price_at_purchase": updated[product_id].price
+        }
+        for product_id, quantity in quantities.items()
+    ]
+    order = insert_order(db, user.id, order_items)
+    rollup.record_sales(db, [{
+        **order,
+        "items": [{**item, "category_key": updated[item["product_id"]].category_key} for item in order_items],
+    }])
 
     # Clear the cart
     db.query(CartItem).filter_by(user_id=user.id).delete()
     db.commit()
-    db.refresh(order)
+    get_cart_store().discard(user.id)
+    hooks.stock_changed({product_id: row.stock for product_id, row in updated.items()})
 
-    logger.info(f"Checkout successful for user_id={user.id}, order_id={order.id}")
+    logger.info(f"Checkout successful for user_id={user.id}, order_id={order['id']}")
 
+    order["items"] = [
+        {
+            "product": {
+                "name": updated[item["product_id"]].name,
+                "description": updated[item["product_id"]].description,
+                "image_url": updated[item["product_id"]].image_url,
+            },
+            "quantity": item["quantity"],
+            "price_at_purchase": item["price_at_purchase"],
+        }
+        for item in order_items
+    ]
+    # Prime the detail cache so the follow-up GET /orders/{id} never touches the database
+    order_cache.remember_order(user.id, {
+        **order,
+        "items": [
+            {**item, "subtotal": round(item["quantity"] * item["price_at_purchase"], 2)}
+            for item in order_items
+        ],
+    })
     return {
         "message": "Order placed successfully.",
         "order": order
     }
+
+
+@retry_transaction
+def create_pending_order(db: Session, user: User) -> Tuple[int, Dict[int, int]]:
+    """
+    First half of async checkout: turns the cart into a pending order and clears the cart.
+    Returns the order id and the cart quantities.
+
+    Prices and names are snapshotted now; stock is deducted later by complete_pending_orders,
+    which marks the order paid, or cancelled when stock ran out.
+    """
+    quantities = load_cart(db, user.id)
+    products = {
+        product.id: product
+        for product in db.query(Product.id, Product.name, Product.description, Product.price, live_stock())
+                         .filter(Product.id.in_(quantities)).all()
+    }
+    # Cheap pre-check so obviously failing orders are rejected without queueing
+    for product_id, quantity in quantities.items():
+        available = max(0, products[product_id].stock - _held_by_others(db, product_id, user.id))
+        if available < quantity:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient stock for '{products[product_id].name}'. Available: {available}"
+            )
+
+    order = insert_order(db, user.id, [
+        {
+            "product_id": product_id,
+            "product_name": products[product_id].name,
+            "product_description": products[product_id].description,
+            "quantity": quantity,
+            "price_at_purchase": products[product_id].price
+        }
+        for product_id, quantity in quantities.items()
+    ], models.OrderStatus.pending)
+    db.query(CartItem).filter_by(user_id=user.id).delete()
+    db.commit()
+    get_cart_store().discard(user.id)
+    logger.info(f"Pending order created for user_id={user.id}, order_id={order['id']}")
+    return order["id"], quantities
+
+
+def claim_pending_orders(db: Session, order_ids: List[int]) -> set:
+    """
+    Lock the orders among `order_ids` that are still pending and return their ids. Does not commit.
+
+    Orders another transaction is completing are skipped (SKIP LOCKED on PostgreSQL; SQLite
+    serializes writers), and so are orders already paid or cancelled, so a job queued twice
+    (several processes, or a restart mid-batch) never deducts stock twice.
+    """
+    table = models.Order.__table__
+    pending = table.c.status == models.OrderStatus.pending
+    claimable = select(table.c.id).where(table.c.id.in_(order_ids), pending).with_for_update(skip_locked=True)
+    return set(db.execute(
+        update(table)
+        .where(table.c.id.in_(claimable), pending)
+        .values(status=models.OrderStatus.pending)
+        .returning(table.c.id)
+    ).scalars())
+
+
+@retry_transaction
+def complete_pending_orders(db: Session, jobs: List[Tuple[int, int, Dict[int, int]]]) -> Dict[int, str]:
+    """
+    Second half of async checkout: deducts stock for a batch of (order_id, user_id, quantities)
+    in one transaction. Each order is marked paid, or cancelled if its stock ran out.
+    Jobs whose order is no longer pending, or is being completed elsewhere, are skipped.
+    Returns {order_id: new status} for the orders completed here.
+    """
+    outcomes = {}
+    new_stock = {}
+    claimed = claim_pending_orders(db, [job[0] for job in jobs])
+    for order_id, user_id, quantities, *_ in jobs:
+        if order_id not in claimed:
+            logger.info(f"Pending order {order_id} skipped: already completed or claimed by another worker")
+            continue
+        try:
+            updated = deduct_stock(db, user_id, quantities)
+        except HTTPException as e:
+            logger.warning(f"Pending order {order_id} cancelled: {e.detail}")
+            outcomes[order_id] = models.OrderStatus.cancelled
+            continue
+        new_stock.update((product_id, row.stock) for product_id, row in updated.items())
+        outcomes[order_id] = models.OrderStatus.paid
+
+    rollup.record_completed_orders(
+        db, [order_id for order_id, outcome in outcomes.items() if outcome == models.OrderStatus.paid]
+    )
+    for order_status in (models.OrderStatus.paid, models.OrderStatus.cancelled):
+        order_ids = [order_id for order_id, outcome in outcomes.items() if outcome == order_status]
+        if order_ids:
+            db.query(models.Order)\
+              .filter(models.Order.id.in_(order_ids), models.Order.status == models.OrderStatus.pending)\
+              .update({"status": order_status}, synchronize_session=False)
+    db.commit()
+    order_cache.invalidate_orders((job[0], job[1]) for job in jobs)
+    hooks.stock_changed(new_stock)
+    return outcomes
+
+
+def _claim_key(db: Session, user_id: int, key: str) -> Optional[int]:
+    """
+    Insert an in-progress row for the key, leased for IDEMPOTENCY_LEASE_SECONDS.
+    Returns its id, or None if another request already holds the key.
+    Rows whose expires_at has passed (expired responses, and in-progress rows whose lease
+    ran out) are removed first so the key can be reused.
+    """
+    now = datetime.utcnow()
+    db.query(IdempotencyKey)\
+      .filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.expires_at < now)\
+      .delete(synchronize_session=False)
+
+    insert = dialect_insert(db)
+    stmt = insert(IdempotencyKey.__table__)\
+        .values(user_id=user_id, key=key, created_at=now,
+                expires_at=now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS))\
+        .on_conflict_do_nothing(index_elements=["user_id", "key"])\
+        .returning(IdempotencyKey.__table__.c.id)
+    claimed = db.execute(stmt).scalar()
+    db.commit()
+    return claimed
+
+
+def process_checkout_idempotent(
+    db: Session,
+    user: User,
+    key: str,
+    checkout: Callable[[Session, User], Tuple[int, BaseModel]]
+) -> Tuple[int, str, bool]:
+    """
+    Run checkout at most once per (user, Idempotency-Key).
+
+    Returns (status code, JSON body, replayed). The first request runs `checkout`
+    and stores its response; later requests with the same key get the stored response.
+    Concurrent duplicates wait for the first one to finish. Failed checkouts are not
+    stored, so the client can retry with the same key after fixing the cause.
+    """
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        record_id = _claim_key(db, user.id, key)
+        if record_id is not None:
+            break
+
+        record = db.query(IdempotencyKey).filter_by(user_id=user.id, key=key).first()
+        if record is not None and record.status_code is not None:
+            logger.info(f"Replaying checkout for user_id={user.id}, idempotency key={key!r}")
+            return record.status_code, record.response_body, True
+        db.rollback()  # end the read transaction so the next poll sees fresh data
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A checkout with this Idempotency-Key is still in progress."
+            )
+        time.sleep(_POLL_INTERVAL)
+
+    # Our own row only: if the lease ran out and the key was reclaimed, the new row is not ours
+    record_filter = (IdempotencyKey.id == record_id, IdempotencyKey.status_code.is_(None))
+    try:
+        status_code, response = checkout(db, user)
+    except Exception:
+        db.rollback()
+        db.query(IdempotencyKey).filter(*record_filter).delete(synchronize_session=False)
+        db.commit()
+        raise
+
+    body = response.model_dump_json()
+    order_id = response.order.id if isinstance(response, OrderResponseWithMessage) else response.order_id
+    stored = db.query(IdempotencyKey).filter(*record_filter).update(
+        {
+            "order_id": order_id, "status_code": status_code, "response_body": body,
+            "expires_at": datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+        },
+        synchronize_session=False
+    )
+    db.commit()
+    if not stored:
+        logger.error(
+            f"Idempotency key {key!r} of user_id={user.id} was reclaimed while its checkout ran "
+            f"(order_id={order_id}); raise IDEMPOTENCY_LEASE_SECONDS"
+        )
+    return status_code, body, False
@@ -1,21 +1,48 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.auth.models import User
 from app.utils.oauth2 import get_user_only
 from app.orders import schemas
-from app.checkout import crud
-from typing import Dict, Union
+from app.checkout import crud, worker
+from pydantic import BaseModel
+from typing import Dict, Optional, Tuple, Union
 
 router = APIRouter(tags=["Checkout"])
 
 
-@router.post("/checkout", response_model=schemas.OrderResponseWithMessage, status_code=status.HTTP_201_CREATED)
+def run_checkout(db: Session, user: User) -> Tuple[int, BaseModel]:
+    """
+    Checkout in the configured CHECKOUT_MODE. Returns (status code, response model).
+    """
+    if worker.CHECKOUT_MODE == "async":
+        return status.HTTP_202_ACCEPTED, schemas.CheckoutAccepted.model_validate(worker.enqueue_checkout(db, user))
+    return status.HTTP_201_CREATED, schemas.OrderResponseWithMessage.model_validate(crud.process_checkout(db, user))
+
+
+@router.post(
+    "/checkout",
+    response_model=schemas.OrderResponseWithMessage,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": schemas.CheckoutAccepted}}
+)
 def checkout(
     db: Session = Depends(get_db),
-    user: User = Depends(get_user_only)
-) -> Dict[str, Union[str, schemas.OrderOut]]:
+    user: User = Depends(get_user_only),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255)
+) -> Union[Dict[str, Union[str, schemas.OrderOut]], Response]:
     """
     User-only: Checkout the current cart, validate stock, create order, deduct inventory, and clear cart.
+    With an Idempotency-Key header, retries of the same key replay the first response instead of
+    placing another order. In async mode the order is returned as pending (202); poll /orders/{id}.
     """
-    return crud.process_checkout(db, user)
+    if idempotency_key is None:
+        if worker.CHECKOUT_MODE == "async":
+            status_code, response = run_checkout(db, user)
+            return JSONResponse(status_code=status_code, content=response.model_dump(mode="json"))
+        return crud.process_checkout(db, user)
+
+    status_code, body, replayed = crud.process_checkout_idempotent(db, user, idempotency_key, run_checkout)
+    headers = {"Idempotent-Replayed": "true"} if replayed else {}
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
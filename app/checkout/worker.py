@@ -0,0 +1,172 @@
+# Import necessary modules
+import os
+import queue
+import random
+import threading
+from typing import Dict, NamedTuple, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.orm import Session, joinedload
+
+from app.auth.models import User
+from app.checkout import crud
+from app.core.database import SessionLocal
+from app.orders import models
+from app.core.config import logger
+
+# load environment variables from .env file
+load_dotenv()
+
+# "sync" (default): POST /checkout places the order inline and returns 201.
+# "async": POST /checkout returns 202 with a pending order that a worker completes.
+CHECKOUT_MODE = os.getenv("CHECKOUT_MODE", "sync")
+CHECKOUT_WORKERS = int(os.getenv("CHECKOUT_WORKERS", "4"))
+# Most jobs a worker completes in one transaction
+CHECKOUT_BATCH_SIZE = int(os.getenv("CHECKOUT_BATCH_SIZE", "50"))
+# Pending jobs per worker; when a partition is full the order is completed in the request
+CHECKOUT_QUEUE_SIZE = int(os.getenv("CHECKOUT_QUEUE_SIZE", "1000"))
+# A failed batch is re-queued with backoff up to this many times per job; after that
+# its orders stay pending until the next startup re-queues them
+CHECKOUT_MAX_ATTEMPTS = int(os.getenv("CHECKOUT_MAX_ATTEMPTS", "5"))
+CHECKOUT_RETRY_BASE_DELAY = float(os.getenv("CHECKOUT_RETRY_BASE_DELAY", "0.5"))
+CHECKOUT_RETRY_MAX_DELAY = float(os.getenv("CHECKOUT_RETRY_MAX_DELAY", "30"))
+
+
+class CheckoutJob(NamedTuple):
+    order_id: int
+    user_id: int
+    quantities: Dict[int, int]
+    attempts: int = 0
+
+
+class CheckoutPool:
+    """
+    Bounded pool of worker threads completing pending orders.
+
+    Jobs are partitioned by SKU (the order's lowest product id), so orders for the same
+    hot product are handled by one worker and never contend for its row lock. Each worker
+    drains up to CHECKOUT_BATCH_SIZE queued jobs and completes them in one transaction.
+    The orders table is the durable queue: pending orders are re-queued on startup, and
+    each order is claimed before its stock is taken, so a job queued twice runs once.
+    Failed batches are re-queued with backoff.
+    """
+
+    def __init__(self, workers: int, batch_size: int, queue_size: int):
+        self.batch_size = batch_size
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._threads = [
+            threading.Thread(target=self._run, args=(jobs,), name=f"checkout-worker-{index}", daemon=True)
+            for index, jobs in enumerate(self._queues)
+        ]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job: CheckoutJob) -> None:
+        """
+        Queue a job on its SKU partition. Raises queue.Full if that partition is full.
+        """
+        partition = min(job.quantities) % len(self._queues)
+        self._queues[partition].put_nowait(job)
+
+    def _run(self, jobs: "queue.Queue[CheckoutJob]") -> None:
+        while True:
+            batch = [jobs.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(jobs.get_nowait())
+                except queue.Empty:
+                    break
+
+            db = SessionLocal()
+            try:
+                outcomes = crud.complete_pending_orders(db, batch)
+                logger.info(f"{threading.current_thread().name} completed {len(outcomes)} orders")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Checkout batch of {len(batch)} failed: {e}")
+                self._retry_later(batch)
+            finally:
+                db.close()
+
+    def _retry_later(self, batch) -> None:
+        """
+        Re-queue the jobs of a failed batch after a jittered exponential backoff.
+        Jobs out of attempts stay pending in the database until the next startup.
+        """
+        retry = [job._replace(attempts=job.attempts + 1) for job in batch if job.attempts + 1 < CHECKOUT_MAX_ATTEMPTS]
+        for job in batch:
+            if job.attempts + 1 >= CHECKOUT_MAX_ATTEMPTS:
+                logger.error(f"Pending order {job.order_id} gave up after {CHECKOUT_MAX_ATTEMPTS} attempts")
+        if not retry:
+            return
+        attempts = max(job.attempts for job in retry)
+        delay = random.uniform(0, min(CHECKOUT_RETRY_MAX_DELAY, CHECKOUT_RETRY_BASE_DELAY * (2 ** attempts)))
+        timer = threading.Timer(delay, self._resubmit, args=(retry,))
+        timer.daemon = True
+        timer.start()
+
+    def _resubmit(self, jobs) -> None:
+        for job in jobs:
+            try:
+                self.submit(job)
+            except queue.Full:
+                logger.warning(f"Checkout queue full, order_id={job.order_id} waits for the next start")
+
+
+_pool: Optional[CheckoutPool] = None
+
+
+def start_checkout_workers() -> None:
+    """
+    Start the worker pool and re-queue orders left pending by a previous run (async mode only).
+    """
+    global _pool
+    if CHECKOUT_MODE != "async" or _pool is not None:
+        return
+    _pool = CheckoutPool(CHECKOUT_WORKERS, CHECKOUT_BATCH_SIZE, CHECKOUT_QUEUE_SIZE)
+    _pool.start()
+
+    db = SessionLocal()
+    try:
+        pending = db.query(models.Order)\
+                    .options(joinedload(models.Order.items))\
+                    .filter(models.Order.status == models.OrderStatus.pending)\
+                    .order_by(models.Order.id)\
+                    .all()
+        for order in pending:
+            quantities = {item.product_id: item.quantity for item in order.items if item.product_id is not None}
+            if quantities:
+                try:
+                    _pool.submit(CheckoutJob(order.id, order.user_id, quantities))
+                except queue.Full:
+                    logger.warning("Checkout queue full while re-queuing, remaining orders wait for the next start")
+                    break
+        if pending:
+            logger.info(f"Re-queued {len(pending)} pending orders")
+    finally:
+        db.close()
+
+
+def enqueue_checkout(db: Session, user: User) -> Dict:
+    """
+    Async checkout: create a pending order from the cart and queue it for a worker.
+    """
+    if _pool is None:
+        raise HTTPException(status_code=503, detail="Checkout workers are not running.")
+    order_id, quantities = crud.create_pending_order(db, user)
+    job = CheckoutJob(order_id, user.id, quantities)
+    order_status = models.OrderStatus.pending
+    try:
+        _pool.submit(job)
+    except queue.Full:
+        # Back-pressure: complete the order in the request rather than leave it unqueued
+        logger.warning(f"Checkout queue full, completing order_id={order_id} inline")
+        order_status = crud.complete_pending_orders(db, [job]).get(order_id, order_status)
+
+    return {
+        "message": "Order accepted and is being processed.",
+        "order_id": order_id,
+        "status": order_status
+    }
@@ -1,5 +1,6 @@
 # Import necessary libraries
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -14,8 +15,12 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in the environment variables.")
 
+# Optional stricter isolation (e.g. REPEATABLE READ, SERIALIZABLE); write paths retry
+# serialization failures and deadlocks, see app/core/retry.py
+DB_ISOLATION_LEVEL = os.getenv("DB_ISOLATION_LEVEL")
+
 # SQLAlchemy setup
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **({"isolation_level": DB_ISOLATION_LEVEL} if DB_ISOLATION_LEVEL else {}))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -27,3 +32,11 @@ def get_db():
     finally:
         db.close()
 
+# Dialect-specific INSERT supporting ON CONFLICT (PostgreSQL and SQLite)
+def dialect_insert(db):
+    """
+    Return the insert() construct of the session's dialect so callers can use on_conflict_do_*.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
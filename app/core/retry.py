@@ -0,0 +1,129 @@
+# Import necessary modules
+import functools
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.config import logger
+
+# load environment variables from .env file
+load_dotenv()
+
+# Total attempts per call (first try included) and the backoff window
+DB_RETRY_ATTEMPTS = int(os.getenv("DB_RETRY_ATTEMPTS", "4"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.02"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "0.5"))
+
+# SQLSTATEs worth retrying: serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+# SQLite reports lock contention only through the message
+RETRYABLE_MESSAGES = ("database is locked", "database table is locked")
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    True for transient concurrency failures: the same transaction may succeed if run again.
+    """
+    if not isinstance(error, DBAPIError) or error.connection_invalidated:
+        return False
+    orig = error.orig
+    sqlstate = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return True
+    message = str(orig).lower()
+    return any(text in message for text in RETRYABLE_MESSAGES)
+
+
+class RetryMetrics:
+    """
+    Per-operation counters: calls, retries, calls that succeeded after retrying, give-ups.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, operation: str, event: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(
+                operation, {"calls": 0, "retries": 0, "recovered": 0, "give_ups": 0}
+            )
+            counters[event] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            operations = {name: dict(counters) for name, counters in self._counters.items()}
+        totals = {"calls": 0, "retries": 0, "recovered": 0, "give_ups": 0}
+        for counters in operations.values():
+            for event, count in counters.items():
+                totals[event] += count
+        return {"totals": totals, "operations": operations}
+
+
+retry_metrics = RetryMetrics()
+
+
+def _backoff(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff: uniform in [0, min(max delay, base * 2^attempt)].
+    """
+    return random.uniform(0, min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _session_of(args, kwargs) -> Optional[Session]:
+    db = kwargs.get("db")
+    if db is None and args and isinstance(args[0], Session):
+        db = args[0]
+    return db
+
+
+def retry_transaction(func: Callable = None, *, attempts: Optional[int] = None):
+    """
+    Re-run a write path when its transaction fails with a deadlock, serialization
+    failure or lock timeout. The wrapped function must take the session as its first
+    argument (or `db=`) and own its transaction from start to commit, so that a rollback
+    followed by a new call is equivalent to the first call never having happened.
+
+    When the budget is spent the caller gets a 503 with Retry-After instead of a 500.
+    """
+    def decorate(func: Callable) -> Callable:
+        operation = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            budget = attempts or DB_RETRY_ATTEMPTS
+            retry_metrics.record(operation, "calls")
+            for attempt in range(budget):
+                try:
+                    result = func(*args, **kwargs)
+                except DBAPIError as e:
+                    if not is_retryable(e):
+                        raise
+                    db = _session_of(args, kwargs)
+                    if db is not None:
+                        db.rollback()
+                    if attempt + 1 == budget:
+                        retry_metrics.record(operation, "give_ups")
+                        logger.error(f"{operation} gave up after {budget} attempts: {e.orig}")
+                        raise HTTPException(
+                            status_code=503,
+                            detail="The service is busy, please try again.",
+                            headers={"Retry-After": "1"},
+                        )
+                    retry_metrics.record(operation, "retries")
+                    delay = _backoff(attempt)
+                    logger.warning(f"{operation} attempt {attempt + 1} failed ({e.orig}), retrying in {delay:.3f}s")
+                    time.sleep(delay)
+                else:
+                    if attempt:
+                        retry_metrics.record(operation, "recovered")
+                    return result
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
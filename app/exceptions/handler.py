@@ -16,6 +16,7 @@ async def custom_http_exception_handler(request: Request, exc: HTTPException) ->
             "message": exc.detail,
             "code": exc.status_code
         },
+        headers=getattr(exc, "headers", None),
     )
 
 
@@ -76,6 +77,16 @@ async def custom_validation_exception_handler(request: Request, exc: RequestVali
                 },
             )
         
+        elif "quantity" in loc and "greater than" in msg:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={
+                    "error": True,
+                    "message": "Quantity must be at least 1.",
+                    "code": status.HTTP_400_BAD_REQUEST,
+                },
+            )
+
         elif "stock" in loc and "greater than" in msg:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -9,8 +9,15 @@ from app.products.routes import public_router
 from app.cart.routes import router as cart_router
 from app.checkout.routes import router as checkout_router
 from app.orders.routes import router as orders_router
+from app.analytics.routes import router as analytics_router
+from app.admin.routes import router as admin_router
 from app.cart.models import CartItem
 from app.core.database import Base, engine
+from app.products.search import ensure_search_index
+from app.cart.reservations import start_sweeper
+from app.products.facets import start_facet_refresher
+from app.checkout.worker import start_checkout_workers
+from app.orders.partitions import ensure_partitions
 from app.exceptions.handler import (
     custom_http_exception_handler,
     custom_validation_exception_handler,
@@ -22,6 +29,11 @@ from app.exceptions.handler import (
 app = FastAPI()
 
 Base.metadata.create_all(bind=engine)
+ensure_search_index(engine)
+ensure_partitions(engine)
+start_sweeper()
+start_facet_refresher()
+start_checkout_workers()
 
 # Include routers for different functionalities
 app.include_router(auth_router)
@@ -30,6 +42,8 @@ app.include_router(public_router)
 app.include_router(cart_router)
 app.include_router(orders_router)
 app.include_router(checkout_router)
+app.include_router(analytics_router)
+app.include_router(admin_router)
 
 # Custom exception handlers
 app.add_exception_handler(RequestValidationError, handler=custom_validation_exception_handler)
@@ -0,0 +1,63 @@
+# Import necessary modules
+import os
+from typing import Any, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.utils.cache import TTLCache
+from app.utils.etag import TaggedBody
+from app.orders import models, schemas
+
+# load environment variables from .env file
+load_dotenv()
+
+# Paid and cancelled orders never change, so their serialized detail can be kept
+# for as long as memory allows; the TTL only bounds how long a cold entry lingers.
+# Pending orders are always read from the database (another worker process may
+# complete them), and any status transition made here drops the entry anyway.
+ORDER_CACHE_SIZE = int(os.getenv("ORDER_CACHE_SIZE", "10000"))
+ORDER_CACHE_TTL = float(os.getenv("ORDER_CACHE_TTL", "3600"))
+
+FINAL_STATUSES = (models.OrderStatus.paid, models.OrderStatus.cancelled)
+
+# Serialized OrderOut payloads (with their ETags) keyed by (order_id, user_id)
+detail_cache = TTLCache(maxsize=ORDER_CACHE_SIZE, ttl=ORDER_CACHE_TTL)
+
+
+def serialize_order(order: Any) -> TaggedBody:
+    """
+    Serialize an order (ORM object with subtotals attached, or an equivalent dict) as OrderOut.
+    """
+    return TaggedBody.from_body(schemas.OrderOut.model_validate(order).model_dump_json().encode())
+
+
+def get_order(order_id: int, user_id: int) -> Optional[TaggedBody]:
+    return detail_cache.get((order_id, user_id))
+
+
+def remember_order(user_id: int, order: Any) -> Optional[TaggedBody]:
+    """
+    Cache the serialized order if it is in a final status. Returns the serialized body either way.
+    """
+    order_status = order["status"] if isinstance(order, dict) else order.status
+    tagged = serialize_order(order)
+    if order_status in FINAL_STATUSES:
+        detail_cache.set((order["id"] if isinstance(order, dict) else order.id, user_id), tagged)
+    return tagged
+
+
+def invalidate_orders(keys: Iterable[Tuple[int, int]]) -> None:
+    """
+    Drop cached details for the given (order_id, user_id) pairs. Call after a status change is committed.
+    """
+    detail_cache.delete_many(list(keys))
+
+
+def clear_orders() -> None:
+    """
+    Drop every cached detail. Called when a month of orders has been archived.
+    """
+    detail_cache.clear()
+
+
+def cache_stats() -> dict:
+    return detail_cache.stats()
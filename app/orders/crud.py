@@ -1,33 +1,110 @@
-from sqlalchemy.orm import Session, joinedload
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Tuple, Union
 
-from app.orders import models
+from app.orders import models, partitions
+from app.utils.pagination import encode_cursor, decode_cursor
 
 
-def get_user_orders(db: Session, user_id: int) -> List[models.Order]:
+ORDER_HISTORY_PAGE_SIZE = 20
+ORDER_HISTORY_MAX_PAGE_SIZE = 100
+
+
+def _user_orders_query(
+    db: Session,
+    user_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[models.OrderStatus] = None
+):
+    """
+    A user's orders, newest first, optionally restricted to [start, end) and one status.
+    Served by ix_orders_user_created / ix_orders_user_status_created.
+    """
+    query = db.query(models.Order).filter(models.Order.user_id == user_id)
+    if status is not None:
+        query = query.filter(models.Order.status == status)
+    if start is not None:
+        query = query.filter(models.Order.created_at >= start)
+    if end is not None:
+        query = query.filter(models.Order.created_at < end)
+    return query.order_by(models.Order.created_at.desc(), models.Order.id.desc())
+
+
+def get_user_orders(
+    db: Session,
+    user_id: int,
+    limit: int = ORDER_HISTORY_PAGE_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[models.OrderStatus] = None
+) -> List[models.Order]:
     """
-    Retrieve all orders placed by a specific user, most recent first.
+    Retrieve the most recent orders placed by a specific user (at most `limit`).
     """
-    return db.query(models.Order)\
-             .filter_by(user_id=user_id)\
-             .order_by(models.Order.created_at.desc())\
-             .all()
+    return _user_orders_query(db, user_id, start, end, status).limit(limit).all()
+
+
+def get_user_orders_keyset(
+    db: Session,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = ORDER_HISTORY_PAGE_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[models.OrderStatus] = None
+) -> Tuple[List[models.Order], Optional[str]]:
+    """
+    Page through a user's orders by keyset on (created_at, id), newest first.
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    query = _user_orders_query(db, user_id, start, end, status)
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(position["created_at"]), int(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+        # The plain bound on created_at lets a partitioned table skip newer months
+        query = query.filter(
+            models.Order.created_at <= after[0],
+            tuple_(models.Order.created_at, models.Order.id) < after
+        )
+
+    orders = query.limit(limit + 1).all()
+    if len(orders) <= limit:
+        return orders, None
+    orders = orders[:limit]
+    last = orders[-1]
+    return orders, encode_cursor({"created_at": last.created_at.isoformat(), "id": last.id})
 
 
 def get_order_detail_with_subtotals(db: Session, order_id: int, user_id: int) -> models.Order:
     """
-    Retrieve order detail by ID with joined items and calculated subtotal.
+    Retrieve order detail by ID with its items and calculated subtotal.
     Ensures the order belongs to the current user.
+    On partitioned tables both lookups are narrowed to the partitions that can hold the order.
     """
-    order = db.query(models.Order)\
-              .options(joinedload(models.Order.items))\
-              .filter_by(id=order_id, user_id=user_id)\
-              .first()
+    query = db.query(models.Order).filter_by(id=order_id, user_id=user_id)
+    bounds = partitions.order_created_range(db, order_id)
+    if bounds is not None:
+        start, end = bounds
+        query = query.filter(models.Order.created_at >= start)
+        if end is not None:
+            query = query.filter(models.Order.created_at < end)
+    order = query.first()
 
     if not order:
         raise HTTPException(status_code=404, detail="Order not found.")
 
+    items = db.query(models.OrderItem).filter(models.OrderItem.order_id == order.id)
+    if bounds is not None:
+        items = items.filter(models.OrderItem.created_at == order.created_at)
+    set_committed_value(order, "items", items.order_by(models.OrderItem.id).all())
+
     # Attach subtotal per item
     for item in order.items:
         item.subtotal = round(item.quantity * item.price_at_purchase, 2)
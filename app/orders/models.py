@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from app.products.models import Product
 from datetime import datetime
@@ -23,6 +23,15 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete")
 
+    # Order history keyset (newest first); on PostgreSQL the remaining columns are
+    # included so history pages are answered from the index alone
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at", "id",
+              postgresql_include=["total_amount", "status"]),
+        Index("ix_orders_user_status_created", "user_id", "status", "created_at", "id",
+              postgresql_include=["total_amount"]),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
 
@@ -33,7 +42,13 @@ class OrderItem(Base):
     product_description = Column(String, nullable=True)  # snapshot
     quantity = Column(Integer, nullable=False)
     price_at_purchase = Column(Float, nullable=False)
+    # Copy of the order's created_at: the partition key when order tables are partitioned
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
       
  
     order = relationship("Order", back_populates="items")
     product = relationship("Product")
+
+    __table_args__ = (
+        Index("ix_order_items_order_created", "order_id", "created_at"),
+    )
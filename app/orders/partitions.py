@@ -0,0 +1,383 @@
+# Import necessary modules
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.orders import cache as order_cache
+from app.core.config import logger
+
+# load environment variables from .env file
+load_dotenv()
+
+# Monthly range partitioning of orders and order_items on created_at (PostgreSQL 12+).
+# Off by default: the Alembic migration only converts the tables when ORDERS_PARTITIONING
+# is set, and everything below is a no-op on plain tables. Partitions are named
+# <table>_YYYY_MM; rows outside every month land in <table>_default, which the
+# maintenance command keeps empty by creating months ahead of time (and moves out
+# of the default partition with --move-default-rows when it was too late).
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+ORDER_ARCHIVE_DIR = os.getenv("ORDER_ARCHIVE_DIR", "archive")
+# How often the id ranges used to prune order lookups are reloaded
+PARTITION_BOUNDS_TTL = float(os.getenv("PARTITION_BOUNDS_TTL", "300"))
+
+# Parent first; order_items references orders, so drops and archives go in reverse
+PARTITIONED_TABLES = ("orders", "order_items")
+# A month stops taking inserts once it is over; allow for transactions still in flight
+_CLOSE_GRACE = timedelta(hours=1)
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: Optional[datetime]  # None for the default partition
+    end: Optional[datetime]
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def is_partitioned(bind) -> bool:
+    """
+    True when orders is a partitioned table (always False outside PostgreSQL).
+    """
+    if bind.dialect.name != "postgresql":
+        return False
+    return bind.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('orders')"
+    )).first() is not None
+
+
+def list_partitions(bind, table: str) -> List[Partition]:
+    """
+    Partitions of a table, oldest first, the default partition last.
+    """
+    rows = bind.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": table}).all()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound)
+        if match:
+            partitions.append(Partition(name, datetime.fromisoformat(match[1]), datetime.fromisoformat(match[2])))
+        else:
+            partitions.append(Partition(name, None, None))
+    return sorted(partitions, key=lambda partition: (partition.start is None, partition.start or datetime.min))
+
+
+def oldest_partition_day(bind) -> Optional[date]:
+    """
+    First day of the oldest monthly partition of orders. Earlier months have been archived
+    (or never held orders). None when orders is not partitioned.
+    """
+    if not is_partitioned(bind):
+        return None
+    starts = [partition.start for partition in list_partitions(bind, "orders") if partition.start is not None]
+    return starts[0].date() if starts else None
+
+
+def _create_month(conn: Connection, table: str, month: date, prefix: Optional[str] = None) -> str:
+    name = partition_name(prefix or table, month)
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+    return name
+
+
+def create_partitions(conn: Connection, table: str, first: date, last: date, prefix: Optional[str] = None) -> List[str]:
+    """
+    Create the monthly partitions first..last (inclusive) and the default partition,
+    skipping those that exist. Returns the names created. `prefix` names the partitions
+    after another table (used while the parent still has a temporary name).
+    """
+    prefix = prefix or table
+    existing = {partition.name for partition in list_partitions(conn, table)}
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if partition_name(prefix, month) not in existing:
+            created.append(_create_month(conn, table, month, prefix))
+        month = add_months(month, 1)
+    if f"{prefix}_default" not in existing:
+        conn.execute(text(f"CREATE TABLE {prefix}_default PARTITION OF {table} DEFAULT"))
+        created.append(f"{prefix}_default")
+    return created
+
+
+def default_rows(conn: Connection, table: str, month: Optional[date] = None) -> int:
+    """
+    Rows of `table` held by its default partition (only those of `month` if given).
+    """
+    if f"{table}_default" not in {partition.name for partition in list_partitions(conn, table)}:
+        return 0
+    query = f"SELECT count(*) FROM {table}_default"
+    params = {}
+    if month is not None:
+        query += " WHERE created_at >= :start AND created_at < :end"
+        params = {"start": month, "end": add_months(month, 1)}
+    return conn.execute(text(query), params).scalar()
+
+
+def _create_month_moving_rows(conn: Connection, month: date, tables: List[str]) -> List[str]:
+    """
+    Create `month` for `tables` although the default partitions hold rows of that month:
+    the month's rows are taken out (items before orders, so the foreign key holds), the
+    months are created and the rows inserted again through the parents, which now route
+    them to the new months. Runs in the caller's transaction.
+    """
+    bounds = {"start": month, "end": add_months(month, 1)}
+    # Orders can only leave once their items have, so moving orders moves the month's items too
+    moving = PARTITIONED_TABLES if "orders" in tables else ("order_items",)
+    for table in reversed(moving):
+        conn.execute(text(f"CREATE TEMPORARY TABLE {table}_moving (LIKE {table})"))
+        conn.execute(text(
+            f"WITH moved AS (DELETE FROM {table} WHERE created_at >= :start AND created_at < :end RETURNING *) "
+            f"INSERT INTO {table}_moving SELECT * FROM moved"
+        ), bounds)
+    created = [_create_month(conn, table, month) for table in tables]
+    for table in moving:
+        conn.execute(text(f"INSERT INTO {table} SELECT * FROM {table}_moving"))
+        conn.execute(text(f"DROP TABLE {table}_moving"))
+    return created
+
+
+def ensure_partitions(
+    engine: Engine,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    move_rows: bool = False
+) -> List[str]:
+    """
+    Make sure the current month and the next `months_ahead` exist for both tables.
+    Safe to call on every startup; does nothing unless orders is partitioned.
+
+    PostgreSQL refuses to create a month while the default partition holds rows of it.
+    With `move_rows` (maintenance command) those rows are moved into the new month;
+    otherwise the month is skipped with an error, so the app still starts.
+    """
+    created = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return created
+        existing = {
+            partition.name for table in PARTITIONED_TABLES for partition in list_partitions(conn, table)
+        }
+        current = month_start(datetime.utcnow().date())
+        month = current
+        while month <= add_months(current, months_ahead):
+            missing = [table for table in PARTITIONED_TABLES if partition_name(table, month) not in existing]
+            stranded = {table: default_rows(conn, table, month) for table in missing}
+            if not any(stranded.values()):
+                created += [_create_month(conn, table, month) for table in missing]
+            elif move_rows:
+                created += _create_month_moving_rows(conn, month, missing)
+                logger.warning(f"Moved {stranded} rows of {month:%Y-%m} out of the default order partitions")
+            else:
+                logger.error(
+                    f"Order partitions for {month:%Y-%m} not created: the default partitions hold "
+                    f"{stranded} rows of that month. Run `python order_partitions.py create --move-default-rows`."
+                )
+            month = add_months(month, 1)
+        for table in PARTITIONED_TABLES:
+            if f"{table}_default" not in existing:
+                conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+                created.append(f"{table}_default")
+
+        stray = {table: default_rows(conn, table) for table in PARTITIONED_TABLES}
+    if created:
+        logger.info(f"Created order partitions: {', '.join(created)}")
+    if any(stray.values()):
+        # Rows only land there when their month was never created; they slow every
+        # query that cannot prune the default partition and block creating that month
+        logger.error(f"Rows in the default order partitions: {stray}. Create the missing months ahead of time.")
+    return created
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _export(conn: Connection, name: str, path: str) -> int:
+    """
+    Stream every row of a partition into a gzip NDJSON file. Returns the row count.
+    The file only appears under its final name once it is complete.
+    """
+    partial = path + ".partial"
+    count = 0
+    result = conn.execute(text(f"SELECT * FROM {name} ORDER BY id").execution_options(stream_results=True))
+    with gzip.open(partial, "wt", encoding="utf-8") as stream:
+        for row in result.mappings():
+            stream.write(json.dumps(dict(row), default=_json_default) + "\n")
+            count += 1
+    os.replace(partial, path)
+    return count
+
+
+def archive_month(engine: Engine, month: date, directory: str = ORDER_ARCHIVE_DIR) -> Dict:
+    """
+    Export one month of order_items and orders to <directory>/<partition>.ndjson.gz,
+    then detach and drop both partitions. Runs in one transaction: if anything fails,
+    nothing is dropped and the files written so far are removed.
+    """
+    month = month_start(month)
+    if month >= month_start(datetime.utcnow().date()):
+        raise ValueError("Only months that are over can be archived.")
+    os.makedirs(directory, exist_ok=True)
+    names = {table: partition_name(table, month) for table in PARTITIONED_TABLES}
+    paths = {table: os.path.join(directory, f"{names[table]}.ndjson.gz") for table in PARTITIONED_TABLES}
+    for path in paths.values():
+        if os.path.exists(path):
+            raise FileExistsError(f"{path} already exists.")
+
+    report = {"month": f"{month:%Y-%m}", "rows": {}, "files": {}}
+    written = []
+    try:
+        with engine.begin() as conn:
+            if not is_partitioned(conn):
+                raise ValueError("orders is not partitioned.")
+            for table in PARTITIONED_TABLES:
+                if names[table] not in {partition.name for partition in list_partitions(conn, table)}:
+                    raise ValueError(f"Partition {names[table]} does not exist.")
+            # Nothing should write to a month that is over; make sure of it while exporting
+            conn.execute(text(f"LOCK TABLE {names['order_items']}, {names['orders']} IN SHARE MODE"))
+            for table in reversed(PARTITIONED_TABLES):
+                report["rows"][table] = _export(conn, names[table], paths[table])
+                report["files"][table] = paths[table]
+                written.append(paths[table])
+            for table in reversed(PARTITIONED_TABLES):
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {names[table]}"))
+                conn.execute(text(f"DROP TABLE {names[table]}"))
+    except Exception:
+        for path in written:
+            os.remove(path)
+        raise
+
+    _bounds.reset()
+    # Archived orders are no longer served; other processes notice at their next bounds reload
+    order_cache.clear_orders()
+    logger.info(f"Archived orders of {month:%Y-%m}: {report['rows']}")
+    return report
+
+
+def archive_before(engine: Engine, before: date, directory: str = ORDER_ARCHIVE_DIR) -> List[Dict]:
+    """
+    Archive every monthly partition that ends on or before `before`, oldest first.
+    """
+    before = min(month_start(before), month_start(datetime.utcnow().date()))
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            raise ValueError("orders is not partitioned.")
+        months = [
+            partition.start.date() for partition in list_partitions(conn, "orders")
+            if partition.end is not None and partition.end.date() <= before
+        ]
+    return [archive_month(engine, month, directory) for month in months]
+
+
+class _IdRange(NamedTuple):
+    start: datetime
+    end: datetime
+    min_id: int
+    max_id: int
+
+
+class PartitionBounds:
+    """
+    Maps order ids to created_at ranges so lookups by id can be pruned to the partitions
+    that may hold the order. Ids grow with created_at, so each closed month covers a
+    narrow id range; those ranges never change and are loaded once. Months still taking
+    inserts (and the default partition) are always searched for ids above their lowest id.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = 0.0
+        self._partitioned: Optional[bool] = None
+        self._closed_ids: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._closed: List[_IdRange] = []
+        self._open_start: Optional[datetime] = None
+        self._open_min_id: Optional[int] = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded_at = 0.0
+            self._partitioned = None
+
+    def _load(self, db: Session) -> None:
+        conn = db.connection()
+        self._partitioned = is_partitioned(conn)
+        if not self._partitioned:
+            return
+        cutoff = datetime.utcnow() - _CLOSE_GRACE
+        closed, open_starts = [], []
+        listed = list_partitions(conn, "orders")
+        archived = set(self._closed_ids) - {partition.name for partition in listed}
+        if archived:
+            # Another process archived these months: stop serving their cached orders
+            for name in archived:
+                del self._closed_ids[name]
+            order_cache.clear_orders()
+        for partition in listed:
+            if partition.end is not None and partition.end <= cutoff:
+                if partition.name not in self._closed_ids:
+                    low, high = conn.execute(text(f"SELECT min(id), max(id) FROM {partition.name}")).one()
+                    self._closed_ids[partition.name] = (low, high) if low is not None else None
+                ids = self._closed_ids[partition.name]
+                if ids is not None:
+                    closed.append(_IdRange(partition.start, partition.end, *ids))
+            elif partition.start is not None:
+                open_starts.append(partition.start)
+        # With no open month left, new rows go to the default partition, after the last month
+        self._open_start = min(open_starts) if open_starts else max((r.end for r in closed), default=datetime.min)
+        self._open_min_id = conn.execute(
+            text("SELECT min(id) FROM orders WHERE created_at >= :start"), {"start": self._open_start}
+        ).scalar()
+        self._closed = closed
+
+    def created_range(self, db: Session, order_id: int) -> Optional[Tuple[datetime, Optional[datetime]]]:
+        """
+        [start, end) of created_at that contains the order if it exists (end None = unbounded),
+        or None when orders is not partitioned.
+        """
+        with self._lock:
+            if self._partitioned is None or time.monotonic() - self._loaded_at > PARTITION_BOUNDS_TTL:
+                self._load(db)
+                self._loaded_at = time.monotonic()
+            if not self._partitioned:
+                return None
+            candidates = [r for r in self._closed if r.min_id <= order_id <= r.max_id]
+            if self._open_min_id is None or order_id >= self._open_min_id or not candidates:
+                return min([r.start for r in candidates] + [self._open_start]), None
+            return min(r.start for r in candidates), max(r.end for r in candidates)
+
+
+_bounds = PartitionBounds()
+
+
+def order_created_range(db: Session, order_id: int) -> Optional[Tuple[datetime, Optional[datetime]]]:
+    return _bounds.created_range(db, order_id)
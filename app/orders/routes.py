@@ -1,27 +1,41 @@
-from fastapi import APIRouter, Depends, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List, Union, Dict
+from typing import List, Optional, Union, Dict
 
 from app.core.database import get_db
 from app.auth.models import User
 from app.utils.oauth2 import get_user_only
 from app.orders import models, schemas, crud
+from app.orders import cache as order_cache
+from app.utils.etag import etag_response
 from app.orders.schemas import MessageResponse
 from app.core.config import logger
 
 router = APIRouter(tags=["Orders"])
 
 
-@router.get("/orders/history", response_model=Union[List[schemas.OrderOutHistory], MessageResponse])
+@router.get("/orders/history", response_model=Union[List[schemas.OrderOutHistory], schemas.OrderHistoryPage, MessageResponse])
 def get_user_orders(
     db: Session = Depends(get_db),
-    user: User = Depends(get_user_only)
-) -> Union[List[schemas.OrderOutHistory], Dict[str, str]]:
+    user: User = Depends(get_user_only),
+    limit: int = Query(crud.ORDER_HISTORY_PAGE_SIZE, ge=1, le=crud.ORDER_HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[schemas.OrderStatus] = None
+) -> Union[List[schemas.OrderOutHistory], Dict]:
     """
-    Get all orders for the current user. Return message if none found.
+    Get the current user's orders, newest first, optionally filtered by date range [start, end) and status.
+    Without `cursor` the most recent `limit` orders are returned (or a message if none found).
+    Pass `cursor` (empty for the first page) to page by keyset and receive `next_cursor`.
     """
     logger.info(f"Order history requested by user_id={user.id}")
-    orders = crud.get_user_orders(db, user.id)
+    if cursor is not None:
+        orders, next_cursor = crud.get_user_orders_keyset(db, user.id, cursor, limit, start, end, status)
+        return {"items": orders, "next_cursor": next_cursor}
+
+    orders = crud.get_user_orders(db, user.id, limit, start, end, status)
 
     if not orders:
         logger.info(f"No previous orders found for user_id={user.id}")
@@ -34,13 +48,18 @@ def get_user_orders(
 @router.get("/orders/{order_id}", response_model=schemas.OrderOut)
 def get_user_order_detail(
     order_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     user: User = Depends(get_user_only)
-) -> schemas.OrderOut:
+) -> Response:
     """
     Get a specific order's detail, ensuring it belongs to the current user.
+    Paid and cancelled orders are served from a cache of serialized responses.
     """
     logger.info(f"Order detail requested for order_id={order_id} by user_id={user.id}")
-    order = crud.get_order_detail_with_subtotals(db, order_id, user.id)
+    tagged = order_cache.get_order(order_id, user.id)
+    if tagged is None:
+        order = crud.get_order_detail_with_subtotals(db, order_id, user.id)
+        tagged = order_cache.remember_order(user.id, order)
     logger.info(f"Order detail returned for order_id={order_id} by user_id={user.id}")
-    return order
+    return etag_response(request, tagged)
@@ -55,6 +55,13 @@ class OrderOutHistory(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderHistoryPage(BaseModel):
+    """
+    One keyset page of order history.
+    """
+    items: List[OrderOutHistory]
+    next_cursor: Optional[str] = None
+
 class OrderOutCheckout(OrderOutHistory):
     """
     Response schema for a complete order during checkout.
@@ -87,3 +94,11 @@ class OrderResponseWithMessage(BaseModel):
 
 class MessageResponse(BaseModel):
     message: str
+
+class CheckoutAccepted(BaseModel):
+    """
+    Response schema for an asynchronous checkout (202): the order is pending until a worker completes it.
+    """
+    message: str
+    order_id: int
+    status: OrderStatus
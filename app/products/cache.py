@@ -0,0 +1,67 @@
+# Import necessary modules
+import os
+from typing import Any, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.utils.cache import TTLCache
+from app.products.models import normalize_category
+
+# load environment variables from .env file
+load_dotenv()
+
+# The cache lives in each worker process. Writes made through this process
+# invalidate it immediately; writes made by other workers are picked up once
+# the TTL expires, so keep the TTL short when running several workers.
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "60"))
+
+# Serialized BasicProductOut payloads (with their ETags) keyed by product id
+detail_cache = TTLCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+# Serialized listing and search pages keyed by the normalized filter tuple
+listing_cache = TTLCache(maxsize=PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+
+
+def listing_key(
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    sort_by: Optional[str],
+    page: int,
+    page_size: int,
+    cursor: Optional[str] = None
+) -> Tuple[Any, ...]:
+    """
+    Normalize listing filters so equivalent requests share one cache entry.
+    """
+    return (
+        normalize_category(category) if category else None,
+        None if min_price is None else float(min_price),
+        None if max_price is None else float(max_price),
+        sort_by or "price",
+        page,
+        page_size,
+        cursor,
+    )
+
+
+def search_key(keyword: str, page: int, page_size: int) -> Tuple[Any, ...]:
+    """
+    Search pages share the listing cache, so they are invalidated together.
+    """
+    return ("search", keyword, page, page_size)
+
+
+def invalidate_products(product_ids: Iterable[int]) -> None:
+    """
+    Drop cached details for the given products and every cached listing page.
+    Call after the write has been committed.
+    """
+    detail_cache.delete_many(list(product_ids))
+    listing_cache.clear()
+
+
+def cache_stats() -> dict:
+    return {
+        "detail": detail_cache.stats(),
+        "listing": listing_cache.stats(),
+    }
@@ -1,11 +1,21 @@
+from datetime import datetime
+from sqlalchemy import case, select, tuple_, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import List, Optional
-from app.products import models, schemas
+from typing import List, Optional, Tuple
+from app.products import inventory, models, schemas, search
+from app.products import hooks
+from app.products.facets import facet_index
+from app.products.suggest import suggest_index
 from app.core.config import logger
+from app.core.retry import retry_transaction
+from app.utils.pagination import encode_cursor, decode_cursor
 
+BULK_UPDATE_CHUNK_SIZE = 1000
 
+
+@retry_transaction
 def create_product(db: Session, data: schemas.ProductCreate, admin_id: int) -> models.Product:
     """
     Create a new product associated with the admin.
@@ -18,8 +28,11 @@ def create_product(db: Session, data: schemas.ProductCreate, admin_id: int) -> m
     product = models.Product(**product_data, created_by=admin_id)
     try:
         db.add(product)
+        db.flush()
+        search.index_product(db, product)
         db.commit()
         db.refresh(product)
+        hooks.products_changed([product])
         return product
     
     except IntegrityError:
@@ -35,16 +48,41 @@ def get_product_by_id(db: Session, product_id: int) -> Optional[models.Product]:
     """
     Fetch product by its ID.
     """
-    return db.query(models.Product).get(product_id)
+    product = db.query(models.Product).get(product_id)
+    inventory.attach_totals(db, [product])
+    return product
 
 
 def list_products(db: Session, skip: int = 0, limit: int = 10) -> List[models.Product]:
     """
     List all products with pagination.
     """
-    return db.query(models.Product).offset(skip).limit(limit).all()
+    products = db.query(models.Product).order_by(models.Product.id).offset(skip).limit(limit).all()
+    return inventory.attach_totals(db, products)
+
+
+def list_products_keyset(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 10
+) -> Tuple[List[models.Product], Optional[str]]:
+    """
+    List all products by id using keyset pagination.
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    query = db.query(models.Product)
+    if cursor:
+        position = decode_cursor(cursor)
+        query = query.filter(models.Product.id > position.get("id", 0))
+
+    products = inventory.attach_totals(db, query.order_by(models.Product.id).limit(limit + 1).all())
+    if len(products) <= limit:
+        return products, None
+    products = products[:limit]
+    return products, encode_cursor({"id": products[-1].id})
 
 
+@retry_transaction
 def update_product(db: Session, product_id: int, updates: dict, admin_id: int) -> models.Product:
     """
     Update product fields, only if the admin is the creator.
@@ -63,11 +101,17 @@ def update_product(db: Session, product_id: int, updates: dict, admin_id: int) -
     for key, value in updates.items():
         setattr(product, key, value)
 
+    db.flush()
+    search.index_product(db, product)
+    if "stock" in updates:
+        inventory.reset_shards(db, [product])
     db.commit()
     db.refresh(product)
+    hooks.products_changed([product])
     return product
 
 
+@retry_transaction
 def delete_product(db: Session, product_id: int, admin_id: int) -> bool:
     """
     Delete product only if the admin created it.
@@ -79,47 +123,213 @@ def delete_product(db: Session, product_id: int, admin_id: int) -> bool:
         raise HTTPException(status_code=403, detail="You are not authorized to delete this product.")
 
     db.delete(product)
+    search.remove_product(db, product_id)
+    db.merge(models.ProductDeletion(product_id=product_id, deleted_at=datetime.utcnow()))
     db.commit()
+    hooks.products_deleted([product_id])
     return True
 
 
-def filter_public_products(
+@retry_transaction
+def _bulk_update_chunk(db: Session, ids: List[int], prices: dict, stocks: dict, admin_id: int) -> Tuple[list, set]:
+    """
+    One chunk of bulk_update_products in its own transaction.
+    Returns (updated rows, ids of the other products that exist).
+    """
+    table = models.Product.__table__
+    values = {"updated_at": datetime.utcnow()}
+    if prices:
+        values["price"] = case(prices, value=table.c.id, else_=table.c.price)
+    if stocks:
+        values["stock"] = case(stocks, value=table.c.id, else_=table.c.stock)
+    stmt = update(table)\
+        .where(table.c.id.in_(ids), table.c.created_by == admin_id)\
+        .values(**values)\
+        .returning(
+            table.c.id, table.c.name, table.c.category, table.c.category_key,
+            table.c.price, table.c.stock, table.c.stock_shards
+        )
+    rows = db.execute(stmt).all()
+    # New stock levels of sharded products are spread over their shards
+    inventory.reset_shards(db, [row for row in rows if row.id in stocks])
+
+    updated = {row.id for row in rows}
+    missing = [pid for pid in ids if pid not in updated]
+    existing = set()
+    if missing:
+        existing = {row.id for row in db.execute(select(table.c.id).where(table.c.id.in_(missing)))}
+    db.commit()
+    return rows, existing
+
+
+def bulk_update_products(
+    db: Session,
+    patches: List[schemas.ProductPatch],
+    admin_id: int,
+    chunk_size: int = BULK_UPDATE_CHUNK_SIZE
+) -> dict:
+    """
+    Apply price/stock patches as one set-based UPDATE per chunk, each chunk in its own transaction.
+    Ownership is enforced in the same statement; rows the admin does not own are reported as 403.
+    A chunk that deadlocks is retried on its own; chunks already committed are not re-applied.
+    """
+    outcomes = {}
+    changed = []
+
+    for start in range(0, len(patches), chunk_size):
+        # Patches for the same id are merged, later values winning
+        chunk_ids, prices, stocks = {}, {}, {}
+        for patch in patches[start:start + chunk_size]:
+            chunk_ids[patch.id] = True
+            if patch.price is not None:
+                prices[patch.id] = float(patch.price)
+            if patch.stock is not None:
+                stocks[patch.id] = patch.stock
+        ids = [pid for pid in chunk_ids if pid in prices or pid in stocks]
+        for pid in chunk_ids:
+            if pid not in prices and pid not in stocks:
+                outcomes[pid] = (400, "Nothing to update.")
+        if not ids:
+            continue
+
+        rows, existing = _bulk_update_chunk(db, ids, prices, stocks, admin_id)
+        updated = {row.id for row in rows}
+        changed.extend(rows)
+        for pid in ids:
+            if pid in updated:
+                outcomes[pid] = (200, "Product updated successfully.")
+            elif pid in existing:
+                outcomes[pid] = (403, "You are not authorized to modify this product.")
+            else:
+                outcomes[pid] = (404, "Product not found")
+
+    # One invalidation for everything that changed
+    hooks.products_changed(changed)
+    updated_count = sum(1 for code, _ in outcomes.values() if code == 200)
+    logger.info(f"Bulk update by admin_id={admin_id}: {updated_count} of {len(outcomes)} products updated")
+
+    return {
+        "updated": updated_count,
+        "failed": len(outcomes) - updated_count,
+        "results": [
+            {"id": pid, "status_code": code, "message": message} for pid, (code, message) in outcomes.items()
+        ],
+    }
+
+
+# Sort column and direction for each public sort option; id breaks ties in the same direction
+PUBLIC_SORT_KEYS = {
+    "price": ("price", "asc"),
+    "name": ("name", "asc"),
+    "stock": ("stock", "desc"),
+}
+
+
+def _public_products_query(
     db: Session,
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    sort_by: str = "price",
-    page: int = 1,
-    page_size: int = 10
-) -> List[models.Product]:
+    sort_by: str = "price"
+):
     """
-    Filter public products based on various criteria.
+    Build the filtered and ordered query shared by offset and keyset pagination.
     """
     query = db.query(models.Product)
 
     if category:
-        query = query.filter(models.Product.category.ilike(f"%{category}%"))
+        query = query.filter(models.Product.category_key == models.normalize_category(category))
     if min_price is not None:
         query = query.filter(models.Product.price >= min_price)
     if max_price is not None:
         query = query.filter(models.Product.price <= max_price)
 
-    if sort_by == "price":
-        query = query.order_by(models.Product.price.asc())
-    elif sort_by == "name":
-        query = query.order_by(models.Product.name.asc())
-    elif sort_by == "stock":
-        query = query.order_by(models.Product.stock.desc())
+    column, direction = PUBLIC_SORT_KEYS.get(sort_by, PUBLIC_SORT_KEYS["price"])
+    sort_column = getattr(models.Product, column)
+    if direction == "asc":
+        query = query.order_by(sort_column.asc(), models.Product.id.asc())
+    else:
+        query = query.order_by(sort_column.desc(), models.Product.id.desc())
+    return query
 
-    return query.offset((page - 1) * page_size).limit(page_size).all()
+
+def filter_public_products(
+    db: Session,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort_by: str = "price",
+    page: int = 1,
+    page_size: int = 10
+) -> List[models.Product]:
+    """
+    Filter public products based on various criteria.
+    """
+    query = _public_products_query(db, category, min_price, max_price, sort_by)
+    return inventory.attach_totals(db, query.offset((page - 1) * page_size).limit(page_size).all())
+
+
+def filter_public_products_keyset(
+    db: Session,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort_by: str = "price",
+    cursor: Optional[str] = None,
+    page_size: int = 10
+) -> Tuple[List[models.Product], Optional[str]]:
+    """
+    Filter public products using keyset pagination on (sort key, id).
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    if sort_by not in PUBLIC_SORT_KEYS:
+        sort_by = "price"
+    query = _public_products_query(db, category, min_price, max_price, sort_by)
+    column, direction = PUBLIC_SORT_KEYS[sort_by]
+
+    if cursor:
+        position = decode_cursor(cursor)
+        if position.get("sort") != sort_by or "key" not in position or "id" not in position:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order.")
+        key = tuple_(getattr(models.Product, column), models.Product.id)
+        after = (position["key"], position["id"])
+        query = query.filter(key > after if direction == "asc" else key < after)
+
+    products = query.limit(page_size + 1).all()
+    if len(products) <= page_size:
+        return inventory.attach_totals(db, products), None
+    products = products[:page_size]
+    last = products[-1]
+    # Encode the column the query sorts on, before attach_totals swaps in the shard
+    # totals of sharded products for display
+    next_cursor = encode_cursor({"sort": sort_by, "key": getattr(last, column), "id": last.id})
+    return inventory.attach_totals(db, products), next_cursor
+
+
+def get_facets(
+    db: Session,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+) -> dict:
+    """
+    Category counts and price histogram for the public filters, served from the facet index.
+    """
+    facet_index.ensure_loaded(db)
+    return facet_index.facets(category, min_price, max_price)
+
+
+def suggest_products(db: Session, prefix: str, limit: int = 10) -> List[dict]:
+    """
+    Type-ahead suggestions from the in-memory prefix index of names and categories.
+    """
+    suggest_index.ensure_loaded(db)
+    return suggest_index.suggest(prefix, limit)
 
 
-def search_products(db: Session, keyword: str) -> List[models.Product]:
+def search_products(db: Session, keyword: str, page: int = 1, page_size: int = 10) -> List[models.Product]:
     """
-    Search public products by keyword in name or description.
+    Search public products by keyword in name, description or category.
+    Results come from the full-text index, ranked by relevance and paginated.
     """
-    return db.query(models.Product).filter(
-        models.Product.name.ilike(f"%{keyword}%") |
-        models.Product.description.ilike(f"%{keyword}%")|
-        models.Product.category.ilike(f"%{keyword}%")
-    ).all()
+    return inventory.attach_totals(db, search.search(db, keyword, page, page_size))
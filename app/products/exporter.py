@@ -0,0 +1,106 @@
+# Import necessary modules
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import exists, select
+
+from app.core.database import SessionLocal
+from app.products import models
+from app.core.config import logger
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FIELDS = (
+    "id", "name", "description", "price", "stock", "category", "image_url", "created_by", "updated_at",
+)
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _ndjson_batch(rows) -> str:
+    return "".join(json.dumps(dict(row._mapping), default=_json_default) + "\n" for row in rows)
+
+
+def _csv_batch(rows, suffix: tuple = ()) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(tuple(row) + suffix for row in rows)
+    return buffer.getvalue()
+
+
+def _csv_header(fields) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fields)
+    return buffer.getvalue()
+
+
+def _tombstones(product_ids, file_format: str) -> str:
+    if file_format == "csv":
+        blanks = ("",) * (len(EXPORT_FIELDS) - 1)
+        return _csv_batch([(product_id,) + blanks for product_id in product_ids], ("true",))
+    return "".join(json.dumps({"id": product_id, "deleted": True}) + "\n" for product_id in product_ids)
+
+
+def iter_catalog(file_format: str, since: Optional[datetime] = None, compress: bool = False) -> Iterator[bytes]:
+    """
+    Stream the catalog as NDJSON or CSV, optionally gzip-compressed.
+
+    Rows are read through a server-side cursor in batches of EXPORT_BATCH_SIZE,
+    so memory stays flat however large the catalog is. The generator owns its
+    own session because the request session is closed before streaming starts.
+
+    With `since`, products deleted since then follow the changed ones as tombstones:
+    {"id": ..., "deleted": true} in NDJSON, and rows with only the id and a trailing
+    deleted column set to true in CSV (the column is empty for products).
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    db = SessionLocal()
+    exported = 0
+    try:
+        # Incremental CSV exports carry an extra column marking tombstones
+        suffix = ("",) if since is not None else ()
+        if file_format == "csv":
+            yield emit(_csv_header(EXPORT_FIELDS + ("deleted",) * len(suffix)))
+
+        table = models.Product.__table__
+        # Sharded products report the sum of their shards, not the last admin-written stock
+        columns = [models.live_stock() if field == "stock" else table.c[field] for field in EXPORT_FIELDS]
+        stmt = select(*columns).order_by(table.c.id)
+        if since is not None:
+            stmt = stmt.where(table.c.updated_at >= since)
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+
+        for batch in result.partitions():
+            exported += len(batch)
+            chunk = emit(_csv_batch(batch, suffix) if file_format == "csv" else _ndjson_batch(batch))
+            if chunk:
+                yield chunk
+
+        deleted = 0
+        if since is not None:
+            deletions = models.ProductDeletion.__table__
+            # A deleted id that is in use again (SQLite may reuse ids) was exported above
+            stmt = select(deletions.c.product_id)\
+                .where(deletions.c.deleted_at >= since, ~exists().where(table.c.id == deletions.c.product_id))\
+                .order_by(deletions.c.product_id)
+            result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+            for batch in result.scalars().partitions():
+                deleted += len(batch)
+                chunk = emit(_tombstones(batch, file_format))
+                if chunk:
+                    yield chunk
+
+        if compressor:
+            yield compressor.flush()
+        logger.info(f"Catalog export ({file_format}) finished: {exported} products, {deleted} deletions")
+    finally:
+        db.close()
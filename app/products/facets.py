@@ -0,0 +1,253 @@
+# Import necessary modules
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.products import models
+from app.products.models import normalize_category
+from app.core.config import logger
+
+# load environment variables from .env file
+load_dotenv()
+
+# Lower bounds of the price histogram buckets; the last bucket is open-ended
+PRICE_BUCKETS = [
+    float(edge) for edge in os.getenv("FACET_PRICE_BUCKETS", "0,1000,5000,10000,25000,50000,100000").split(",")
+]
+# Full rebuild interval, which also picks up writes made by other worker processes
+FACET_REFRESH_SECONDS = float(os.getenv("FACET_REFRESH_SECONDS", "300"))
+
+
+class FacetIndex:
+    """
+    In-memory facet aggregates for the public catalog.
+
+    For every normalized category it keeps the sorted prices of all products and
+    of in-stock products, so category counts and price histograms can be answered
+    with bisects for any price range, exactly matching filter_public_products.
+
+    Freshness: writes made through this process (product CRUD, bulk import, bulk
+    update, checkout) patch the aggregates right after commit, so they are
+    read-your-writes consistent within a worker. Writes made by other workers
+    become visible at the next full rebuild, at most FACET_REFRESH_SECONDS later.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # One rebuild at a time (first requests may race to load the index)
+        self._rebuild_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._as_of: Optional[datetime] = None
+        # product id -> (category key, category label, price, in stock)
+        self._products: Dict[int, Tuple[Optional[str], Optional[str], float, bool]] = {}
+        self._prices: Dict[Optional[str], List[float]] = {}
+        self._in_stock: Dict[Optional[str], List[float]] = {}
+        self._labels: Dict[Optional[str], str] = {}
+        # Changes made while a rebuild reads the database, replayed onto the rebuilt index
+        self._pending: Optional[List[Tuple]] = None
+
+    # ------------------ MAINTENANCE ------------------
+
+    def ensure_loaded(self, db: Session) -> None:
+        """
+        Build from the database on first use. Later rebuilds run on the refresher thread.
+        """
+        if self._loaded_at is None:
+            with self._rebuild_lock:
+                if self._loaded_at is None:
+                    self._rebuild(db)
+
+    def rebuild(self, db: Session) -> None:
+        """
+        Rebuild from the database without blocking readers: the new aggregates are built
+        aside, then swapped in under the lock after replaying the changes that were applied
+        to the live index meanwhile (they may have committed after the rows were read).
+        """
+        with self._rebuild_lock:
+            self._rebuild(db)
+
+    def _rebuild(self, db: Session) -> None:
+        with self._lock:
+            self._pending = []
+        try:
+            rows = db.query(
+                models.Product.id, models.Product.category_key, models.Product.category,
+                models.Product.price, models.live_stock()
+            ).all()
+            fresh = FacetIndex()
+            for row in rows:
+                fresh._add(row.id, row.category_key, row.category, row.price, row.stock)
+            with self._lock:
+                for change in self._pending:
+                    fresh._apply(change)
+                self._products, self._prices = fresh._products, fresh._prices
+                self._in_stock, self._labels = fresh._in_stock, fresh._labels
+                self._loaded_at = time.monotonic()
+                self._as_of = datetime.utcnow()
+        finally:
+            with self._lock:
+                self._pending = None
+        logger.info(f"Facet index rebuilt from {len(rows)} products")
+
+    def upsert(self, product) -> None:
+        """
+        Add or replace a product. Accepts any object with id, category, price and stock.
+        """
+        category_key = getattr(product, "category_key", None) or normalize_category(product.category)
+        self._change(("upsert", product.id, category_key, product.category, product.price, product.stock))
+
+    def discard(self, product_id: int) -> None:
+        self._change(("discard", product_id))
+
+    def update_stock(self, product_id: int, stock: int) -> None:
+        """
+        Move a product in or out of the in-stock counts after a stock change.
+        """
+        self._change(("stock", product_id, stock))
+
+    def _change(self, change: Tuple) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(change)
+            if self._loaded_at is not None:
+                self._apply(change)
+
+    def _apply(self, change: Tuple) -> None:
+        kind, product_id = change[0], change[1]
+        if kind == "upsert":
+            self._remove(product_id)
+            self._add(product_id, *change[2:])
+        elif kind == "discard":
+            self._remove(product_id)
+        else:
+            entry = self._products.get(product_id)
+            if entry is None:
+                return
+            category_key, label, price, _ = entry
+            self._remove(product_id)
+            self._add(product_id, category_key, label, price, change[2])
+
+    def _add(self, product_id, category_key, label, price, stock) -> None:
+        in_stock = bool(stock and stock > 0)
+        self._products[product_id] = (category_key, label, price, in_stock)
+        insort(self._prices.setdefault(category_key, []), price)
+        if in_stock:
+            insort(self._in_stock.setdefault(category_key, []), price)
+        if category_key not in self._labels and label:
+            self._labels[category_key] = label
+
+    def _remove(self, product_id) -> None:
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        category_key, _, price, in_stock = entry
+        _remove_value(self._prices[category_key], price)
+        if in_stock:
+            _remove_value(self._in_stock[category_key], price)
+        if not self._prices[category_key]:
+            del self._prices[category_key]
+            self._in_stock.pop(category_key, None)
+            self._labels.pop(category_key, None)
+
+    # ------------------ QUERIES ------------------
+
+    def facets(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> dict:
+        """
+        Category counts and price histogram for the same filters as filter_public_products.
+        Category counts honor the price range; the histogram honors category and price range.
+        """
+        selected = normalize_category(category) if category else None
+        with self._lock:
+            categories = []
+            for category_key, prices in self._prices.items():
+                count = _count(prices, min_price, max_price)
+                if count:
+                    categories.append({
+                        "category": self._labels.get(category_key, category_key),
+                        "count": count,
+                        "in_stock": _count(self._in_stock.get(category_key, []), min_price, max_price),
+                    })
+            categories.sort(key=lambda facet: (-facet["count"], facet["category"] or ""))
+
+            lists = [self._prices.get(selected, [])] if category else list(self._prices.values())
+            buckets = []
+            for index, low in enumerate(PRICE_BUCKETS):
+                high = PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+                count = sum(_count(prices, min_price, max_price, low, high) for prices in lists)
+                buckets.append({"min": low, "max": high, "count": count})
+
+            return {
+                "total": sum(_count(prices, min_price, max_price) for prices in lists),
+                "categories": categories,
+                "price_buckets": buckets,
+                "as_of": self._as_of,
+            }
+
+
+def _refresh_forever(stopped: threading.Event) -> None:
+    while not stopped.wait(FACET_REFRESH_SECONDS):
+        db = SessionLocal()
+        try:
+            facet_index.rebuild(db)
+        except Exception as e:
+            logger.error(f"Facet index refresh failed: {e}")
+        finally:
+            db.close()
+
+
+_refresher: Optional[threading.Thread] = None
+
+
+def start_facet_refresher() -> None:
+    """
+    Start the background thread rebuilding the facet index every FACET_REFRESH_SECONDS,
+    which picks up writes made by other worker processes.
+    """
+    global _refresher
+    if _refresher is not None:
+        return
+    _refresher = threading.Thread(
+        target=_refresh_forever, args=(threading.Event(),), name="facet-refresher", daemon=True
+    )
+    _refresher.start()
+
+
+def _remove_value(values: List[float], value: float) -> None:
+    index = bisect_left(values, value)
+    if index < len(values) and values[index] == value:
+        del values[index]
+
+
+def _count(
+    prices: List[float],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    bucket_low: Optional[float] = None,
+    bucket_high: Optional[float] = None
+) -> int:
+    """
+    Count prices with min_price <= p <= max_price and bucket_low <= p < bucket_high.
+    """
+    lower_bounds = [bound for bound in (min_price, bucket_low) if bound is not None]
+    start = bisect_left(prices, max(lower_bounds)) if lower_bounds else 0
+    if bucket_high is not None and (max_price is None or max_price >= bucket_high):
+        end = bisect_left(prices, bucket_high)
+    elif max_price is not None:
+        end = bisect_right(prices, max_price)
+    else:
+        end = len(prices)
+    return max(0, end - start)
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,37 @@
+# Import necessary modules
+from typing import Dict, Iterable
+
+from app.products.cache import invalidate_products
+from app.products.facets import facet_index
+from app.products.suggest import suggest_index
+
+# Catalog write notifications. Call these after the write has been committed so
+# the in-process read structures never see data that could still be rolled back.
+
+
+def products_changed(products: Iterable) -> None:
+    """
+    Products were created or updated. Each item needs id, name, category, price and stock.
+    """
+    products = list(products)
+    for product in products:
+        facet_index.upsert(product)
+        suggest_index.upsert(product)
+    invalidate_products(product.id for product in products)
+
+
+def products_deleted(product_ids: Iterable[int]) -> None:
+    product_ids = list(product_ids)
+    for product_id in product_ids:
+        facet_index.discard(product_id)
+        suggest_index.discard(product_id)
+    invalidate_products(product_ids)
+
+
+def stock_changed(stock_by_product: Dict[int, int]) -> None:
+    """
+    Only stock moved (checkout), keyed by product id with the new stock level.
+    """
+    for product_id, stock in stock_by_product.items():
+        facet_index.update_stock(product_id, stock)
+    invalidate_products(stock_by_product)
@@ -0,0 +1,243 @@
+# Import necessary modules
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.products import inventory, models, schemas, search
+from app.products import hooks
+from app.core.config import logger
+
+DEFAULT_CHUNK_SIZE = 500
+# A chunk is one multi-row INSERT binding 9 parameters per row; 2000 rows stay well
+# below SQLite's limit of 32766 bound parameters per statement (PostgreSQL: 65535)
+MAX_CHUNK_SIZE = 2000
+# Only the first errors are kept in the report so memory stays flat on bad files
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_COLUMNS = ("name", "description", "price", "stock", "category", "image_url")
+# Columns overwritten when a row matches an existing product name
+UPSERT_COLUMNS = ("description", "price", "stock", "category", "category_key", "image_url", "updated_at")
+
+
+def read_csv(stream: IO[bytes]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield (row number, row, parse error) for each CSV data row.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for row_number, row in enumerate(reader, start=2):
+        # Empty cells mean "not provided"
+        yield row_number, {key: (value if value != "" else None) for key, value in row.items() if key}, None
+
+
+def read_ndjson(stream: IO[bytes]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield (line number, row, parse error) for each non-blank NDJSON line.
+    """
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Each line must be a JSON object."
+            continue
+        yield line_number, row, None
+
+
+READERS = {
+    "csv": read_csv,
+    "ndjson": read_ndjson,
+}
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def _to_values(product: schemas.ProductCreate, admin_id: int) -> dict:
+    """
+    Convert a validated row into column values, mirroring crud.create_product.
+    """
+    values = product.dict()
+    values["image_url"] = str(values["image_url"]) if values.get("image_url") else None
+    values["price"] = float(values["price"])
+    values["category_key"] = models.normalize_category(values["category"])
+    values["created_by"] = admin_id
+    values["updated_at"] = datetime.utcnow()
+    return values
+
+
+class ImportReport:
+    """
+    Running totals for an import; memory use is bounded by MAX_REPORTED_ERRORS.
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.upserted = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+        self.started = time.perf_counter()
+
+    def error(self, row: int, message: str, name: Optional[str] = None) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "name": name, "error": message})
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "processed": self.processed,
+            "upserted": self.upserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.processed / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+def _upsert_rows(db: Session, rows: List[dict]) -> list:
+    """
+    Insert rows in one multi-row statement, updating on the unique name.
+    Rows owned by another admin are left untouched and not returned.
+    """
+    insert = dialect_insert(db)
+    table = models.Product.__table__
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+        where=table.c.created_by == stmt.excluded.created_by,
+    ).returning(
+        table.c.id, table.c.name, table.c.category, table.c.category_key,
+        table.c.price, table.c.stock, table.c.stock_shards
+    )
+    return db.execute(stmt).all()
+
+
+def _write_rows(db: Session, rows: List[dict]) -> list:
+    """
+    Upsert rows, refresh their search index entries and commit.
+    """
+    written = _upsert_rows(db, rows)
+    search.index_products(db, [row.id for row in written])
+    inventory.reset_shards(db, written)
+    db.commit()
+    return written
+
+
+def _flush_chunk(db: Session, chunk: Dict[str, Tuple[int, dict]], report: ImportReport) -> None:
+    """
+    Write one chunk in its own transaction. If the chunk fails as a whole,
+    fall back to row-by-row so a single bad row cannot sink its neighbours.
+    """
+    if not chunk:
+        return
+    failed = set()
+    try:
+        written = _write_rows(db, [values for _, values in chunk.values()])
+    except DBAPIError as e:
+        db.rollback()
+        logger.warning(f"Import chunk failed, retrying row by row: {e.orig}")
+        written = []
+        for name, (row_number, values) in chunk.items():
+            try:
+                written.extend(_write_rows(db, [values]))
+            except DBAPIError as row_error:
+                db.rollback()
+                failed.add(name)
+                report.error(row_number, str(row_error.orig).strip(), name)
+
+    report.upserted += len(written)
+    hooks.products_changed(written)
+    written_names = {row.name for row in written}
+    for name, (row_number, _) in chunk.items():
+        if name not in written_names and name not in failed:
+            report.error(row_number, "Product with this name belongs to another admin.", name)
+
+
+def import_rows(
+    db: Session,
+    rows: Iterable[Tuple[int, Optional[dict], Optional[str]]],
+    admin_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> dict:
+    """
+    Validate rows with ProductCreate and upsert them in chunks of at most MAX_CHUNK_SIZE rows.
+    Invalid rows are reported and skipped; the rest of the import carries on.
+    """
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+    report = ImportReport()
+    # Keyed by name: a later row with the same name replaces the earlier one in the chunk
+    chunk: Dict[str, Tuple[int, dict]] = {}
+
+    for row_number, row, parse_error in rows:
+        report.processed += 1
+        if parse_error:
+            report.error(row_number, parse_error)
+            continue
+        if str(row.get("deleted")).lower() == "true":
+            # Tombstones from an incremental export: deletions are not replayed by import
+            continue
+
+        row = {column: row.get(column) for column in IMPORT_COLUMNS}
+        try:
+            product = schemas.ProductCreate(**row)
+        except ValidationError as e:
+            report.error(row_number, _validation_message(e), row.get("name"))
+            continue
+
+        chunk[product.name] = (row_number, _to_values(product, admin_id))
+        if len(chunk) >= chunk_size:
+            _flush_chunk(db, chunk, report)
+            chunk = {}
+
+    _flush_chunk(db, chunk, report)
+
+    result = report.as_dict()
+    logger.info(
+        f"Product import by admin_id={admin_id}: processed={result['processed']} "
+        f"upserted={result['upserted']} failed={result['failed']} "
+        f"rows_per_second={result['rows_per_second']}"
+    )
+    return result
+
+
+def import_stream(
+    db: Session,
+    stream: IO[bytes],
+    file_format: str,
+    admin_id: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> dict:
+    """
+    Import a CSV or NDJSON byte stream without loading it into memory.
+    """
+    return import_rows(db, READERS[file_format](stream), admin_id, chunk_size)
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    """
+    Guess the import format from a file name.
+    """
+    if not filename:
+        return None
+    lowered = filename.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
@@ -0,0 +1,197 @@
+# Import necessary modules
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.products import hooks, models
+from app.core.config import logger
+
+# Random single-shard attempts before checkout falls back to locking every shard
+_FAST_PATH_ATTEMPTS = 3
+
+# Sharded inventory: for hot products the stock is split across inventory_shards rows
+# so concurrent checkouts lock different rows. products.stock_shards holds the
+# shard count (0 = not sharded). For sharded products the shard rows are the source of
+# truth; products.stock keeps the total as of the last admin write or rebalance (and is
+# set to 0 when checkout drains the product), so SQL filters on stock stay usable.
+
+
+def split_stock(total: int, shards: int) -> List[int]:
+    """
+    Spread a total as evenly as possible, the remainder going to the first shards.
+    """
+    base, extra = divmod(total, shards)
+    return [base + (1 if shard < extra else 0) for shard in range(shards)]
+
+
+def shard_totals(db: Session, product_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Sum of the shards per product (sharded products only).
+    """
+    table = models.InventoryShard.__table__
+    rows = db.execute(
+        select(table.c.product_id, func.sum(table.c.stock))
+        .where(table.c.product_id.in_(list(product_ids)))
+        .group_by(table.c.product_id)
+    ).all()
+    return {product_id: int(total) for product_id, total in rows}
+
+
+def attach_totals(db: Session, products: List[models.Product]) -> List[models.Product]:
+    """
+    Replace the stored stock of sharded products with the live sum of their shards.
+    Costs one query, and only when the list contains a sharded product.
+    """
+    sharded = [product for product in products if product is not None and product.stock_shards]
+    if sharded:
+        totals = shard_totals(db, [product.id for product in sharded])
+        for product in sharded:
+            set_committed_value(product, "stock", totals.get(product.id, 0))
+    return products
+
+
+def reset_shards(db: Session, rows: Iterable) -> None:
+    """
+    After an admin stock write, spread the new stock of every sharded product over its shards.
+    Accepts any objects with id, stock and stock_shards. Does not commit.
+    """
+    table = models.InventoryShard.__table__
+    for row in rows:
+        if not row.stock_shards:
+            continue
+        db.execute(delete(table).where(table.c.product_id == row.id))
+        db.execute(insert(table).values([
+            {"product_id": row.id, "shard": shard, "stock": stock}
+            for shard, stock in enumerate(split_stock(row.stock or 0, row.stock_shards))
+        ]))
+
+
+def configure_shards(db: Session, product_id: int, shards: int, admin_id: int) -> dict:
+    """
+    Enable, rebalance or disable sharding for a product.
+
+    The current total (sum of shards, or products.stock if not sharded) is collapsed and
+    spread evenly over `shards` rows; 0 or 1 turns sharding off and moves the total back
+    into products.stock. Every row involved is locked for the duration.
+    """
+    product = db.query(models.Product).filter(models.Product.id == product_id).with_for_update().first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if product.created_by != admin_id:
+        raise HTTPException(status_code=403, detail="You are not authorized to modify this product.")
+
+    table = models.InventoryShard.__table__
+    total = product.stock or 0
+    if product.stock_shards:
+        locked = db.execute(
+            select(table.c.stock).where(table.c.product_id == product_id).order_by(table.c.shard).with_for_update()
+        ).scalars().all()
+        total = sum(locked)
+
+    product.stock_shards = shards if shards > 1 else 0
+    product.stock = total
+    db.flush()
+    db.execute(delete(table).where(table.c.product_id == product_id))
+    reset_shards(db, [product])
+    db.commit()
+    hooks.stock_changed({product_id: total})
+    logger.info(f"Inventory of product_id={product_id} set to {product.stock_shards} shards (total={total})")
+    return get_inventory(db, product_id)
+
+
+def get_inventory(db: Session, product_id: int) -> dict:
+    """
+    Total stock and per-shard breakdown of a product.
+    """
+    product = db.query(models.Product.id, models.Product.stock, models.Product.stock_shards)\
+                .filter(models.Product.id == product_id).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if not product.stock_shards:
+        return {"product_id": product_id, "total": product.stock or 0, "shards": []}
+
+    table = models.InventoryShard.__table__
+    rows = db.execute(
+        select(table.c.shard, table.c.stock).where(table.c.product_id == product_id).order_by(table.c.shard)
+    ).all()
+    return {
+        "product_id": product_id,
+        "total": sum(row.stock for row in rows),
+        "shards": [{"shard": row.shard, "stock": row.stock} for row in rows],
+    }
+
+
+def deduct(db: Session, product_id: int, quantity: int, held: int = 0) -> Optional[Tuple[List[Tuple[int, int]], int]]:
+    """
+    Take `quantity` units from a sharded product. Returns ([(shard, taken)], remaining total),
+    or None if the shards (minus `held` units reserved by other carts) are short.
+
+    Fast path: one conditional UPDATE on a random shard holding enough stock, so concurrent
+    checkouts spread over different rows. Fallback (no single shard is big enough, or other
+    carts hold stock): lock all shards of the product and take from the largest ones.
+    Does not commit.
+    """
+    table = models.InventoryShard.__table__
+    if not held:
+        for _ in range(_FAST_PATH_ATTEMPTS):
+            candidate = select(table.c.shard)\
+                .where(table.c.product_id == product_id, table.c.stock >= quantity)\
+                .order_by(func.random())\
+                .limit(1)\
+                .scalar_subquery()
+            shard = db.execute(
+                update(table)
+                .where(table.c.product_id == product_id, table.c.shard == candidate, table.c.stock >= quantity)
+                .values(stock=table.c.stock - quantity)
+                .returning(table.c.shard)
+            ).scalar()
+            if shard is not None:
+                return [(shard, quantity)], _remaining(db, product_id)
+            # Either no shard is big enough or another checkout won the race for it
+            if not db.execute(
+                select(func.count()).where(table.c.product_id == product_id, table.c.stock >= quantity)
+            ).scalar():
+                break
+
+    rows = db.execute(
+        select(table.c.shard, table.c.stock).where(table.c.product_id == product_id)
+        .order_by(table.c.shard).with_for_update()
+    ).all()
+    total = sum(row.stock for row in rows)
+    if total - held < quantity:
+        return None
+
+    taken, needed = [], quantity
+    for row in sorted(rows, key=lambda row: -row.stock):
+        if needed == 0:
+            break
+        take = min(row.stock, needed)
+        if take:
+            db.execute(
+                update(table)
+                .where(table.c.product_id == product_id, table.c.shard == row.shard)
+                .values(stock=table.c.stock - take)
+            )
+            taken.append((row.shard, take))
+            needed -= take
+    return taken, total - quantity
+
+
+def restore(db: Session, product_id: int, taken: List[Tuple[int, int]]) -> None:
+    """
+    Give back units taken by deduct (checkout failed on another line). Does not commit.
+    """
+    table = models.InventoryShard.__table__
+    for shard, quantity in taken:
+        db.execute(
+            update(table)
+            .where(table.c.product_id == product_id, table.c.shard == shard)
+            .values(stock=table.c.stock + quantity)
+        )
+
+
+def _remaining(db: Session, product_id: int) -> int:
+    table = models.InventoryShard.__table__
+    return int(db.execute(select(func.coalesce(func.sum(table.c.stock), 0)).where(table.c.product_id == product_id)).scalar())
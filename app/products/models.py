@@ -1,7 +1,19 @@
 # Import necessary modules and classes
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index, PrimaryKeyConstraint, case, func, select
+from datetime import datetime
+from typing import Optional
 from app.core.database import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
+
+
+def normalize_category(value: Optional[str]) -> Optional[str]:
+    """
+    Canonical form used for exact category matching: trimmed, single-spaced, lower case.
+    """
+    if value is None:
+        return None
+    return " ".join(value.split()).lower() or None
+
 
 # Product model that represents the products in the e-commerce system
 class Product(Base):
@@ -14,10 +26,60 @@ class Product(Base):
     price = Column(Float, nullable=False)
     stock = Column(Integer, default=0)
     category = Column(String)
+    category_key = Column(String)
     image_url = Column(String)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Number of inventory_shards rows holding this product's stock (0 = stock lives in this row)
+    stock_shards = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     creator = relationship("User", back_populates="products")
 
-    
+    # Composite indexes covering the public filter + sort combinations (id is the keyset tie-breaker)
+    __table_args__ = (
+        Index("ix_products_category_key_price", "category_key", "price", "id"),
+        Index("ix_products_category_key_name", "category_key", "name", "id"),
+        Index("ix_products_category_key_stock", "category_key", "stock", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_stock_id", "stock", "id"),
+    )
+
+    @validates("category")
+    def _sync_category_key(self, key, value):
+        self.category_key = normalize_category(value)
+        return value
+
+
+# One sub-counter of a sharded product's stock (see app/products/inventory.py)
+class InventoryShard(Base):
+    __tablename__ = "inventory_shards"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    shard = Column(Integer, nullable=False)
+    stock = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("product_id", "shard"),
+    )
+
+
+# Deleted product ids, so incremental catalog exports can tell consumers to drop them
+class ProductDeletion(Base):
+    __tablename__ = "product_deletions"
+
+    product_id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+def live_stock():
+    """
+    Current stock as a column expression labelled "stock": the sum of the shards for
+    sharded products, products.stock otherwise. Use it in place of Product.stock when
+    selecting columns for display (exports, facets, checkout pre-checks).
+    """
+    shards = InventoryShard.__table__
+    total = select(func.coalesce(func.sum(shards.c.stock), 0))\
+        .where(shards.c.product_id == Product.id)\
+        .scalar_subquery()
+    return case((Product.stock_shards > 0, total), else_=Product.stock).label("stock")
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List, Optional, Union, Dict
+from typing import Callable, List, Optional, Union, Dict
 
 from app.core.database import get_db
 from app.utils.oauth2 import get_admin_user
-from app.products import schemas, crud
+from app.products import schemas, crud, importer, exporter, inventory
+from app.products import cache as product_cache
 from app.core.config import logger
+from app.utils.etag import TaggedBody, etag_response
 from app.products.models import Product
+from app.products.suggest import MAX_SUGGESTIONS
 
 router = APIRouter(prefix="/admin/products", tags=["Admin - Products"])
 public_router = APIRouter(prefix="/products", tags=["Public - Products"])
 
+product_list_adapter = TypeAdapter(List[schemas.BasicProductOut])
+
 
 # ------------------ ADMIN ROUTES ------------------
 
@@ -28,20 +37,81 @@ def create_product(
     return {"message": "Product created successfully."}
 
 
-@router.get("/all", response_model=List[schemas.ProductOut])
+@router.post("/import", response_model=schemas.ImportReport)
+def import_products(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, enum=["csv", "ndjson"]),
+    chunk_size: int = Query(importer.DEFAULT_CHUNK_SIZE, ge=1, le=importer.MAX_CHUNK_SIZE),
+    db: Session = Depends(get_db),
+    admin=Depends(get_admin_user)
+) -> dict:
+    """
+    Admin-only: Bulk upsert products from a CSV or NDJSON upload, matched on name.
+    Rows are validated and written in chunks; invalid rows are reported without aborting the import.
+    """
+    file_format = format or importer.detect_format(file.filename)
+    if not file_format:
+        raise HTTPException(status_code=400, detail="Unknown file format. Use a .csv or .ndjson file or pass format.")
+    logger.info(f"Product import ({file_format}) started by admin_id={admin.id}: {file.filename}")
+    return importer.import_stream(db, file.file, file_format, admin.id, chunk_size)
+
+
+@router.get("/all", response_model=Union[List[schemas.ProductOut], schemas.AdminProductPage])
 def list_products(
     db: Session = Depends(get_db),
     admin=Depends(get_admin_user),
     skip: int = 0,
-    limit: int = 10
-) -> List[schemas.ProductOut]:
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> Union[List[schemas.ProductOut], Dict]:
     """
     Admin-only: Get paginated list of products.
+    Pass `cursor` (empty for the first page) to page by keyset and receive `next_cursor`.
     """
     logger.info(f"Product list requested by admin_id={admin.id}")
+    if cursor is not None:
+        products, next_cursor = crud.list_products_keyset(db, cursor, limit)
+        return {"items": products, "next_cursor": next_cursor}
     return crud.list_products(db, skip, limit)
 
 
+@router.get("/cache/stats")
+def product_cache_stats(admin=Depends(get_admin_user)) -> dict:
+    """
+    Admin-only: Hit/miss/eviction counters of the public catalog cache.
+    """
+    return product_cache.cache_stats()
+
+
+@router.get("/export")
+def export_products(
+    format: str = Query("ndjson", enum=["ndjson", "csv"]),
+    since: Optional[datetime] = None,
+    gzip: bool = False,
+    admin=Depends(get_admin_user)
+) -> StreamingResponse:
+    """
+    Admin-only: Stream the whole catalog (or products changed since `since`, followed by
+    tombstones for products deleted since) as NDJSON or CSV.
+    The X-Export-Started-At header is the `since` value to use for the next incremental export.
+    """
+    started_at = datetime.utcnow()
+    logger.info(f"Catalog export ({format}, since={since}, gzip={gzip}) requested by admin_id={admin.id}")
+    filename = f"catalog-{started_at:%Y%m%dT%H%M%S}.{format}"
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        exporter.iter_catalog(format, since, gzip),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Started-At": started_at.isoformat(),
+        },
+    )
+
+
 @router.get("/{product_id}", response_model=schemas.ProductOut)
 def get_product(
     product_id: int,
@@ -76,6 +146,47 @@ def update_product(
     }
 
 
+@router.patch("/bulk", response_model=schemas.BulkUpdateResponse)
+def bulk_update_products(
+    patches: List[schemas.ProductPatch],
+    db: Session = Depends(get_db),
+    admin=Depends(get_admin_user)
+) -> dict:
+    """
+    Admin-only: Update price and/or stock of many products at once.
+    Each id gets its own outcome (200, 403 if created by another admin, 404 if missing).
+    """
+    logger.info(f"Bulk update of {len(patches)} products requested by admin_id={admin.id}")
+    return crud.bulk_update_products(db, patches, admin.id)
+
+
+@router.get("/{product_id}/inventory", response_model=schemas.InventoryOut)
+def get_product_inventory(
+    product_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(get_admin_user)
+) -> dict:
+    """
+    Admin-only: Total stock of a product and, if sharded, its per-shard breakdown.
+    """
+    return inventory.get_inventory(db, product_id)
+
+
+@router.put("/{product_id}/inventory", response_model=schemas.InventoryOut)
+def configure_product_inventory(
+    product_id: int,
+    data: schemas.InventoryShardsIn,
+    db: Session = Depends(get_db),
+    admin=Depends(get_admin_user)
+) -> dict:
+    """
+    Admin-only: Split a hot product's stock over N shard rows, rebalance the shards evenly
+    (same N), or turn sharding off (0 or 1).
+    """
+    logger.info(f"Inventory shards for product_id={product_id} set to {data.shards} by admin_id={admin.id}")
+    return inventory.configure_shards(db, product_id, data.shards, admin.id)
+
+
 @router.delete("/delete/{product_id}", response_model=Dict[str, str])
 def delete_product(
     product_id: int,
@@ -92,46 +203,114 @@ def delete_product(
 
 # ------------------ PUBLIC ROUTES ------------------
 
-@public_router.get("/", response_model=Union[List[schemas.BasicProductOut], schemas.MessageResponse])
+def _cached_json(request: Request, cache, key, build: Callable[[], bytes]) -> Response:
+    """
+    Serve a pre-serialized body from the cache (building it on a miss) with ETag revalidation.
+    """
+    tagged = cache.get(key)
+    if tagged is None:
+        tagged = cache.set(key, TaggedBody.from_body(build()))
+    return etag_response(request, tagged)
+
+
+@public_router.get(
+    "/",
+    response_model=Union[List[schemas.BasicProductOut], schemas.ProductPage, schemas.MessageResponse]
+)
 def public_product_list(
+    request: Request,
     db: Session = Depends(get_db),
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     sort_by: Optional[str] = Query("price", enum=["price", "name", "stock"]),
     page: int = 1,
-    page_size: int = 10
-) -> Union[List[schemas.BasicProductOut], Dict[str, str]]:
+    page_size: int = 10,
+    cursor: Optional[str] = None
+) -> Response:
     """
     Public: Filter and list products based on category, price range, and sorting.
+    Pass `cursor` (empty for the first page) to page by keyset and receive `next_cursor`.
     """
     logger.info("Public product list requested")
-    products = crud.filter_public_products(db, category, min_price, max_price, sort_by, page, page_size)
-    if not products:
-        return {"message": "No products found matching your criteria."}
-    return products
+
+    def build() -> bytes:
+        if cursor is not None:
+            products, next_cursor = crud.filter_public_products_keyset(
+                db, category, min_price, max_price, sort_by, cursor, page_size
+            )
+            payload = schemas.ProductPage.model_validate({"items": products, "next_cursor": next_cursor})
+            return payload.model_dump_json().encode()
+        products = crud.filter_public_products(db, category, min_price, max_price, sort_by, page, page_size)
+        if not products:
+            return json.dumps({"message": "No products found matching your criteria."}).encode()
+        return product_list_adapter.dump_json(product_list_adapter.validate_python(products))
+
+    key = product_cache.listing_key(category, min_price, max_price, sort_by, page, page_size, cursor)
+    return _cached_json(request, product_cache.listing_cache, key, build)
+
+
+@public_router.get("/facets", response_model=schemas.FacetsOut)
+def product_facets(
+    db: Session = Depends(get_db),
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+) -> dict:
+    """
+    Public: Category counts and price histogram for the same filters as the product list.
+    Served from in-memory aggregates; `as_of` is the time of the last full rebuild.
+    """
+    logger.info("Public product facets requested")
+    return crud.get_facets(db, category, min_price, max_price)
+
+
+@public_router.get("/suggest", response_model=List[schemas.SuggestionOut])
+def suggest_products(
+    q: str,
+    db: Session = Depends(get_db),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)
+) -> List[dict]:
+    """
+    Public: Type-ahead suggestions for product names and categories starting with `q`.
+    """
+    return crud.suggest_products(db, q, limit)
 
 
 @public_router.get("/search", response_model=Union[List[schemas.BasicProductOut], schemas.MessageResponse])
-def search_products(keyword: str, db: Session = Depends(get_db)) -> Union[List[schemas.BasicProductOut], Dict[str, str]]:
+def search_products(
+    request: Request,
+    keyword: str,
+    db: Session = Depends(get_db),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=100)
+) -> Response:
     """
-    Public: Search products by name or description or category.
+    Public: Search products by name or description or category, best matches first.
     """
-    logger.info(f"Public search for keyword='{keyword}'")
-    products = crud.search_products(db, keyword)
-    if not products:
-        return {"message": f"No products found for '{keyword}'."}
-    return products
+    logger.info(f"Public search for keyword='{keyword}' page={page}")
+
+    def build() -> bytes:
+        products = crud.search_products(db, keyword, page, page_size)
+        if not products:
+            return json.dumps({"message": f"No products found for '{keyword}'."}).encode()
+        return product_list_adapter.dump_json(product_list_adapter.validate_python(products))
+
+    key = product_cache.search_key(keyword, page, page_size)
+    return _cached_json(request, product_cache.listing_cache, key, build)
 
 
 @public_router.get("/{id}", response_model=schemas.BasicProductOut)
-def public_product_detail(id: int, db: Session = Depends(get_db)) -> schemas.BasicProductOut:
+def public_product_detail(request: Request, id: int, db: Session = Depends(get_db)) -> Response:
     """
     Public: Get product details by ID.
     """
     logger.info(f"Public product detail requested for id={id}")
-    product = crud.get_product_by_id(db, id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
 
+    def build() -> bytes:
+        product = crud.get_product_by_id(db, id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return schemas.BasicProductOut.model_validate(product).model_dump_json().encode()
+
+    return _cached_json(request, product_cache.detail_cache, id, build)
@@ -1,7 +1,8 @@
 # Import necessary modules and classes
 from pydantic import BaseModel, HttpUrl, condecimal, conint, Field
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
+from datetime import datetime
 
 # Schemas for product operations in e-commerce application
 class ProductCreate(BaseModel):
@@ -29,6 +30,34 @@ class ProductOut(ProductCreate):
     class Config:
         from_attributes = True
 
+class ProductPatch(BaseModel):
+    id: int
+    price: Optional[Decimal] = Field(None, gt=0)
+    stock: Optional[int] = Field(None, ge=0)
+
+class ProductPatchResult(BaseModel):
+    id: int
+    status_code: int
+    message: str
+
+class BulkUpdateResponse(BaseModel):
+    updated: int
+    failed: int
+    results: List[ProductPatchResult]
+
+class InventoryShardsIn(BaseModel):
+    # 0 or 1 turns sharding off
+    shards: int = Field(..., ge=0, le=64)
+
+class InventoryShardOut(BaseModel):
+    shard: int
+    stock: int
+
+class InventoryOut(BaseModel):
+    product_id: int
+    total: int
+    shards: List[InventoryShardOut]
+
 class ProductUpdateResponse(BaseModel):
     message: str
     product: ProductOut
@@ -36,6 +65,14 @@ class ProductUpdateResponse(BaseModel):
 class MessageResponse(BaseModel):
     message: str
 
+class ProductPage(BaseModel):
+    items: List[BasicProductOut]
+    next_cursor: Optional[str] = None
+
+class AdminProductPage(BaseModel):
+    items: List[ProductOut]
+    next_cursor: Optional[str] = None
+
 class ProductOutOrders(BaseModel):
     name: str
     description: Optional[str]
@@ -51,3 +88,38 @@ class PublicProductOut(ProductOutOrders):
     class Config:
         from_attributes = True
 
+
+class ImportRowError(BaseModel):
+    row: int
+    name: Optional[str] = None
+    error: str
+
+class ImportReport(BaseModel):
+    processed: int
+    upserted: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
+    elapsed_seconds: float
+    rows_per_second: float
+
+class CategoryFacet(BaseModel):
+    category: Optional[str]
+    count: int
+    in_stock: int
+
+class PriceBucketFacet(BaseModel):
+    min: float
+    max: Optional[float]
+    count: int
+
+class FacetsOut(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    price_buckets: List[PriceBucketFacet]
+    as_of: Optional[datetime]
+
+class SuggestionOut(BaseModel):
+    text: str
+    type: str
+    product_id: Optional[int] = None
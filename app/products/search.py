@@ -0,0 +1,132 @@
+# Import necessary modules
+import re
+from typing import List
+from sqlalchemy import Float, Integer, bindparam, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.products import models
+from app.core.config import logger
+
+# Postgres keeps a weighted tsvector column on products (GIN indexed), created and kept
+# current by a trigger from the Alembic migrations. SQLite keeps an FTS5 shadow table
+# keyed by product id (rowid), created at startup and maintained by the write paths.
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """
+    Create and fill the SQLite FTS5 table if it is missing. Safe to call on every startup.
+
+    On PostgreSQL nothing is altered or backfilled here (that would rewrite the table under
+    the startup lock): the search_vector column, its index and trigger come from
+    `alembic upgrade head`, and a missing column is only reported.
+    """
+    with engine.begin() as conn:
+        if _dialect(conn) == "postgresql":
+            exists = conn.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'products' AND column_name = 'search_vector'"
+            )).first()
+            if not exists:
+                logger.error("products.search_vector is missing, product search will fail: run `alembic upgrade head`")
+        elif _dialect(conn) == "sqlite":
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+            )).first()
+            if not exists:
+                conn.execute(text(
+                    "CREATE VIRTUAL TABLE products_fts USING fts5("
+                    "name, category, description, tokenize = 'porter unicode61')"
+                ))
+                conn.execute(text(
+                    "INSERT INTO products_fts (rowid, name, category, description) "
+                    "SELECT id, name, coalesce(category, ''), coalesce(description, '') FROM products"
+                ))
+                logger.info("Created products_fts search index")
+
+
+def index_products(db: Session, product_ids: List[int]) -> None:
+    """
+    (Re)index the given products. Runs inside the caller's transaction.
+    On Postgres the products_search_vector trigger already did it when the row was written.
+    """
+    if not product_ids:
+        return
+    params = {"ids": list(product_ids)}
+    if _dialect(db.get_bind()) == "sqlite":
+        stmt = text("DELETE FROM products_fts WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True))
+        db.execute(stmt, params)
+        stmt = text(
+            "INSERT INTO products_fts (rowid, name, category, description) "
+            "SELECT id, name, coalesce(category, ''), coalesce(description, '') FROM products WHERE id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True))
+        db.execute(stmt, params)
+
+
+def index_product(db: Session, product: models.Product) -> None:
+    """
+    (Re)index a single product. The product must already be flushed.
+    """
+    index_products(db, [product.id])
+
+
+def remove_product(db: Session, product_id: int) -> None:
+    """
+    Drop a product from the index. On Postgres the vector goes away with the row.
+    """
+    if _dialect(db.get_bind()) == "sqlite":
+        db.execute(text("DELETE FROM products_fts WHERE rowid = :id"), {"id": product_id})
+
+
+def _fts5_query(keyword: str) -> str:
+    """
+    Quote every token so user input can never be parsed as FTS5 syntax.
+    """
+    return " ".join(f'"{token}"' for token in _TOKEN_RE.findall(keyword))
+
+
+def search(db: Session, keyword: str, page: int = 1, page_size: int = 10) -> List[models.Product]:
+    """
+    Return one page of products matching the keyword, best match first.
+    """
+    offset = (page - 1) * page_size
+    dialect = _dialect(db.get_bind())
+
+    if dialect == "postgresql":
+        ranked = text(
+            "SELECT id, ts_rank_cd(search_vector, q) AS rank "
+            "FROM products, websearch_to_tsquery('english', :kw) AS q "
+            "WHERE search_vector @@ q "
+            "ORDER BY rank DESC, id LIMIT :limit OFFSET :offset"
+        ).bindparams(kw=keyword, limit=page_size, offset=offset)
+        order = "desc"
+    elif dialect == "sqlite":
+        match = _fts5_query(keyword)
+        if not match:
+            return []
+        ranked = text(
+            "SELECT rowid AS id, bm25(products_fts, 10.0, 5.0, 1.0) AS rank "
+            "FROM products_fts WHERE products_fts MATCH :kw "
+            "ORDER BY rank, rowid LIMIT :limit OFFSET :offset"
+        ).bindparams(kw=match, limit=page_size, offset=offset)
+        order = "asc"
+    else:
+        pattern = f"%{keyword}%"
+        return db.query(models.Product).filter(
+            models.Product.name.ilike(pattern) |
+            models.Product.description.ilike(pattern) |
+            models.Product.category.ilike(pattern)
+        ).order_by(models.Product.id).offset(offset).limit(page_size).all()
+
+    ranked = ranked.columns(id=Integer, rank=Float).subquery("ranked")
+    rank = ranked.c.rank.desc() if order == "desc" else ranked.c.rank.asc()
+    return db.query(models.Product)\
+             .join(ranked, models.Product.id == ranked.c.id)\
+             .order_by(rank, models.Product.id)\
+             .all()
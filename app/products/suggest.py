@@ -0,0 +1,158 @@
+# Import necessary modules
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.products import models
+from app.products.models import normalize_category
+from app.core.config import logger
+
+# load environment variables from .env file
+load_dotenv()
+
+# Full rebuild interval, which also picks up writes made by other worker processes
+SUGGEST_REFRESH_SECONDS = float(os.getenv("SUGGEST_REFRESH_SECONDS", "300"))
+MAX_SUGGESTIONS = 20
+# Upper bound on entries inspected per lookup, keeps latency flat for short prefixes
+_SCAN_FACTOR = 8
+
+# Entry kinds, also their display order
+CATEGORY, NAME, WORD = 0, 1, 2
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _name_terms(name: str) -> List[Tuple[str, int]]:
+    """
+    The full name plus every suffix starting at a word, so "pro" finds "iPhone 15 Pro".
+    """
+    words = _normalize(name).split()
+    return [(" ".join(words[i:]), NAME if i == 0 else WORD) for i in range(len(words))]
+
+
+class SuggestIndex:
+    """
+    Sorted-array prefix index over product names and categories for type-ahead.
+
+    Lookups are a bisect plus a bounded forward scan. Product writes made through
+    this process patch the index after commit; writes from other workers appear
+    after the next full rebuild (SUGGEST_REFRESH_SECONDS).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        # (term, kind, label, product id or None) kept sorted
+        self._entries: List[Tuple[str, int, str, Optional[int]]] = []
+        self._by_product: Dict[int, Tuple[List[tuple], Optional[str]]] = {}
+        self._category_refs: Dict[str, int] = {}
+        self._category_entries: Dict[str, tuple] = {}
+
+    def ensure_loaded(self, db: Session) -> None:
+        """
+        Rebuild from the database on first use and whenever the refresh interval has passed.
+        """
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < SUGGEST_REFRESH_SECONDS:
+            return
+        rows = db.query(models.Product.id, models.Product.name, models.Product.category).all()
+        with self._lock:
+            self._entries = []
+            self._by_product.clear()
+            self._category_refs.clear()
+            self._category_entries.clear()
+            for row in rows:
+                self._add(row.id, row.name, row.category, bulk=True)
+            self._entries.sort()
+            self._loaded_at = time.monotonic()
+        logger.info(f"Suggest index rebuilt from {len(rows)} products")
+
+    def upsert(self, product) -> None:
+        """
+        Add or replace a product. Accepts any object with id, name and category.
+        """
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self._remove(product.id)
+            self._add(product.id, product.name, product.category)
+
+    def discard(self, product_id: int) -> None:
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self._remove(product_id)
+
+    def _insert(self, entry: tuple, bulk: bool) -> None:
+        if bulk:
+            self._entries.append(entry)
+        else:
+            insort(self._entries, entry)
+
+    def _delete(self, entry: tuple) -> None:
+        index = bisect_left(self._entries, entry)
+        if index < len(self._entries) and self._entries[index] == entry:
+            del self._entries[index]
+
+    def _add(self, product_id: int, name: str, category: Optional[str], bulk: bool = False) -> None:
+        entries = [(term, kind, name, product_id) for term, kind in _name_terms(name)]
+        for entry in entries:
+            self._insert(entry, bulk)
+
+        category_key = normalize_category(category)
+        if category_key:
+            self._category_refs[category_key] = self._category_refs.get(category_key, 0) + 1
+            if category_key not in self._category_entries:
+                entry = (category_key, CATEGORY, category.strip(), None)
+                self._category_entries[category_key] = entry
+                self._insert(entry, bulk)
+        self._by_product[product_id] = (entries, category_key)
+
+    def _remove(self, product_id: int) -> None:
+        entries, category_key = self._by_product.pop(product_id, ([], None))
+        for entry in entries:
+            self._delete(entry)
+        if category_key:
+            self._category_refs[category_key] -= 1
+            if self._category_refs[category_key] == 0:
+                del self._category_refs[category_key]
+                self._delete(self._category_entries.pop(category_key))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """
+        Up to `limit` distinct categories and product names starting with the prefix.
+        Categories come first, then names matching from their first word, then mid-name matches.
+        """
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        found = {}
+        with self._lock:
+            index = bisect_left(self._entries, (prefix,))
+            end = min(len(self._entries), index + limit * _SCAN_FACTOR)
+            while index < end:
+                term, kind, label, product_id = self._entries[index]
+                if not term.startswith(prefix):
+                    break
+                key = (kind == CATEGORY, product_id if product_id is not None else label)
+                if key not in found or kind < found[key][0]:
+                    found[key] = (kind, label, product_id)
+                index += 1
+
+        ranked = sorted(found.values(), key=lambda item: (item[0], len(item[1]), item[1]))[:limit]
+        return [
+            {
+                "text": label,
+                "type": "category" if kind == CATEGORY else "product",
+                "product_id": product_id,
+            }
+            for kind, label, product_id in ranked
+        ]
+
+
+suggest_index = SuggestIndex()
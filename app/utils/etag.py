@@ -0,0 +1,70 @@
+# Import necessary libraries and modules
+import hashlib
+from typing import NamedTuple, Optional
+from fastapi import Request, Response, status
+
+
+class TaggedBody(NamedTuple):
+    """
+    A serialized JSON body together with its strong ETag.
+    """
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "TaggedBody":
+        return cls(body, make_etag(body))
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Build a strong ETag from the content hash of a response body.
+
+    Args:
+        body (bytes): The serialized response body.
+
+    Returns:
+        str: The quoted ETag value.
+    """
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires).
+
+    Args:
+        if_none_match (str | None): Raw header value from the request.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the client's copy is still current.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def etag_response(request: Request, tagged: TaggedBody) -> Response:
+    """
+    Return 304 Not Modified when the client already holds this body, otherwise the JSON body.
+
+    Args:
+        request (Request): The incoming request.
+        tagged (TaggedBody): The serialized body and its ETag.
+
+    Returns:
+        Response: Either an empty 304 or a 200 JSON response, both carrying the ETag.
+    """
+    headers = {"ETag": tagged.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), tagged.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=tagged.body, media_type="application/json", headers=headers)
@@ -0,0 +1,42 @@
+# Import necessary libraries and modules
+import base64
+import json
+from typing import Any, Dict
+from fastapi import HTTPException, status
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """
+    Encode a keyset position into an opaque, URL-safe cursor string.
+
+    Args:
+        payload (dict): JSON-serializable position (sort key values and tie-breaker id).
+
+    Returns:
+        str: The encoded cursor.
+    """
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The opaque cursor received from the client.
+
+    Returns:
+        dict: The decoded keyset position.
+
+    Raises:
+        HTTPException: If the cursor is malformed, raises a 400 Bad Request.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    return payload
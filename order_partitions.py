@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+from datetime import date, datetime
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.orders import partitions
+
+
+def _month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Maintain the monthly partitions of orders and order_items (PostgreSQL, ORDERS_PARTITIONING)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="Create partitions for the current month and the months ahead.")
+    create.add_argument("--months-ahead", type=int, default=partitions.PARTITION_MONTHS_AHEAD,
+                        help="Future months to create in advance.")
+    create.add_argument("--move-default-rows", action="store_true",
+                        help="Move rows of a missing month out of the default partition so it can be created.")
+    commands.add_parser("list", help="List the partitions of orders and order_items.")
+    archive = commands.add_parser("archive", help="Export months before --before to gzip NDJSON, then drop them.")
+    archive.add_argument("--before", type=_month, required=True, help="First month to keep (YYYY-MM).")
+    archive.add_argument("--dir", default=partitions.ORDER_ARCHIVE_DIR, help="Directory for the archive files.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with engine.connect() as conn:
+        if not partitions.is_partitioned(conn):
+            print("❌ orders is not partitioned. Set ORDERS_PARTITIONING=true and run the Alembic migration first.")
+            return 1
+
+    if args.command == "create":
+        created = partitions.ensure_partitions(engine, args.months_ahead, args.move_default_rows)
+        print(f"✅ Created {len(created)} partitions" + (f": {', '.join(created)}" if created else "."))
+        with engine.connect() as conn:
+            stray = {table: partitions.default_rows(conn, table) for table in partitions.PARTITIONED_TABLES}
+        if any(stray.values()):
+            print(f"⚠️  Rows in the default partitions: {stray}")
+    elif args.command == "list":
+        with engine.connect() as conn:
+            for table in partitions.PARTITIONED_TABLES:
+                for partition in partitions.list_partitions(conn, table):
+                    # Planner estimate: exact counts would scan every partition
+                    rows = conn.execute(
+                        text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name"), {"name": partition.name}
+                    ).scalar()
+                    bounds = f"{partition.start:%Y-%m-%d} .. {partition.end:%Y-%m-%d}" if partition.start else "default"
+                    print(f"{partition.name:<28} {bounds:<26} ~{max(rows, 0)} rows")
+    else:
+        for report in partitions.archive_before(engine, args.before, args.dir):
+            print("✅ " + json.dumps(report))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import argparse
+import json
+import sys
+from datetime import date
+
+from app.core.database import SessionLocal
+from app.analytics import rollup
+
+# Importing the models registers every table the rollup queries join
+import app.auth.models  # noqa: F401
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Maintain the sales rollup tables behind /admin/analytics."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill", help="Rebuild the rollups from orders (default: first paid order to yesterday).")
+    check = commands.add_parser("check", help="Compare the rollups with orders (default: first paid order to today).")
+    for command in (backfill, check):
+        command.add_argument("--start", type=date.fromisoformat, help="First day (YYYY-MM-DD, UTC).")
+        command.add_argument("--end", type=date.fromisoformat, help="Last day, inclusive (YYYY-MM-DD, UTC).")
+    check.add_argument("--fix", action="store_true", help="Rebuild the days that do not match.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db = SessionLocal()
+
+    try:
+        if args.command == "backfill":
+            report = rollup.backfill(db, args.start, args.end)
+            print(f"✅ Rebuilt {report['days']} days: {report['orders']} paid orders, "
+                  f"{report['product_rows']} product rows.")
+            return 0
+
+        report = rollup.check(db, args.start, args.end, args.fix)
+        if not report["mismatches"]:
+            print(f"✅ Rollups match the orders for all {report['days']} days.")
+            return 0
+        print(f"⚠️  {len(report['mismatches'])} mismatched rows on {len(report['mismatched_days'])} of {report['days']} days:")
+        for mismatch in report["mismatches"]:
+            print("   " + json.dumps(mismatch))
+        if report["fixed_days"]:
+            print(f"✅ Rebuilt {', '.join(report['fixed_days'])}.")
+        return 0 if len(report["fixed_days"]) == len(report["mismatched_days"]) else 1
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,68 +1,89 @@
+import argparse
+import json
+
 from app.core.database import SessionLocal
-from app.products.models import Product
-from sqlalchemy.exc import IntegrityError
-from app.products.models import Product
 from app.auth.models import User
+from app.products import importer
+
+SAMPLE_PRODUCTS = [
+    {
+        "name": "iPhone 15 Pro Max",
+        "category": "Mobile",
+        "price": 139999.0,
+        "stock": 25,
+        "description": "Latest Apple flagship with A17 chip",
+        "image_url": "https://example.com/images/iphone15.jpg",
+    },
+    {
+        "name": "MacBook Air M3",
+        "category": "Laptop",
+        "price": 124999.0,
+        "stock": 20,
+        "description": "Apple's lightweight laptop with M3 chip",
+        "image_url": "https://example.com/images/macbook-air.jpg",
+    },
+    {
+        "name": "Samsung Galaxy S24",
+        "category": "Mobile",
+        "price": 99999.0,
+        "description": "Samsung's top-tier Android phone",
+        "stock": 40,
+        "image_url": "https://example.com/images/s24.jpg",
+    },
+    {
+        "name": "Sony WH-1000XM5",
+        "category": "Headphones",
+        "price": 29999.0,
+        "description": "Industry-leading noise-canceling headphones",
+        "stock": 15,
+        "image_url": "https://example.com/images/sony-headphones.jpg",
+    },
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Seed sample products, or bulk import a CSV/NDJSON catalog (upsert on product name)."
+    )
+    parser.add_argument("path", nargs="?", help="CSV or NDJSON file to import. Omit to seed sample products.")
+    parser.add_argument("--format", choices=sorted(importer.READERS), help="Input format (default: from file extension).")
+    parser.add_argument("--admin-email", help="Admin who will own the products (default: first admin).")
+    parser.add_argument("--chunk-size", type=int, default=importer.DEFAULT_CHUNK_SIZE, help=f"Rows per transaction (at most {importer.MAX_CHUNK_SIZE}).")
+    return parser.parse_args()
+
 
 def seed_products():
+    args = parse_args()
     db = SessionLocal()
 
-    admin = db.query(User).filter(User.role == "admin").first()
-    if not admin:
-        print("❌ No admin found. Please create an admin user before seeding products.")
-        return
+    try:
+        query = db.query(User).filter(User.role == "admin")
+        if args.admin_email:
+            query = query.filter(User.email == args.admin_email)
+        admin = query.first()
+        if not admin:
+            print("❌ No admin found. Please create an admin user before seeding products.")
+            return
 
-    sample_products = [
-        Product(
-            name="iPhone 15 Pro Max",
-            category="Mobile",
-            price=139999.0,
-            stock=25,
-            description="Latest Apple flagship with A17 chip",
-            image_url="https://example.com/images/iphone15.jpg",
-            created_by=admin.id  
-        ),
-        Product(
-            name="MacBook Air M3",
-            category="Laptop",
-            price=124999.0,
-            stock=20,
-            description="Apple's lightweight laptop with M3 chip",
-            image_url="https://example.com/images/macbook-air.jpg",
-            created_by=admin.id
-        ),
-            Product(
-            name="Samsung Galaxy S24",
-            category="Mobile",
-            price=99999.0,
-            description="Samsung's top-tier Android phone",
-            stock=40,
-            image_url="https://example.com/images/s24.jpg",
-            created_by=admin.id
-        ),
-        Product(
-            name="Sony WH-1000XM5",
-            category="Headphones",
-            price=29999.0,
-            description="Industry-leading noise-canceling headphones",
-            stock=15,
-            image_url="https://example.com/images/sony-headphones.jpg",
-            created_by=admin.id
-        ), 
-    ]
+        if args.path:
+            file_format = args.format or importer.detect_format(args.path)
+            if not file_format:
+                print("❌ Unknown file format. Use a .csv or .ndjson file or pass --format.")
+                return
+            with open(args.path, "rb") as stream:
+                report = importer.import_stream(db, stream, file_format, admin.id, args.chunk_size)
+        else:
+            rows = ((number, row, None) for number, row in enumerate(SAMPLE_PRODUCTS, start=1))
+            report = importer.import_rows(db, rows, admin.id, args.chunk_size)
 
-    try:
-        db.add_all(sample_products)
-        db.commit()
-        print("✅ Sample products seeded successfully.")
-    except IntegrityError:
-        db.rollback()
-        print("⚠️  Duplicate entries or foreign key error.")
+        print(f"✅ Imported {report['upserted']} of {report['processed']} rows "
+              f"in {report['elapsed_seconds']}s ({report['rows_per_second']} rows/sec).")
+        if report["failed"]:
+            print(f"⚠️  {report['failed']} rows failed:")
+            for error in report["errors"]:
+                print("   " + json.dumps(error))
     finally:
         db.close()
 
 if __name__ == "__main__":
     seed_products()
-
-
-    
\ No newline at end of file
@@ -0,0 +1,91 @@
+# Import necessary modules
+import itertools
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway SQLite database before it is imported
+_DB_DIR = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("EMAIL_PORT", "587")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.auth.models import User  # noqa: E402
+from app.core.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.products.models import Product  # noqa: E402
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _signup(client, role):
+    email = f"{role}{next(_ids)}@example.com"
+    client.post("/auth/signup", json={"name": "Test", "email": email, "password": "Passw0rd!x", "role": role})
+    response = client.post("/auth/signin", data={"username": email, "password": "Passw0rd!x"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    return _signup(client, "admin")
+
+
+@pytest.fixture
+def user_headers(client):
+    """
+    A fresh user per test, so carts and orders do not leak between tests.
+    """
+    return _signup(client, "user")
+
+
+@pytest.fixture
+def user_headers_factory(client):
+    """
+    Sign up as many fresh users as a test needs.
+    """
+    return lambda: _signup(client, "user")
+
+
+@pytest.fixture
+def user_id(db):
+    """
+    A fresh user row for tests that call crud/store functions directly.
+    """
+    user = User(name="Test", email=f"direct{next(_ids)}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def make_product(client, admin_headers, db):
+    """
+    Create a product through the admin API and return its id.
+    """
+    def make(price=10.0, stock=10, category="Tests"):
+        name = f"Product {next(_ids)}"
+        response = client.post("/admin/products/add", headers=admin_headers, json={
+            "name": name, "price": price, "stock": stock, "category": category,
+            "description": "", "image_url": "https://example.com/p.jpg",
+        })
+        assert response.status_code == 201, response.text
+        return db.query(Product.id).filter(Product.name == name).scalar()
+    return make
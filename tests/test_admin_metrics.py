@@ -0,0 +1,14 @@
+def test_retry_metrics_are_admin_only(client, admin_headers, user_headers):
+    response = client.get("/admin/metrics/retries", headers=admin_headers)
+
+    assert response.status_code == 200, response.text
+    assert set(response.json()) == {"totals", "operations"}
+    assert client.get("/admin/metrics/retries", headers=user_headers).status_code == 403
+
+
+def test_order_cache_metrics_are_admin_only(client, admin_headers, user_headers):
+    response = client.get("/admin/metrics/order-cache", headers=admin_headers)
+
+    assert response.status_code == 200, response.text
+    assert {"size", "hits", "misses", "hit_ratio"} <= set(response.json())
+    assert client.get("/admin/metrics/order-cache", headers=user_headers).status_code == 403
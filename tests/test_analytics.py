@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.analytics import crud, rollup
+from app.analytics.models import SalesDaily, SalesDailyProduct
+
+
+def test_product_rollup_is_sharded_and_summed(db):
+    day = date(2020, 1, 1)
+    item = {"product_id": 42, "product_name": "Hot", "category_key": "hot", "quantity": 2, "price_at_purchase": 5.0}
+    orders = [{"id": order_id, "created_at": datetime(2020, 1, 1, 12), "items": [item]} for order_id in (1, 2, 3)]
+
+    rollup.record_sales(db, orders)
+    rollup.record_sales(db, orders[:1])
+    db.commit()
+
+    shards = db.query(SalesDailyProduct.shard).filter(SalesDailyProduct.day == day).all()
+    assert len(shards) == 3
+    [report] = crud.get_revenue_by_product(db, day, day, limit=10)
+    assert (report["product_id"], report["orders"], report["units"], report["revenue"]) == (42, 4, 8, 40.0)
+
+
+def test_archived_days_are_never_rebuilt(db, monkeypatch):
+    archived, online = date(2019, 12, 31), date(2020, 1, 1)
+    item = {"product_id": 7, "product_name": "Old", "category_key": "old", "quantity": 1, "price_at_purchase": 3.0}
+    rollup.record_sales(db, [{"id": 1, "created_at": datetime(2019, 12, 31, 9), "items": [item]}])
+    db.commit()
+    monkeypatch.setattr(rollup, "archive_cutoff", lambda session: online)
+
+    with pytest.raises(ValueError):
+        rollup.rebuild_day(db, archived)
+    report = rollup.backfill(db, archived, online)
+    checked = rollup.check(db, archived, online, fix=True)
+
+    assert (report["days"], checked["days"]) == (1, 1)
+    assert db.query(SalesDaily.orders).filter(SalesDaily.day == archived).scalar() == 1
@@ -0,0 +1,85 @@
+import pytest
+
+
+def cart_quantities(client, headers):
+    return [item["quantity"] for item in client.get("/cart/getCartSummary", headers=headers).json()["items"]]
+
+
+def test_add_then_remove_in_one_batch(client, user_headers, make_product):
+    product_id = make_product(stock=5)
+    response = client.post("/cart/batch", headers=user_headers, json={"operations": [
+        {"op": "add", "product_id": product_id, "quantity": 2},
+        {"op": "remove", "product_id": product_id},
+    ]})
+
+    assert response.status_code == 200, response.text
+    assert [result["status_code"] for result in response.json()["results"]] == [201, 200]
+    assert cart_quantities(client, user_headers) == []
+
+
+def test_add_remove_add_in_one_batch(client, user_headers, make_product):
+    product_id = make_product(stock=5)
+    response = client.post("/cart/batch", headers=user_headers, json={"operations": [
+        {"op": "add", "product_id": product_id, "quantity": 2},
+        {"op": "remove", "product_id": product_id},
+        {"op": "add", "product_id": product_id, "quantity": 3},
+    ]})
+
+    assert response.status_code == 200, response.text
+    assert cart_quantities(client, user_headers) == [3]
+
+
+def test_update_after_add_in_one_batch(client, user_headers, make_product):
+    product_id = make_product(stock=5)
+    response = client.post("/cart/batch", headers=user_headers, json={"operations": [
+        {"op": "add", "product_id": product_id, "quantity": 1},
+        {"op": "update", "product_id": product_id, "quantity": 4},
+    ]})
+
+    assert response.status_code == 200, response.text
+    assert [result["status_code"] for result in response.json()["results"]] == [201, 200]
+    assert cart_quantities(client, user_headers) == [4]
+
+
+def test_remove_of_saved_item_then_add(client, user_headers, make_product):
+    product_id = make_product(stock=5)
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": product_id, "quantity": 1})
+    response = client.post("/cart/batch", headers=user_headers, json={"operations": [
+        {"op": "remove", "product_id": product_id},
+        {"op": "add", "product_id": product_id, "quantity": 2},
+    ]})
+
+    assert response.status_code == 200, response.text
+    assert cart_quantities(client, user_headers) == [2]
+
+
+@pytest.mark.parametrize("quantity", [0, -3])
+def test_non_positive_quantities_are_rejected(client, user_headers, make_product, quantity):
+    product_id = make_product(stock=5)
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": product_id, "quantity": 1})
+
+    # The app's validation handler answers schema errors with 400
+    responses = [
+        client.post("/cart/addToCart", headers=user_headers, json={"product_id": product_id, "quantity": quantity, "mode": "increment"}),
+        client.put(f"/cart/update/{product_id}", headers=user_headers, json={"quantity": quantity}),
+        client.post("/cart/batch", headers=user_headers, json={"operations": [
+            {"op": "update", "product_id": product_id, "quantity": quantity},
+        ]}),
+    ]
+
+    assert [response.status_code for response in responses] == [400, 400, 400]
+    assert {response.json()["message"] for response in responses} == {"Quantity must be at least 1."}
+    assert cart_quantities(client, user_headers) == [1]
+
+
+def test_cart_items_keep_the_list_shape(client, user_headers, make_product):
+    first, second = make_product(price=2.5), make_product(price=4)
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": first, "quantity": 2})
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": second, "quantity": 1})
+
+    items = client.get("/cart/getCartItems", headers=user_headers).json()
+    summary = client.get("/cart/getCartSummary", headers=user_headers).json()
+
+    assert [(item["quantity"], item["subtotal"]) for item in items] == [(2, 5.0), (1, 4.0)]
+    assert summary["items"] == items
+    assert (summary["total_items"], summary["total_amount"]) == (3, 9.0)
@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import event
+
+from app.cart import crud
+from app.core.database import engine
+
+
+@pytest.mark.parametrize("size", [1, 5, 40])
+def test_get_cart_items_uses_one_query_whatever_the_size(db, user_id, make_product, size):
+    for _ in range(size):
+        crud.add_to_cart(db, user_id, make_product(), 1)
+    db.expire_all()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        items = crud.get_cart_items(db, user_id)
+        names = [item.product.name for item in items]
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(names) == size
+    assert len(statements) == 1, statements
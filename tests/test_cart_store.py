@@ -0,0 +1,149 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.cart import models, store as cart_store
+from app.cart.schemas import CartOperation
+from app.core.database import DATABASE_URL, SessionLocal
+from app.products.models import Product
+
+
+@pytest.fixture(params=["sql", "memory"])
+def store(request):
+    """
+    The same behaviour is expected from both cart backends.
+    """
+    if request.param == "sql":
+        yield cart_store.SQLCartStore()
+        return
+    memory = cart_store.MemoryCartStore()
+    yield memory
+    memory.close()
+
+
+def saved_lines(db, user_id):
+    db.expire_all()
+    return {
+        row.product_id: row.quantity
+        for row in db.query(models.CartItem).filter_by(user_id=user_id).all()
+    }
+
+
+def test_add_get_update_remove(store, db, user_id, make_product):
+    first, second = make_product(price=2.5), make_product(price=4)
+
+    assert store.add(db, user_id, first, 2) == "Product added to cart."
+    assert store.add(db, user_id, first, 1, mode="increment") == "Product quantity increased in cart."
+    store.add(db, user_id, second, 1)
+    assert store.update(db, user_id, second, 3) == "Cart item quantity updated successfully."
+    cart = store.get_cart(db, user_id)
+    assert [(item.product.id, item.quantity, item.subtotal) for item in cart["items"]] == [(first, 3, 7.5), (second, 3, 12)]
+    assert (cart["total_items"], cart["total_amount"]) == (6, 19.5)
+
+    assert store.remove(db, user_id, first) == "Product removed from cart successfully."
+    store.flush(user_id)
+    assert saved_lines(db, user_id) == {second: 3}
+
+
+@pytest.mark.parametrize("stock, product_exists, in_cart, status_code", [
+    (5, False, False, 404),
+    (0, True, False, 400),
+    (5, True, True, 409),
+])
+def test_add_errors(store, db, user_id, make_product, stock, product_exists, in_cart, status_code):
+    product_id = make_product(stock=stock) if product_exists else 10 ** 6
+    if in_cart:
+        store.add(db, user_id, product_id, 1)
+
+    with pytest.raises(HTTPException) as error:
+        store.add(db, user_id, product_id, 1)
+    assert error.value.status_code == status_code
+
+
+def test_update_and_remove_missing_line(store, db, user_id, make_product):
+    product_id = make_product()
+    for call in (lambda: store.update(db, user_id, product_id, 2), lambda: store.remove(db, user_id, product_id)):
+        with pytest.raises(HTTPException) as error:
+            call()
+        assert error.value.status_code == 404
+
+
+def test_batch(store, db, user_id, make_product):
+    product_id, sold_out = make_product(), make_product(stock=0)
+    summary = store.batch(db, user_id, [
+        CartOperation(op="add", product_id=product_id, quantity=1),
+        CartOperation(op="add", product_id=sold_out, quantity=1),
+        CartOperation(op="update", product_id=product_id, quantity=4),
+        CartOperation(op="remove", product_id=sold_out),
+    ])
+
+    assert [result["status_code"] for result in summary["results"]] == [201, 400, 200, 404]
+    assert (summary["applied"], summary["failed"]) == (2, 2)
+    store.flush(user_id)
+    assert saved_lines(db, user_id) == {product_id: 4}
+
+
+def test_memory_batch_without_changes_is_not_dirty(db, user_id, make_product):
+    memory = cart_store.MemoryCartStore()
+    try:
+        memory.batch(db, user_id, [CartOperation(op="remove", product_id=make_product())])
+        assert user_id not in memory._dirty
+    finally:
+        memory.close()
+
+
+def test_memory_flush_drops_rejected_lines_per_user(db, user_id, make_product, monkeypatch):
+    # SQLite only checks foreign keys when asked to
+    engine = create_engine(DATABASE_URL)
+    event.listen(engine, "connect", lambda connection, _: connection.execute("PRAGMA foreign_keys=ON"))
+    monkeypatch.setattr(cart_store, "SessionLocal", sessionmaker(autoflush=False, bind=engine))
+
+    memory = cart_store.MemoryCartStore()
+    try:
+        kept, deleted = make_product(), make_product()
+        memory.add(db, user_id, kept, 1)
+        memory.add(db, user_id, deleted, 2)
+        db.query(Product).filter(Product.id == deleted).delete()
+        db.commit()
+
+        memory.flush(user_id)
+
+        assert saved_lines(db, user_id) == {kept: 1}
+        assert [item.product.id for item in memory.get_cart(db, user_id)["items"]] == [kept]
+        assert user_id not in memory._dirty
+    finally:
+        memory.close()
+        engine.dispose()
+
+
+@pytest.mark.parametrize("quantity", [0, -2])
+def test_add_and_update_reject_non_positive_quantities(store, db, user_id, make_product, quantity):
+    product_id = make_product()
+    store.add(db, user_id, product_id, 2)
+
+    for call in (lambda: store.add(db, user_id, product_id, quantity, mode="increment"),
+                 lambda: store.update(db, user_id, product_id, quantity)):
+        with pytest.raises(HTTPException) as error:
+            call()
+        assert error.value.status_code == 400
+    assert [item.quantity for item in store.get_cart(db, user_id)["items"]] == [2]
+
+
+def test_concurrent_increments_are_not_lost(db, user_id, make_product):
+    product_id = make_product(stock=1000)
+
+    def add(_):
+        session = SessionLocal()
+        try:
+            return cart_store.SQLCartStore().add(session, user_id, product_id, 1, mode="increment")
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(8) as pool:
+        messages = list(pool.map(add, range(40)))
+
+    assert messages.count("Product added to cart.") == 1
+    assert saved_lines(db, user_id) == {product_id: 40}
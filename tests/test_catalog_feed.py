@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+
+def export(client, admin_headers, file_format="ndjson", since=None):
+    params = {"format": file_format}
+    if since is not None:
+        params["since"] = since.isoformat()
+    response = client.get("/admin/products/export", headers=admin_headers, params=params)
+    assert response.status_code == 200, response.text
+    if file_format == "csv":
+        return list(csv.DictReader(io.StringIO(response.text)))
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize("file_format", ["ndjson", "csv"])
+def test_incremental_export_emits_tombstones(client, admin_headers, make_product, file_format):
+    kept, deleted = make_product(), make_product()
+    since = datetime.utcnow()
+    client.put(f"/admin/products/update/{kept}", headers=admin_headers, json={
+        "name": f"Feed {kept}", "price": 12, "stock": 3, "category": "Tests",
+        "description": "", "image_url": "https://example.com/p.jpg",
+    })
+    assert client.delete(f"/admin/products/delete/{deleted}", headers=admin_headers).status_code == 200
+
+    rows = export(client, admin_headers, file_format, since)
+
+    by_id = {int(row["id"]): row for row in rows}
+    assert by_id[kept]["name"] == f"Feed {kept}"
+    if file_format == "csv":
+        assert (by_id[kept]["deleted"], by_id[deleted]["deleted"], by_id[deleted]["name"]) == ("", "true", "")
+    else:
+        assert by_id[deleted] == {"id": deleted, "deleted": True}
+    # Full exports have no tombstones
+    assert deleted not in {int(row["id"]) for row in export(client, admin_headers, file_format)}
+
+
+def test_incremental_export_can_be_imported(client, admin_headers, make_product):
+    since = datetime.utcnow()
+    make_product()
+    client.delete(f"/admin/products/delete/{make_product()}", headers=admin_headers)
+    feed = "".join(json.dumps(row) + "\n" for row in export(client, admin_headers, since=since))
+
+    response = client.post(
+        "/admin/products/import", headers=admin_headers, files={"file": ("feed.ndjson", feed.encode())}
+    )
+
+    assert response.status_code == 200, response.text
+    assert (response.json()["upserted"], response.json()["failed"]) == (1, 0)
+
+
+def test_import_export_round_trip_with_the_largest_chunk(client, admin_headers):
+    feed = "".join(
+        json.dumps({"name": f"Bulk {index}", "price": index % 50 + 1, "stock": index % 7, "category": "Bulk"}) + "\n"
+        for index in range(2500)
+    )
+
+    def upload(body, chunk_size):
+        response = client.post(
+            "/admin/products/import", headers=admin_headers, params={"chunk_size": chunk_size},
+            files={"file": ("catalog.ndjson", body.encode())},
+        )
+        return response.status_code, response.json()
+
+    # Larger chunks would exceed SQLite's bound parameter limit
+    assert upload(feed, 5000)[0] == 400
+    status_code, report = upload(feed, 2000)
+    assert status_code == 200 and (report["upserted"], report["failed"]) == (2500, 0), report
+
+    exported = [row for row in export(client, admin_headers) if row["category"] == "Bulk"]
+    status_code, report = upload("".join(json.dumps(row) + "\n" for row in exported), 2000)
+    assert (report["upserted"], report["failed"]) == (2500, 0), report
+    assert {(row["name"], row["price"], row["stock"]) for row in exported} == {
+        (f"Bulk {index}", index % 50 + 1, index % 7) for index in range(2500)
+    }
@@ -0,0 +1,103 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.auth.models import User
+from app.cart.models import CartItem
+from app.checkout import crud
+from app.checkout.models import IdempotencyKey
+from app.core.database import engine
+from app.products.models import Product
+
+
+def test_in_progress_key_is_kept_until_its_lease_expires(db, user_id):
+    first = crud._claim_key(db, user_id, "order-1")
+    assert first is not None
+
+    # Long past the duplicate wait, but the owner's lease still runs
+    db.query(IdempotencyKey).filter(IdempotencyKey.id == first).update(
+        {"created_at": datetime.utcnow() - timedelta(seconds=crud.IDEMPOTENCY_WAIT_SECONDS * 10)}
+    )
+    db.commit()
+    assert crud._claim_key(db, user_id, "order-1") is None
+
+    db.query(IdempotencyKey).filter(IdempotencyKey.id == first).update(
+        {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+    reclaimed = crud._claim_key(db, user_id, "order-1")
+    assert reclaimed is not None
+    db.expire_all()
+    assert db.query(IdempotencyKey.expires_at).filter(IdempotencyKey.id == reclaimed).scalar() > datetime.utcnow()
+
+
+def test_idempotency_key_replays_the_first_response(client, make_product, user_headers, db):
+    product_id = make_product(stock=5)
+    headers = {**user_headers, "Idempotency-Key": "order-1"}
+
+    # Failed checkouts are not stored, so the key can be retried
+    assert client.post("/checkout", headers=headers).status_code == 400
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": product_id, "quantity": 2})
+    first = client.post("/checkout", headers=headers)
+    assert first.status_code == 201, first.text
+    assert "Idempotent-Replayed" not in first.headers
+
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": product_id, "quantity": 1})
+    replay = client.post("/checkout", headers=headers)
+    assert replay.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+    db.expire_all()
+    assert db.query(Product.stock).filter(Product.id == product_id).scalar() == 3
+
+    # A new key places a new order
+    second = client.post("/checkout", headers={**user_headers, "Idempotency-Key": "order-2"})
+    assert second.status_code == 201
+    assert second.json()["order"]["id"] != first.json()["order"]["id"]
+
+
+def test_concurrent_checkouts_do_not_oversell(client, make_product, user_headers_factory, db):
+    hot, other = make_product(stock=5), make_product(stock=100)
+    users = [user_headers_factory() for _ in range(12)]
+    for headers in users:
+        assert client.post("/cart/addToCart", headers=headers, json={"product_id": hot, "quantity": 1}).status_code == 201
+        client.post("/cart/addToCart", headers=headers, json={"product_id": other, "quantity": 2})
+
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda headers: client.post("/checkout", headers=headers), users))
+
+    codes = Counter(response.status_code for response in responses)
+    assert codes[201] == 5 and codes[400] == 7, codes
+    db.expire_all()
+    stock = dict(db.query(Product.id, Product.stock).filter(Product.id.in_([hot, other])).all())
+    # Losing checkouts leave the other line untouched
+    assert stock == {hot: 0, other: 100 - 2 * codes[201]}
+
+
+def test_checkout_statements_do_not_grow_with_the_cart(db, make_product):
+    def checkout_statements(lines):
+        product_ids = [make_product() for _ in range(lines)]
+        user = User(name="Test", email=f"lines{lines}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add_all(CartItem(user_id=user.id, product_id=product_id, quantity=1) for product_id in product_ids)
+        db.commit()
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            order = crud.process_checkout(db, user)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert len(order["order"]["items"]) == lines
+        return statements
+
+    single, many = checkout_statements(1), checkout_statements(8)
+
+    assert len(single) == len(many), many
+    assert sum(statement.startswith("INSERT INTO order_items") for statement in many) == 1
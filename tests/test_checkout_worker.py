@@ -0,0 +1,70 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.checkout import worker
+from app.products.models import Product
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """
+    Async checkout with a running pool of two workers.
+    """
+    pool = worker.CheckoutPool(workers=2, batch_size=10, queue_size=100)
+    pool.start()
+    monkeypatch.setattr(worker, "CHECKOUT_MODE", "async")
+    monkeypatch.setattr(worker, "_pool", pool)
+    return pool
+
+
+def wait_for_order(client, headers, order_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        order = client.get(f"/orders/{order_id}", headers=headers).json()
+        if order["status"] != "pending" or time.monotonic() > deadline:
+            return order
+        time.sleep(0.05)
+
+
+def test_async_checkout_is_completed_by_the_workers(pool, client, make_product, user_headers_factory, db):
+    hot = make_product(stock=3)
+    users = [user_headers_factory() for _ in range(6)]
+    for headers in users:
+        client.post("/cart/addToCart", headers=headers, json={"product_id": hot, "quantity": 1})
+
+    with ThreadPoolExecutor(6) as executor:
+        responses = list(executor.map(lambda headers: client.post("/checkout", headers=headers), users))
+    assert {response.status_code for response in responses} == {202}, [response.text for response in responses]
+    assert {response.json()["status"] for response in responses} == {"pending"}
+
+    orders = [wait_for_order(client, headers, response.json()["order_id"]) for headers, response in zip(users, responses)]
+    assert Counter(order["status"] for order in orders) == {"paid": 3, "cancelled": 3}
+    db.expire_all()
+    assert db.query(Product.stock).filter(Product.id == hot).scalar() == 0
+
+
+def test_full_queue_completes_the_order_in_the_request(monkeypatch, client, make_product, user_headers_factory):
+    # Never started, so the single queue slot stays taken
+    pool = worker.CheckoutPool(workers=1, batch_size=10, queue_size=1)
+    monkeypatch.setattr(worker, "CHECKOUT_MODE", "async")
+    monkeypatch.setattr(worker, "_pool", pool)
+    product_id = make_product(stock=5)
+    first, second = user_headers_factory(), user_headers_factory()
+    for headers in (first, second):
+        client.post("/cart/addToCart", headers=headers, json={"product_id": product_id, "quantity": 1})
+
+    assert client.post("/checkout", headers=first).json()["status"] == "pending"
+    response = client.post("/checkout", headers=second)
+    assert response.status_code == 202
+    assert response.json()["status"] == "paid"
+
+
+def test_async_checkout_without_workers_is_unavailable(monkeypatch, client, make_product, user_headers):
+    monkeypatch.setattr(worker, "CHECKOUT_MODE", "async")
+    monkeypatch.setattr(worker, "_pool", None)
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": make_product(), "quantity": 1})
+
+    assert client.post("/checkout", headers=user_headers).status_code == 503
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from app.products.facets import facet_index
+
+
+def category_facet(client, category, **params):
+    facets = client.get("/products/facets", params={"category": category, **params}).json()
+    [facet] = [facet for facet in facets["categories"] if facet["category"] == category]
+    return facet, facets
+
+
+def test_facet_counts_and_buckets(client, make_product):
+    category = "Facet Counts"
+    for price, stock in ((500, 0), (500, 3), (2000, 1), (30000, 2)):
+        make_product(price=price, stock=stock, category=category)
+
+    facet, facets = category_facet(client, category)
+    assert (facet["count"], facet["in_stock"], facets["total"]) == (4, 3, 4)
+    assert {bucket["min"]: bucket["count"] for bucket in facets["price_buckets"] if bucket["count"]} == {
+        0: 2, 1000: 1, 25000: 1,
+    }
+
+    facet, facets = category_facet(client, category, min_price=1000, max_price=30000)
+    assert (facet["count"], facet["in_stock"], facets["total"]) == (2, 2, 2)
+
+
+def test_rebuild_replays_changes_made_while_reading(db, make_product):
+    category = "Facet Race"
+    removed = make_product(category=category)
+    added = SimpleNamespace(id=10 ** 6, category=category, price=5.0, stock=1)
+
+    def query(*columns):
+        rows = db.query(*columns).all()
+        # Committed by another request after the rebuild read its rows
+        facet_index.upsert(added)
+        facet_index.discard(removed)
+        return SimpleNamespace(all=lambda: rows)
+
+    try:
+        facet_index.rebuild(SimpleNamespace(query=query))
+        assert facet_index.facets(category)["total"] == 1
+        assert removed not in facet_index._products and added.id in facet_index._products
+    finally:
+        facet_index.discard(added.id)
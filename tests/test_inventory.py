@@ -0,0 +1,117 @@
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.auth.models import User
+from app.cart.models import CartItem
+from app.checkout import crud as checkout_crud
+from app.products import crud
+from app.products.facets import facet_index
+from app.products.models import InventoryShard, Product
+
+
+def set_shards(client, admin_headers, product_id, shards):
+    response = client.put(f"/admin/products/{product_id}/inventory", headers=admin_headers, json={"shards": shards})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_short_order_keeps_drained_shards_in_stock(client, admin_headers, make_product, db):
+    sharded = make_product(stock=2)
+    plain = make_product(stock=1)
+    set_shards(client, admin_headers, sharded, 2)
+
+    # Async checkout cancels the short order and commits the rest of its batch
+    with pytest.raises(HTTPException):
+        checkout_crud.deduct_stock(db, 0, {sharded: 2, plain: 5})
+    db.commit()
+
+    assert client.get(f"/admin/products/{sharded}/inventory", headers=admin_headers).json()["total"] == 2
+    assert db.query(Product.stock).filter(Product.id == sharded).scalar() == 2
+
+
+def test_draining_order_marks_sharded_product_sold_out(client, admin_headers, user_headers, make_product, db):
+    sharded = make_product(stock=2)
+    set_shards(client, admin_headers, sharded, 2)
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": sharded, "quantity": 2})
+
+    response = client.post("/checkout", headers=user_headers)
+
+    assert response.status_code == 201, response.text
+    assert db.query(Product.stock).filter(Product.id == sharded).scalar() == 0
+
+
+def test_stock_keyset_pages_cover_sharded_products(client, admin_headers, user_headers, make_product, db):
+    category = "Keyset Stock"
+    sharded = make_product(stock=30, category=category)
+    others = [make_product(stock=stock, category=category) for stock in (28, 20, 10)]
+    set_shards(client, admin_headers, sharded, 4)
+    # The shards now total 25 while products.stock still says 30
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": sharded, "quantity": 5})
+    assert client.post("/checkout", headers=user_headers).status_code == 201
+
+    seen, cursor = [], None
+    while True:
+        db.expire_all()
+        page, cursor = crud.filter_public_products_keyset(db, category=category, sort_by="stock", cursor=cursor, page_size=1)
+        seen.extend(product.id for product in page)
+        if cursor is None:
+            break
+
+    assert seen == [sharded] + others
+
+
+def drift_shards(db, product_id, total):
+    # Another worker drained the shards; products.stock still has the admin-written value
+    db.query(InventoryShard).filter(InventoryShard.product_id == product_id).update({"stock": 0})
+    db.query(InventoryShard).filter(InventoryShard.product_id == product_id, InventoryShard.shard == 0).update({"stock": total})
+    db.commit()
+
+
+def test_export_and_facets_report_shard_totals(client, admin_headers, make_product, db, monkeypatch):
+    category = "Shard Totals"
+    sharded = make_product(stock=30, category=category)
+    set_shards(client, admin_headers, sharded, 4)
+    drift_shards(db, sharded, 0)
+
+    exported = [json.loads(line) for line in client.get("/admin/products/export", headers=admin_headers).text.splitlines()]
+    assert {row["id"]: row["stock"] for row in exported}[sharded] == 0
+
+    monkeypatch.setattr(facet_index, "_loaded_at", None)
+    facets = client.get("/products/facets", params={"category": category}).json()
+    assert [(facet["count"], facet["in_stock"]) for facet in facets["categories"] if facet["category"] == category] == [(1, 0)]
+
+
+def test_pending_order_precheck_uses_shard_totals(client, admin_headers, make_product, db, user_id):
+    sharded = make_product(stock=30)
+    set_shards(client, admin_headers, sharded, 4)
+    drift_shards(db, sharded, 3)
+    db.add(CartItem(user_id=user_id, product_id=sharded, quantity=5))
+    db.commit()
+
+    with pytest.raises(HTTPException) as error:
+        checkout_crud.create_pending_order(db, db.get(User, user_id))
+    assert error.value.status_code == 400
+    assert error.value.detail.endswith("Available: 3")
+
+
+@pytest.mark.parametrize("shards", [0, 8])
+def test_hot_product_checkout_under_load(client, admin_headers, make_product, user_headers_factory, db, shards, record_property):
+    hot = make_product(stock=8)
+    if shards:
+        set_shards(client, admin_headers, hot, shards)
+    users = [user_headers_factory() for _ in range(12)]
+    for headers in users:
+        client.post("/cart/addToCart", headers=headers, json={"product_id": hot, "quantity": 1})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(8) as pool:
+        codes = Counter(pool.map(lambda headers: client.post("/checkout", headers=headers).status_code, users))
+    record_property("checkout_seconds", round(time.perf_counter() - started, 3))
+
+    assert codes == {201: 8, 400: 4}, codes
+    assert client.get(f"/admin/products/{hot}/inventory", headers=admin_headers).json()["total"] == 0
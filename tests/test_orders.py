@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.checkout import crud as checkout_crud, worker
+from app.orders import cache as order_cache, crud, models
+
+
+def add_orders(db, user_id, created_at):
+    orders = [models.Order(user_id=user_id, total_amount=5, created_at=at) for at in created_at]
+    db.add_all(orders)
+    db.commit()
+    return orders
+
+
+def test_history_cursor_pages_through_ties_without_gaps(db, user_id):
+    base = datetime(2024, 5, 1, 12)
+    # Several orders share each timestamp, so pages must break ties on id
+    orders = add_orders(db, user_id, [base + timedelta(minutes=index // 4) for index in range(23)])
+    expected = [order.id for order in sorted(orders, key=lambda order: (order.created_at, order.id), reverse=True)]
+
+    seen, cursor = [], ""
+    while True:
+        page, cursor = crud.get_user_orders_keyset(db, user_id, cursor, limit=5)
+        seen.extend(order.id for order in page)
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_history_cursor_respects_filters(db, user_id):
+    base = datetime(2024, 6, 1)
+    orders = add_orders(db, user_id, [base + timedelta(days=index) for index in range(10)])
+    orders[3].status = models.OrderStatus.cancelled
+    db.commit()
+
+    start, end = base + timedelta(days=2), base + timedelta(days=8)
+    seen, cursor = [], ""
+    while True:
+        page, cursor = crud.get_user_orders_keyset(db, user_id, cursor, 2, start, end, models.OrderStatus.paid)
+        seen.extend(order.id for order in page)
+        if cursor is None:
+            break
+
+    assert seen == [orders[index].id for index in (7, 6, 5, 4, 2)]
+
+
+def test_history_page_is_served_by_the_user_created_index(db, user_id):
+    add_orders(db, user_id, [datetime(2024, 7, 1)] * 3)
+    query = crud._user_orders_query(db, user_id)
+    statement = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+
+    plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+
+    assert "ix_orders_user_created" in plan
+    # Rows come back in index order, without a sort step
+    assert "TEMP B-TREE" not in plan
+
+
+def test_history_rejects_a_bad_cursor(client, user_headers):
+    response = client.get("/orders/history", params={"cursor": "not-a-cursor"}, headers=user_headers)
+
+    assert response.status_code == 400
+
+
+def test_order_detail_cache_follows_completion(monkeypatch, client, make_product, user_headers, db):
+    # Async checkout with no running workers leaves the order pending until completed below
+    monkeypatch.setattr(worker, "CHECKOUT_MODE", "async")
+    monkeypatch.setattr(worker, "_pool", worker.CheckoutPool(workers=1, batch_size=10, queue_size=10))
+    product_id = make_product(stock=5)
+    client.post("/cart/addToCart", headers=user_headers, json={"product_id": product_id, "quantity": 2})
+    order_id = client.post("/checkout", headers=user_headers).json()["order_id"]
+    user_id = db.query(models.Order.user_id).filter(models.Order.id == order_id).scalar()
+
+    # Pending orders are never cached
+    assert client.get(f"/orders/{order_id}", headers=user_headers).json()["status"] == "pending"
+    assert order_cache.get_order(order_id, user_id) is None
+
+    # A stale entry (as if cached by another request) is dropped once the order completes
+    order_cache.detail_cache.set((order_id, user_id), b"stale")
+    checkout_crud.complete_pending_orders(db, [(order_id, user_id, {product_id: 2})])
+    assert order_cache.get_order(order_id, user_id) is None
+
+    paid = client.get(f"/orders/{order_id}", headers=user_headers)
+    assert paid.json()["status"] == "paid"
+    hits = order_cache.cache_stats()["hits"]
+    assert client.get(f"/orders/{order_id}", headers=user_headers).content == paid.content
+    assert order_cache.cache_stats()["hits"] == hits + 1
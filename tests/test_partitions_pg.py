@@ -0,0 +1,101 @@
+import importlib.util
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.database import Base
+from app.orders import cache as order_cache, partitions
+
+# Runs against a throwaway PostgreSQL database only: its public schema is dropped and recreated
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), "..", "alembic", "versions", "c7a3e9f14b62_partition_orders_by_month.py"
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def migration(monkeypatch):
+    spec = importlib.util.spec_from_file_location("partition_orders_by_month", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "ORDERS_PARTITIONING", True)
+    return module
+
+
+def run(engine, step):
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            step()
+
+
+def add_order(conn, user_id, product_id, created_at, with_item_date=True):
+    order_id = conn.execute(text(
+        "INSERT INTO orders (user_id, total_amount, status, created_at) VALUES (:user, 5, 'paid', :at) RETURNING id"
+    ), {"user": user_id, "at": created_at}).scalar()
+    columns, values = "order_id, product_id, product_name, quantity, price_at_purchase", ":order, :product, 'P', 1, 5"
+    if with_item_date:
+        columns, values = columns + ", created_at", values + ", :at"
+    conn.execute(text(f"INSERT INTO order_items ({columns}) VALUES ({values})"),
+                 {"order": order_id, "product": product_id, "at": created_at})
+    return order_id
+
+
+def test_upgrade_create_archive_downgrade(engine, migration, tmp_path):
+    # Back to the schema this revision starts from
+    run(engine, migration.downgrade)
+    now = datetime.utcnow()
+    old_month = partitions.add_months(partitions.month_start(now.date()), -2)
+    with engine.begin() as conn:
+        user_id = conn.execute(text(
+            "INSERT INTO users (name, email, hashed_password, role) VALUES ('T', 't@example.com', 'x', 'user') RETURNING id"
+        )).scalar()
+        product_id = conn.execute(text(
+            "INSERT INTO products (name, price, stock, created_by, stock_shards) VALUES ('P', 5, 10, :user, 0) RETURNING id"
+        ), {"user": user_id}).scalar()
+        old_order = add_order(conn, user_id, product_id, datetime.combine(old_month, datetime.min.time()) + timedelta(days=3), False)
+        add_order(conn, user_id, product_id, now, False)
+
+    run(engine, migration.upgrade)
+
+    with engine.begin() as conn:
+        assert partitions.is_partitioned(conn)
+        names = {partition.name for partition in partitions.list_partitions(conn, "orders")}
+        assert {partitions.partition_name("orders", old_month), "orders_default"} <= names
+        assert conn.execute(text("SELECT count(*) FROM order_items WHERE created_at IS NULL")).scalar() == 0
+        # New orders land in the current month's partition
+        add_order(conn, user_id, product_id, now)
+        assert partitions.default_rows(conn, "orders") == 0
+        assert conn.execute(text("SELECT count(*) FROM orders")).scalar() == 3
+
+    order_cache.detail_cache.set((old_order, user_id), b"cached")
+    report = partitions.archive_month(engine, old_month, str(tmp_path))
+    assert report["rows"] == {"order_items": 1, "orders": 1}
+    assert order_cache.get_order(old_order, user_id) is None
+    with engine.connect() as conn:
+        assert partitions.partition_name("orders", old_month) not in {
+            partition.name for partition in partitions.list_partitions(conn, "orders")
+        }
+
+    run(engine, migration.downgrade)
+
+    with engine.connect() as conn:
+        assert not partitions.is_partitioned(conn)
+        assert conn.execute(text("SELECT count(*) FROM orders")).scalar() == 2
+        assert "created_at" not in {column["name"] for column in inspect(conn).get_columns("order_items")}
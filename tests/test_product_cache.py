@@ -0,0 +1,61 @@
+from app.products import cache as product_cache
+
+
+def update(client, admin_headers, product_id, **changes):
+    body = {
+        "name": f"Cached {product_id}", "price": 10, "stock": 10, "category": "Cached",
+        "description": "", "image_url": "https://example.com/p.jpg", **changes,
+    }
+    response = client.put(f"/admin/products/update/{product_id}", headers=admin_headers, json=body)
+    assert response.status_code == 200, response.text
+
+
+def test_detail_is_served_from_the_cache_until_an_admin_write(client, admin_headers, make_product):
+    product_id = make_product(category="Cached")
+    client.get(f"/products/{product_id}")
+    hits = product_cache.detail_cache.stats()["hits"]
+
+    assert client.get(f"/products/{product_id}").json()["price"] == "10.0"
+    assert product_cache.detail_cache.stats()["hits"] == hits + 1
+
+    update(client, admin_headers, product_id, price=25)
+    assert client.get(f"/products/{product_id}").json()["price"] == "25.0"
+
+
+def test_listing_follows_update_bulk_update_and_delete(client, admin_headers, make_product):
+    first, second = make_product(price=5, category="Cached list"), make_product(price=6, category="Cached list")
+
+    def listed():
+        return {item["id"]: item for item in client.get("/products/", params={"category": "Cached list"}).json()}
+
+    assert set(listed()) == {first, second}
+
+    update(client, admin_headers, first, category="Cached list", price=7)
+    assert listed()[first]["price"] == "7.0"
+
+    response = client.patch("/admin/products/bulk", headers=admin_headers, json=[{"id": second, "stock": 0}])
+    assert response.json()["updated"] == 1
+    assert listed()[second]["stock"] == 0
+
+    client.delete(f"/admin/products/delete/{first}", headers=admin_headers)
+    assert set(listed()) == {second}
+    assert client.get(f"/products/{first}").status_code == 404
+
+
+def test_etag_revalidation_and_change_after_an_admin_write(client, admin_headers, make_product):
+    product_id = make_product(category="Cached etag")
+    pages = ((f"/products/{product_id}", {}), ("/products/", {"category": "Cached etag"}))
+    for stock, (url, params) in enumerate(pages, start=20):
+        first = client.get(url, params=params)
+        etag = first.headers["ETag"]
+
+        not_modified = client.get(url, params=params, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+        assert client.get(url, params=params, headers={"If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+
+        update(client, admin_headers, product_id, category="Cached etag", stock=stock)
+        changed = client.get(url, params=params, headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
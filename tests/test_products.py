@@ -0,0 +1,145 @@
+import sqlite3
+
+import pytest
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import engine
+from app.products import crud, inventory, schemas
+from app.products.models import Product
+
+
+def test_bulk_update_retries_only_the_failed_chunk(db, make_product, monkeypatch):
+    first, second = make_product(stock=1), make_product(stock=1)
+    admin_id = db.query(Product.created_by).filter(Product.id == first).scalar()
+    calls = []
+    reset_shards = inventory.reset_shards
+
+    def locked_once(session, rows):
+        rows = list(rows)
+        calls.append([row.id for row in rows])
+        if len(calls) == 2:
+            raise OperationalError("UPDATE products", {}, sqlite3.OperationalError("database is locked"))
+        reset_shards(session, rows)
+    monkeypatch.setattr(inventory, "reset_shards", locked_once)
+
+    report = crud.bulk_update_products(
+        db, [schemas.ProductPatch(id=first, stock=5), schemas.ProductPatch(id=second, stock=7)], admin_id, chunk_size=1
+    )
+
+    assert report["updated"] == 2
+    assert calls == [[first], [second], [second]]
+    db.expire_all()
+    assert [stock for (stock,) in db.query(Product.stock).filter(Product.id.in_([first, second])).order_by(Product.id)] == [5, 7]
+
+
+def test_search_follows_product_updates(client, admin_headers, make_product):
+    product_id = make_product()
+    response = client.put(f"/admin/products/update/{product_id}", headers=admin_headers, json={
+        "name": f"Renamed {product_id}", "price": 10, "stock": 10, "category": "Tests",
+        "description": "zanzibar", "image_url": "https://example.com/p.jpg",
+    })
+    assert response.status_code == 200, response.text
+
+    found = client.get("/products/search", params={"keyword": "zanzibar"}).json()
+    assert [product["id"] for product in found] == [product_id]
+
+
+def add_product(client, admin_headers, name, description=""):
+    response = client.post("/admin/products/add", headers=admin_headers, json={
+        "name": name, "price": 10, "stock": 10, "category": "Tests",
+        "description": description, "image_url": "https://example.com/p.jpg",
+    })
+    assert response.status_code == 201, response.text
+
+
+def test_search_ranks_name_matches_first(client, admin_headers):
+    add_product(client, admin_headers, "Plain kettle", "Pairs well with a quokka mug")
+    add_product(client, admin_headers, "Quokka mug")
+
+    found = client.get("/products/search", params={"keyword": "quokka"}).json()
+    assert [product["name"] for product in found] == ["Quokka mug", "Plain kettle"]
+    second_page = client.get("/products/search", params={"keyword": "quokka", "page": 2, "page_size": 1}).json()
+    assert [product["name"] for product in second_page] == ["Plain kettle"]
+
+
+def test_search_is_one_statement_however_many_products_match(client, admin_headers, db):
+    for index in range(30):
+        add_product(client, admin_headers, f"Wombat {index}")
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        page = crud.search_products(db, "wombat", page=2, page_size=10)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(page) == 10
+    assert len(statements) == 1, statements
+
+
+def test_category_filter_matches_normalized_spellings(client, make_product):
+    ids = {make_product(category=category) for category in ("Garden  Tools", "garden tools", " GARDEN TOOLS ")}
+    make_product(category="Garden")
+
+    listed = client.get("/products/", params={"category": "Garden Tools", "cursor": "", "page_size": 10}).json()
+    assert len(listed["items"]) == len(ids)
+
+
+def test_category_filter_uses_the_category_index(db):
+    query = crud._public_products_query(db, category="Garden Tools", sort_by="price")
+    sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+
+    plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    assert "ix_products_category_key_price" in plan, plan
+
+
+def page_all(client, url, params, headers=None):
+    """
+    Follow next_cursor from the first page to the last and return every item.
+    """
+    items, cursor = [], ""
+    while cursor is not None:
+        body = client.get(url, params={**params, "cursor": cursor}, headers=headers).json()
+        items.extend(body["items"])
+        cursor = body["next_cursor"]
+    return items
+
+
+@pytest.mark.parametrize("sort_by", ["price", "name", "stock"])
+def test_public_keyset_pages_through_ties(client, make_product, sort_by):
+    category = f"Ties by {sort_by}"
+    # Three prices and three stock levels shared by nine products
+    for index in range(9):
+        make_product(price=10.0 + index % 3, stock=index % 3, category=category)
+
+    items = page_all(client, "/products/", {"category": category, "sort_by": sort_by, "page_size": 2})
+
+    column, direction = crud.PUBLIC_SORT_KEYS[sort_by]
+    expected = sorted(items, key=lambda item: (item[column], item["id"]), reverse=direction == "desc")
+    assert [item["id"] for item in items] == [item["id"] for item in expected]
+    assert len({item["id"] for item in items}) == 9
+
+
+def test_public_keyset_rejects_a_cursor_from_another_sort(client, make_product):
+    for _ in range(3):
+        make_product(category="Ties mixed")
+    first = client.get("/products/", params={"category": "Ties mixed", "cursor": "", "page_size": 1}).json()
+
+    response = client.get("/products/", params={
+        "category": "Ties mixed", "cursor": first["next_cursor"], "page_size": 1, "sort_by": "name"
+    })
+    assert response.status_code == 400
+
+
+def test_admin_keyset_lists_every_product_once(client, admin_headers, make_product, db):
+    make_product()
+    items = page_all(client, "/admin/products/all", {"limit": 7}, admin_headers)
+
+    ids = [item["id"] for item in items]
+    assert ids == sorted(ids)
+    assert len(ids) == db.query(Product).count()
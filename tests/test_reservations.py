@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.cart import reservations
+from app.cart.models import StockReservation
+from app.checkout import crud as checkout_crud
+
+
+@pytest.fixture(autouse=True)
+def reservations_enabled(monkeypatch):
+    monkeypatch.setattr(reservations, "RESERVATIONS_ENABLED", True)
+
+
+def held(db, **filters):
+    db.expire_all()
+    return {row.product_id: row.quantity for row in db.query(StockReservation).filter_by(**filters).all()}
+
+
+def test_holds_block_other_carts_until_they_expire(client, make_product, user_headers_factory, db):
+    product_id = make_product(stock=3)
+    first, second = user_headers_factory(), user_headers_factory()
+    assert client.post("/cart/addToCart", headers=first, json={"product_id": product_id, "quantity": 2}).status_code == 201
+
+    response = client.post("/cart/addToCart", headers=second, json={"product_id": product_id, "quantity": 2})
+    assert response.status_code == 400
+    assert response.json()["message"].endswith("Available: 1")
+
+    db.query(StockReservation).filter_by(product_id=product_id).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert reservations.sweep(db) >= 1
+    assert held(db, product_id=product_id) == {}
+    assert client.post("/cart/addToCart", headers=second, json={"product_id": product_id, "quantity": 2}).status_code == 201
+
+
+def test_checkout_consumes_only_the_order_holds(db, user_id, make_product):
+    ordered, kept = make_product(), make_product()
+    reservations.hold(db, user_id, ordered, 2)
+    reservations.hold(db, user_id, kept, 1)
+    db.commit()
+
+    checkout_crud.deduct_stock(db, user_id, {ordered: 2})
+    db.commit()
+
+    assert held(db, user_id=user_id) == {kept: 1}
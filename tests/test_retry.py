@@ -0,0 +1,10 @@
+from app.core.retry import retry_metrics, retry_transaction
+
+
+def test_operation_name_works_for_any_module(db):
+    def ping(session):
+        return "pong"
+    ping.__module__ = "standalone"
+
+    assert retry_transaction(ping)(db) == "pong"
+    assert retry_metrics.snapshot()["operations"]["standalone.test_operation_name_works_for_any_module.<locals>.ping"]["calls"] == 1
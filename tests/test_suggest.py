@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from app.products.suggest import MAX_SUGGESTIONS, SuggestIndex
+
+
+def add_product(client, admin_headers, name, category):
+    response = client.post("/admin/products/add", headers=admin_headers, json={
+        "name": name, "price": 10, "stock": 10, "category": category,
+        "description": "", "image_url": "https://example.com/p.jpg",
+    })
+    assert response.status_code == 201, response.text
+
+
+def suggest(client, q, limit=10):
+    return client.get("/products/suggest", params={"q": q, "limit": limit})
+
+
+def test_categories_then_names_then_mid_name_matches():
+    index = SuggestIndex()
+    index._loaded_at = 0.0
+    for product_id, name, category in (
+        (1, "Wombat Pro Max", "Wombat Gear"),
+        (2, "Wombat", "Wombat Gear"),
+        (3, "Tiny wombat plush", "Toys"),
+    ):
+        index.upsert(SimpleNamespace(id=product_id, name=name, category=category))
+
+    assert [(item["type"], item["text"]) for item in index.suggest("  WOM")] == [
+        ("category", "Wombat Gear"), ("product", "Wombat"), ("product", "Wombat Pro Max"), ("product", "Tiny wombat plush"),
+    ]
+    assert [item["product_id"] for item in index.suggest("pro")] == [1]
+    assert len(index.suggest("wom", limit=2)) == 2
+    assert index.suggest(" ") == []
+
+    # The category disappears with its last product
+    index.discard(1)
+    index.discard(2)
+    assert [item["text"] for item in index.suggest("wom")] == ["Tiny wombat plush"]
+
+
+def test_suggest_follows_catalog_writes(client, admin_headers):
+    add_product(client, admin_headers, "Axolotl lamp", "Axolotl Decor")
+    assert [item["text"] for item in suggest(client, "axo").json()] == ["Axolotl Decor", "Axolotl lamp"]
+
+    [product] = suggest(client, "axolotl l").json()
+    response = client.put(f"/admin/products/update/{product['product_id']}", headers=admin_headers, json={
+        "name": "Newt lamp", "price": 10, "stock": 10, "category": "Axolotl Decor",
+        "description": "", "image_url": "https://example.com/p.jpg",
+    })
+    assert response.status_code == 200, response.text
+    assert [item["text"] for item in suggest(client, "axo").json()] == ["Axolotl Decor"]
+    assert [item["text"] for item in suggest(client, "lamp").json()] == ["Newt lamp"]
+
+    client.delete(f"/admin/products/delete/{product['product_id']}", headers=admin_headers)
+    assert suggest(client, "axo").json() == []
+
+
+def test_suggest_limit_is_bounded(client):
+    assert suggest(client, "a", MAX_SUGGESTIONS + 1).status_code == 400
+    assert suggest(client, "a", 0).status_code == 400